@@ -0,0 +1,87 @@
+"""Measures the token savings of uid aliasing over the llm calls of a recorded episode.
+
+    python -m benchmarks.aliasing_benchmark
+    python -m benchmarks.aliasing_benchmark --trace sandbox/traces/episode.json.gz
+
+Every record of the trace is aliased as AliasingRunnable would alias it. Input tokens compare the recorded prompt with
+the aliased prompt. Output tokens compare the recorded generation with the same generation written with aliases.
+Every aliased generation is also translated back and checked against the recorded one. Without --trace, a trace is
+recorded first by running synthetic episode rounds against the fake llm. Prints one JSON line per generation schema
+and a total line.
+"""
+
+import argparse
+import asyncio
+import json
+from typing import Dict
+
+from langchain_core.messages import messages_from_dict
+
+from benchmarks.synthetic_episodes import build_synthetic_episode_of_size
+from engine.episode_turn_graph import EpisodeTurnGraph
+from llm.aliasing import UidAliases
+from llm.fake_llm import FakeChatModel
+from llm.replay import EpisodeTrace, TraceRecorder
+from llm.token_counting import count_message_tokens, count_tokens
+from prompts import prompt_generations
+
+
+async def record_trace(
+    entity_count: int,
+    rounds: int,
+) -> EpisodeTrace:
+    episode = build_synthetic_episode_of_size(entity_count)
+    recorder = TraceRecorder(episode)
+    graph = EpisodeTurnGraph(base_model=FakeChatModel(seed=0), persist=False, trace_recorder=recorder)
+    for _ in range(rounds):
+        await graph.ainvoke_round(episode)
+    return recorder.trace
+
+
+def measure(trace: EpisodeTrace) -> Dict[str, Dict]:
+    totals: Dict[str, Dict] = {}
+    for record in trace.records:
+        messages = messages_from_dict([{"type": type, "data": {"content": content}} for type, content in record.messages])
+        schema = getattr(prompt_generations, record.schema_name)
+        generation = schema.model_validate(record.generation)
+
+        aliases = UidAliases.from_messages(messages)
+        aliased_generation = schema.model_validate(aliases.alias_generation(generation))
+        counts = totals.setdefault(record.schema_name, {
+            "calls": 0, "input_tokens": 0, "aliased_input_tokens": 0, "output_tokens": 0, "aliased_output_tokens": 0, "round_trip_failures": 0,
+        })
+        counts["calls"] += 1
+        counts["input_tokens"] += count_message_tokens(messages)
+        counts["aliased_input_tokens"] += count_message_tokens(aliases.alias_messages(messages))
+        counts["output_tokens"] += count_tokens(generation.model_dump_json())
+        counts["aliased_output_tokens"] += count_tokens(aliased_generation.model_dump_json())
+        if aliases.resolve_generation(aliased_generation) != generation:
+            counts["round_trip_failures"] += 1
+    return totals
+
+
+def with_reductions(counts: Dict) -> Dict:
+    return {
+        **counts,
+        "input_reduction": round(1 - counts["aliased_input_tokens"] / counts["input_tokens"], 3),
+        "output_reduction": round(1 - counts["aliased_output_tokens"] / counts["output_tokens"], 3),
+    }
+
+
+def main(args: argparse.Namespace) -> None:
+    trace = EpisodeTrace.load(args.trace) if args.trace else asyncio.run(record_trace(args.entities, args.rounds))
+    totals = measure(trace)
+    for schema_name, counts in totals.items():
+        print(json.dumps({"schema": schema_name, **with_reductions(counts)}))
+    print(json.dumps({
+        "schema": "total",
+        **with_reductions({key: sum(counts[key] for counts in totals.values()) for key in next(iter(totals.values()))}),
+    }))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--trace", default=None, help="gzipped EpisodeTrace saved by a TraceRecorder")
+    parser.add_argument("--entities", type=int, default=100, help="size of the synthetic episode recorded without --trace")
+    parser.add_argument("--rounds", type=int, default=5)
+    main(parser.parse_args())
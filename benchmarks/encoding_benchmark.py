@@ -0,0 +1,132 @@
+"""Times TOON encoding per prompt with and without the per-entity fragment cache.
+
+    python -m benchmarks.encoding_benchmark
+    python -m benchmarks.encoding_benchmark --entities 2000 --turns 50 --updates-per-turn 2
+
+Every turn updates a few random entities through apply_entity_update, then builds every living actor's action prompt.
+encode_ms_per_prompt is the time spent encoding inside those prompt builds. episode_encode_ms is the time to encode
+every location, junction, actor and item in the episode once, which is what unscoped prompts paid. "uncached" encodes
+every entity from scratch each time, as encode_pydantic did, and "cached" reuses the rows of unchanged entities.
+"""
+
+import argparse
+import json
+import random
+from contextlib import ExitStack, contextmanager
+from time import perf_counter
+from typing import Callable, Dict, Iterator, List
+
+from toon import encode_pydantic
+
+import prompts.survivor_agent_prompt as survivor_agent_prompt
+import prompts.zombie_agent_prompt as zombie_agent_prompt
+from benchmarks.phase_timer import PhaseTimer
+from benchmarks.synthetic_episodes import build_synthetic_episode_of_size
+from engine.episode_turn_graph import apply_entity_update
+from models.core.episode import Episode
+from models.core.enums import ActorHealth, ActorType
+from prompts.toon_encoding import encode_entities
+
+PROMPT_MODULES = [survivor_agent_prompt, zombie_agent_prompt]
+
+
+def uncached_encode_entities(entities) -> str:
+    return encode_pydantic(list(entities))
+
+
+@contextmanager
+def replaced(
+    module,
+    attribute: str,
+    value: Callable,
+) -> Iterator[None]:
+    original = getattr(module, attribute)
+    setattr(module, attribute, value)
+    try:
+        yield
+    finally:
+        setattr(module, attribute, original)
+
+
+def update_random_entities(
+    episode: Episode,
+    count: int,
+    rng: random.Random,
+) -> None:
+    pools = [episode.locations, episode.junctions, episode.actors, episode.items]
+    for _ in range(count):
+        entity = rng.choice(list(rng.choice(pools).values()))
+        apply_entity_update(episode, entity.model_copy(update={"fact": f"{entity.fact}, and then something changed"}))
+
+
+def encode_episode(
+    episode: Episode,
+    encode: Callable,
+) -> None:
+    encode(list(episode.locations.values()))
+    encode(list(episode.junctions.values()))
+    encode(episode.get_observable_actors())
+    encode(list(episode.items.values()))
+
+
+def run(
+    entity_count: int,
+    turns: int,
+    updates_per_turn: int,
+    cached: bool,
+) -> Dict:
+    episode = build_synthetic_episode_of_size(entity_count)
+    rng = random.Random(0)
+    encode = encode_entities if cached else uncached_encode_entities
+    timer = PhaseTimer()
+    prompts = 0
+    episode_seconds = 0.0
+
+    with ExitStack() as stack:
+        if not cached:
+            for module in PROMPT_MODULES:
+                stack.enter_context(replaced(module, "encode_entities", uncached_encode_entities))
+        stack.enter_context(timer.patched(
+            [(module, "encode_pydantic", "encode") for module in PROMPT_MODULES]
+            + [(module, "encode_entities", "encode") for module in PROMPT_MODULES]
+        ))
+        for _ in range(turns):
+            update_random_entities(episode, updates_per_turn, rng)
+            for actor in episode.actors.values():
+                if actor.health == ActorHealth.DEAD:
+                    continue
+                if actor.type == ActorType.HUMAN:
+                    survivor_agent_prompt.SurvivorAgentPrompt.build_prompt_messages(episode, actor.uid)
+                else:
+                    zombie_agent_prompt.ZombieAgentPrompt.build_prompt_messages(episode, actor.uid)
+                prompts += 1
+            start = perf_counter()
+            encode_episode(episode, encode)
+            episode_seconds += perf_counter() - start
+
+    return {
+        "encode_ms_per_prompt": round(1000 * timer.phases["encode"].seconds / prompts, 4),
+        "episode_encode_ms": round(1000 * episode_seconds / turns, 3),
+    }
+
+
+def main(args: argparse.Namespace) -> None:
+    results: List[Dict] = []
+    for cached in [False, True]:
+        results.append(run(args.entities, args.turns, args.updates_per_turn, cached))
+    uncached, cached = results
+    print(json.dumps({
+        "entities": args.entities,
+        "turns": args.turns,
+        "updates_per_turn": args.updates_per_turn,
+        **{f"uncached_{key}": value for key, value in uncached.items()},
+        **{f"cached_{key}": value for key, value in cached.items()},
+    }))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entities", type=int, default=2000)
+    parser.add_argument("--turns", type=int, default=50)
+    parser.add_argument("--updates-per-turn", type=int, default=2, help="entities changed by each turn's outcomes")
+    main(parser.parse_args())
@@ -0,0 +1,118 @@
+"""Compares actor surroundings lookups served from the environment index against scanning every entity.
+
+    python -m benchmarks.environment_index_benchmark
+    python -m benchmarks.environment_index_benchmark --items 1000 10000 100000 --moves 2000
+
+Builds synthetic episodes with a fixed number of locations and actors and a growing number of items, then looks up
+every actor's junctions, visible actors, and reachable items both ways. The scan does what get_group_surroundings did
+before the index, so its time grows with the episode while the indexed lookup only grows with what is nearby. Between
+lookup passes, items are moved through apply_entity_update to check that the index follows updates. Prints one JSON
+line per size, with whether both ways found the same entities.
+"""
+
+import argparse
+import json
+import random
+from time import perf_counter
+from typing import Dict, List, Tuple
+
+from benchmarks.synthetic_episodes import build_synthetic_episode
+from engine.episode_turn_graph import apply_entity_update
+from models.core.episode import Episode
+from models.core.junction_graph import is_see_through
+
+Surroundings = Tuple[List[str], List[str], List[str]]
+
+
+def scan_surroundings(
+    episode: Episode,
+    actor_id: str,
+) -> Surroundings:
+    """The junction, actor, and item uids around an actor, found by scanning every entity"""
+    location_id = episode.actors[actor_id].location_id
+    junctions = [junction for junction in episode.junctions.values() if location_id in (junction.from_location_id, junction.to_location_id)]
+    visible_location_ids = {location_id}
+    for junction in junctions:
+        if is_see_through(junction):
+            visible_location_ids.update([junction.from_location_id, junction.to_location_id])
+    actors = [actor for actor in episode.actors.values() if actor.location_id in visible_location_ids]
+    reaching_ids = {actor.uid for actor in actors if actor.location_id == location_id} | {location_id}
+    items = [item for item in episode.items.values() if item.holder_id in reaching_ids]
+    return [junction.uid for junction in junctions], [actor.uid for actor in actors], [item.uid for item in items]
+
+
+def indexed_surroundings(
+    episode: Episode,
+    actor_id: str,
+) -> Surroundings:
+    surroundings = episode.get_group_surroundings([actor_id])
+    return list(surroundings.junctions), list(surroundings.actors), list(surroundings.items)
+
+
+def move_items(
+    episode: Episode,
+    moves: int,
+    rng: random.Random,
+) -> None:
+    item_ids = list(episode.items)
+    holder_ids = list(episode.locations) + list(episode.actors)
+    for _ in range(moves):
+        item = episode.items[rng.choice(item_ids)]
+        apply_entity_update(episode, item.model_copy(update={"holder_id": rng.choice(holder_ids)}))
+
+
+def benchmark_size(
+    item_count: int,
+    args: argparse.Namespace,
+) -> Dict:
+    episode = build_synthetic_episode(
+        location_count=args.locations,
+        survivor_count=args.survivors,
+        zombie_count=args.zombies,
+        item_count=item_count,
+    )
+    rng = random.Random(0)
+    actor_ids = list(episode.actors)
+
+    build_start = perf_counter()
+    episode.get_index()
+    build_seconds = perf_counter() - build_start
+
+    scan_seconds = indexed_seconds = move_seconds = 0.0
+    same = True
+    for _ in range(args.passes):
+        start = perf_counter()
+        scanned = [scan_surroundings(episode, actor_id) for actor_id in actor_ids]
+        scan_seconds += perf_counter() - start
+        start = perf_counter()
+        indexed = [indexed_surroundings(episode, actor_id) for actor_id in actor_ids]
+        indexed_seconds += perf_counter() - start
+        same = same and scanned == indexed
+
+        start = perf_counter()
+        move_items(episode, args.moves, rng)
+        move_seconds += perf_counter() - start
+
+    lookups = args.passes * len(actor_ids)
+    return {
+        "items": item_count,
+        "lookups": lookups,
+        "index_build_ms": round(1000 * build_seconds, 2),
+        "scan_us_per_lookup": round(1e6 * scan_seconds / lookups, 1),
+        "indexed_us_per_lookup": round(1e6 * indexed_seconds / lookups, 1),
+        "update_us_per_move": round(1e6 * move_seconds / max(args.passes * args.moves, 1), 1),
+        "same_surroundings": same,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--locations", type=int, default=200)
+    parser.add_argument("--survivors", type=int, default=50)
+    parser.add_argument("--zombies", type=int, default=100)
+    parser.add_argument("--passes", type=int, default=5, help="lookups of every actor's surroundings, with item moves between them")
+    parser.add_argument("--moves", type=int, default=500, help="items moved through apply_entity_update after each pass")
+    args = parser.parse_args()
+    for item_count in args.items:
+        print(json.dumps(benchmark_size(item_count, args)))
@@ -0,0 +1,125 @@
+"""Compares forking an episode against deep copying it, for what-if branches that make a few updates.
+
+    python -m benchmarks.episode_fork_benchmark
+    python -m benchmarks.episode_fork_benchmark --entities 20000 --history 50000 --updates 50
+
+Builds a synthetic episode with an action history, then times branches made both ways. Each branch applies --updates
+entity updates through apply_entity_update and records an action and outcome for each, as a rollout would. Deep copied
+branches are thrown away. Forks are discarded, except for the last one, which is merged back, and the episode it
+merges into is checked against the last deep copied branch. Prints one JSON line.
+"""
+
+import argparse
+import json
+import random
+from time import perf_counter
+from typing import Callable, List
+
+from benchmarks.synthetic_episodes import build_synthetic_episode_of_size
+from engine.episode_turn_graph import apply_entity_update
+from models.core.actions import Action, Outcome
+from models.core.enums import ActionType, EntityType, OutcomeType
+from models.core.episode import Episode
+
+
+def add_history(
+    episode: Episode,
+    count: int,
+    rng: random.Random,
+) -> None:
+    actor_ids = list(episode.actors)
+    for _ in range(count):
+        actor = episode.actors[rng.choice(actor_ids)]
+        action = Action(
+            uid=f"action_{rng.randint(1000000, 9999999)}",
+            type=ActionType.INSPECT,
+            location_id=actor.location_id,
+            source_actor_id=actor.uid,
+            target_entity_id=actor.location_id,
+            target_entity_type=EntityType.LOCATION,
+            fact="Searches the room",
+        )
+        episode.add_actions([action])
+        episode.add_outcomes([Outcome(action_id=action.uid, type=OutcomeType.SUCCESS, attention=1, fact="Finds nothing")])
+
+
+def branch_updates(
+    episode: Episode,
+    updates: int,
+    seed: int,
+) -> None:
+    """Moves random items to random holders, recording an action and outcome for each move"""
+    rng = random.Random(seed)
+    item_ids = list(episode.items)
+    holder_ids = list(episode.locations) + list(episode.actors)
+    for _ in range(updates):
+        item = episode.items[rng.choice(item_ids)]
+        apply_entity_update(episode, item.model_copy(update={"holder_id": rng.choice(holder_ids)}))
+    add_history(episode, updates, rng)
+
+
+def timed(
+    branches: int,
+    branch: Callable[[int], object],
+) -> List[float]:
+    """Seconds taken by each branch"""
+    seconds = []
+    for seed in range(branches):
+        start = perf_counter()
+        branch(seed)
+        seconds.append(perf_counter() - start)
+    return seconds
+
+
+def run(args: argparse.Namespace) -> dict:
+    episode = build_synthetic_episode_of_size(args.entities)
+    add_history(episode, args.history, random.Random(0))
+    last_seed = args.branches - 1
+
+    deep_copies: List[Episode] = []
+
+    def deep_copy_branch(seed: int) -> None:
+        branch = episode.model_copy(deep=True)
+        branch_updates(branch, args.updates, seed)
+        if seed == last_seed:
+            deep_copies.append(branch)
+
+    def fork_branch(seed: int) -> None:
+        fork = episode.fork()
+        branch_updates(fork, args.updates, seed)
+        if seed == last_seed:
+            fork.merge()
+        else:
+            fork.discard()
+
+    fork_seconds = []
+    for _ in range(args.branches):
+        start = perf_counter()
+        episode.fork().discard()
+        fork_seconds.append(perf_counter() - start)
+
+    deep_copy_seconds = timed(args.branches, deep_copy_branch)
+    branch_seconds = timed(args.branches, fork_branch)
+    merged = deep_copies[0]
+    return {
+        "entities": args.entities,
+        "history": args.history,
+        "updates": args.updates,
+        "fork_us": round(1e6 * min(fork_seconds), 1),
+        "deep_copy_branch_ms": round(1000 * sum(deep_copy_seconds) / args.branches, 2),
+        "fork_branch_ms": round(1000 * sum(branch_seconds) / args.branches, 3),
+        "speedup": round(sum(deep_copy_seconds) / sum(branch_seconds), 1),
+        "merged_matches_deep_copy": all(
+            getattr(episode, pool) == getattr(merged, pool)
+            for pool in ("locations", "junctions", "actors", "items", "actions", "outcomes")
+        ),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entities", type=int, default=5000)
+    parser.add_argument("--history", type=int, default=5000, help="actions, each with an outcome, in the episode before branching")
+    parser.add_argument("--updates", type=int, default=10, help="entity updates per branch")
+    parser.add_argument("--branches", type=int, default=20)
+    print(json.dumps(run(parser.parse_args())))
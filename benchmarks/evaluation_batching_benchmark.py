@@ -0,0 +1,64 @@
+"""Compares evaluator prompt tokens per resolved action across evaluation scopes.
+
+    python -m benchmarks.evaluation_batching_benchmark
+
+Runs one simultaneous round per scope on the same synthetic episode and prints JSON lines.
+"""
+
+import argparse
+import asyncio
+import json
+from typing import Dict
+
+from benchmarks.synthetic_episodes import build_synthetic_episode
+from engine.episode_turn_graph import EpisodeTurnGraph, EvaluationScope
+from llm.fake_llm import FakeChatModel
+from prompts.prompt_generations import BatchOutcomeEvaluationGeneration, OutcomeEvaluationGeneration
+
+
+async def benchmark_scope(
+    scope: EvaluationScope,
+    location_count: int,
+    survivor_count: int,
+    zombie_count: int,
+    latency: float,
+) -> Dict:
+    episode = build_synthetic_episode(location_count=location_count, survivor_count=survivor_count, zombie_count=zombie_count, item_count=location_count * 2)
+    model = FakeChatModel(latency=latency, seed=0)
+    graph = EpisodeTurnGraph(base_model=model, evaluation_scope=scope)
+
+    round_state = await graph.ainvoke_round(episode)
+
+    evaluator_stats = [model.stats[schema.__name__] for schema in [OutcomeEvaluationGeneration, BatchOutcomeEvaluationGeneration] if schema.__name__ in model.stats]
+    evaluator_tokens = sum(stats.prompt_tokens for stats in evaluator_stats)
+    resolved = len(round_state["outcomes"])
+    return {
+        "scope": scope.value,
+        "actions": len(round_state["actions"]),
+        "resolved_actions": resolved,
+        "evaluator_calls": sum(stats.calls for stats in evaluator_stats),
+        "evaluator_prompt_tokens": evaluator_tokens,
+        "tokens_per_resolved_action": round(evaluator_tokens / resolved, 1) if resolved else None,
+        "round_seconds": round(round_state["elapsed_seconds"], 3),
+    }
+
+
+async def main(
+    location_count: int,
+    survivor_count: int,
+    zombie_count: int,
+    latency: float,
+) -> None:
+    for scope in EvaluationScope:
+        result = await benchmark_scope(scope, location_count, survivor_count, zombie_count, latency)
+        print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--locations", type=int, default=6)
+    parser.add_argument("--survivors", type=int, default=6)
+    parser.add_argument("--zombies", type=int, default=12)
+    parser.add_argument("--latency", type=float, default=0.0)
+    args = parser.parse_args()
+    asyncio.run(main(args.locations, args.survivors, args.zombies, args.latency))
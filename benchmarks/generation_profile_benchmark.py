@@ -0,0 +1,183 @@
+"""Compares the FULL and FAST generation profiles on the llm calls of recorded episodes.
+
+    python -m benchmarks.generation_profile_benchmark
+    python -m benchmarks.generation_profile_benchmark --trace sandbox/traces/a.json.gz sandbox/traces/b.json.gz --model gpt-4.1
+
+Every survivor, zombie, horde, and outcome evaluator call in the traces is sent again under both profiles. FULL sends
+the recorded prompt as is, and FAST sends it with the instructions swapped for the prompt's FAST_INSTRUCTIONS and asks
+for its fast generation type. Latency and completion tokens are measured per call. Quality is agreement with the
+recorded generation: the share of actions with the recorded type and target, and the share of outcomes with the
+recorded outcome type. A model resampled on the same prompt rarely reproduces a recording exactly, so FULL's agreement
+is the baseline that FAST's is compared against.
+
+Without --trace, a trace is recorded first by running synthetic episode rounds against the fake llm, and both profiles
+are answered by the fake llm too, which exercises the harness but says nothing about quality. Prints one JSON line per
+schema and profile, and a total line per profile.
+"""
+
+import argparse
+import asyncio
+import json
+import re
+from time import perf_counter
+from typing import Dict, List, Tuple, Type
+
+from langchain_core.messages import BaseMessage, messages_from_dict
+from pydantic import BaseModel
+
+from benchmarks.synthetic_episodes import build_synthetic_episode_of_size
+from engine.episode_turn_graph import EpisodeTurnGraph
+from llm.fake_llm import FakeChatModel
+from llm.replay import EpisodeTrace, TraceRecord, TraceRecorder
+from llm.token_counting import count_tokens
+from prompts.batch_outcome_evaluator_agent_prompt import BatchOutcomeEvaluatorAgentPrompt
+from prompts.outcome_evaluator_agent_prompt import OutcomeEvaluatorAgentPrompt
+from prompts.prompt_generations import GenerationProfile
+from prompts.survivor_agent_prompt import SurvivorAgentPrompt
+from prompts.zombie_agent_prompt import ZombieAgentPrompt
+from prompts.zombie_horde_agent_prompt import ZombieHordeAgentPrompt
+
+"""recorded schema name -> (prompt class, FULL generation type, FAST generation type)"""
+PROFILED_SCHEMAS: Dict[str, Tuple[type, Type[BaseModel], Type[BaseModel]]] = {
+    full.__name__: (prompt, full, fast)
+    for prompt in [SurvivorAgentPrompt, ZombieAgentPrompt, ZombieHordeAgentPrompt]
+    for full, fast in [(prompt.GENERATED_TYPE, prompt.FAST_GENERATED_TYPE)]
+} | {
+    prompt.generated_type(patches).__name__: (prompt, prompt.generated_type(patches), prompt.generated_type(patches, fast=True))
+    for prompt in [OutcomeEvaluatorAgentPrompt, BatchOutcomeEvaluatorAgentPrompt]
+    for patches in [False, True]
+}
+HORDE_SIZE = re.compile(r"\((\d+) actions in total\)")
+
+
+async def record_trace(
+    entity_count: int,
+    rounds: int,
+) -> EpisodeTrace:
+    episode = build_synthetic_episode_of_size(entity_count)
+    recorder = TraceRecorder(episode)
+    graph = EpisodeTurnGraph(base_model=FakeChatModel(seed=0), persist=False, trace_recorder=recorder, zombie_hordes=True)
+    for _ in range(rounds):
+        await graph.ainvoke_round(episode)
+    return recorder.trace
+
+
+def profile_request(
+    record: TraceRecord,
+    profile: GenerationProfile,
+) -> Tuple[Type[BaseModel], List[BaseMessage]]:
+    """The schema and messages of a recorded call, as the profile would have sent it"""
+    prompt, full_schema, fast_schema = PROFILED_SCHEMAS[record.schema_name]
+    contents = [content for _, content in record.messages]
+    if profile == GenerationProfile.FAST:
+        instructions, fast_instructions = prompt.INSTRUCTIONS, prompt.FAST_INSTRUCTIONS
+        horde_size = HORDE_SIZE.search("\n".join(contents))
+        if horde_size is not None:
+            instructions = instructions.format(horde_size=horde_size.group(1))
+            fast_instructions = fast_instructions.format(horde_size=horde_size.group(1))
+        contents = [content.replace(instructions, fast_instructions) for content in contents]
+    messages = messages_from_dict([
+        {"type": type, "data": {"content": content}} for (type, _), content in zip(record.messages, contents)
+    ])
+    return (fast_schema if profile == GenerationProfile.FAST else full_schema), messages
+
+
+def agreement(
+    recorded: Dict,
+    generation: BaseModel,
+) -> float:
+    """The share of the recorded decisions the generation repeats"""
+    if "outcomes" in recorded:
+        recorded_types = {outcome["action_id"]: outcome["type"] for outcome in recorded["outcomes"]}
+        generated_types = {outcome.action_id: outcome.type for outcome in generation.outcomes}
+        if not recorded_types:
+            return float(not generated_types)
+        return sum(generated_types.get(action_id) == type for action_id, type in recorded_types.items()) / len(recorded_types)
+
+    recorded_actions = recorded["actions"] if "actions" in recorded else [recorded["action"]]
+    generated_actions = list(generation.actions) if hasattr(generation, "actions") else [generation.action]
+    matches = sum(
+        action["type"] == generated.type and action["target_entity_id"] == generated.target_entity_id
+        for action, generated in zip(recorded_actions, generated_actions)
+    )
+    return matches / max(len(recorded_actions), len(generated_actions), 1)
+
+
+async def measure(
+    base_model,
+    records: List[TraceRecord],
+    profile: GenerationProfile,
+    concurrency: int,
+) -> Dict[str, Dict]:
+    semaphore = asyncio.Semaphore(concurrency)
+    totals: Dict[str, Dict] = {}
+
+    async def call(record: TraceRecord) -> None:
+        schema, messages = profile_request(record, profile)
+        counts = totals.setdefault(record.schema_name, {
+            "calls": 0, "errors": 0, "seconds": 0.0, "completion_tokens": 0, "agreement": 0.0,
+        })
+        async with semaphore:
+            start = perf_counter()
+            try:
+                generation = schema.model_validate(await base_model.with_structured_output(schema).ainvoke(messages))
+            except Exception:
+                counts["errors"] += 1
+                return
+            counts["seconds"] += perf_counter() - start
+        counts["calls"] += 1
+        counts["completion_tokens"] += count_tokens(generation.model_dump_json())
+        counts["agreement"] += agreement(record.generation, generation)
+
+    await asyncio.gather(*[call(record) for record in records])
+    return totals
+
+
+def summary(
+    counts: Dict,
+) -> Dict:
+    calls = max(counts["calls"], 1)
+    return {
+        "calls": counts["calls"],
+        "errors": counts["errors"],
+        "ms_per_call": round(1000 * counts["seconds"] / calls, 1),
+        "completion_tokens_per_call": round(counts["completion_tokens"] / calls, 1),
+        "agreement": round(counts["agreement"] / calls, 3),
+    }
+
+
+async def run(args: argparse.Namespace) -> None:
+    if args.trace:
+        traces = [EpisodeTrace.load(path) for path in args.trace]
+    else:
+        traces = [await record_trace(args.entities, args.rounds)]
+    records = [record for trace in traces for record in trace.records if record.schema_name in PROFILED_SCHEMAS]
+
+    if args.model:
+        from langchain_openai import ChatOpenAI
+
+        base_model = ChatOpenAI(model=args.model, temperature=0.9)
+    else:
+        base_model = FakeChatModel(latency=args.fake_latency, seconds_per_1k_completion_tokens=args.fake_seconds_per_1k_completion_tokens, seed=0)
+
+    for profile in GenerationProfile:
+        totals = await measure(base_model, records, profile, args.concurrency)
+        for schema_name, counts in sorted(totals.items()):
+            print(json.dumps({"profile": profile, "schema": schema_name, **summary(counts)}))
+        print(json.dumps({
+            "profile": profile,
+            "schema": "total",
+            **summary({key: sum(counts[key] for counts in totals.values()) for key in next(iter(totals.values()))}),
+        }))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--trace", nargs="+", default=None, help="gzipped EpisodeTraces saved by a TraceRecorder")
+    parser.add_argument("--model", default=None, help="openai model to send the calls to, instead of the fake llm")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--entities", type=int, default=100, help="size of the synthetic episode recorded without --trace")
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--fake-latency", type=float, default=0.05)
+    parser.add_argument("--fake-seconds-per-1k-completion-tokens", type=float, default=1.0)
+    asyncio.run(run(parser.parse_args()))
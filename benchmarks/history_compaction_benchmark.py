@@ -0,0 +1,82 @@
+"""Shows that action history compaction keeps agent prompts flat over a long episode.
+
+    python -m benchmarks.history_compaction_benchmark
+    python -m benchmarks.history_compaction_benchmark --turns 500 --every 50 --entities 40 --keep-last 4
+
+Runs the same turns twice through EpisodeTurnGraph with the fake llm, once with a HistoryCompactor and once without,
+and every --every turns prints the mean prompt tokens and build time of every living actor's action prompt as a JSON
+line. Compaction uses the fact summarizer, so no synopsis llm calls are made.
+"""
+
+import argparse
+import asyncio
+import json
+from time import perf_counter
+from typing import Dict, List
+
+from benchmarks.synthetic_episodes import build_synthetic_episode_of_size
+from engine.episode_turn_graph import EpisodeTurnGraph
+from engine.history_compaction import HistoryCompactor
+from llm.fake_llm import FakeChatModel
+from llm.token_counting import count_message_tokens
+from models.core.episode import Episode
+from models.core.enums import ActorHealth, ActorType
+from prompts.survivor_agent_prompt import SurvivorAgentPrompt
+from prompts.zombie_agent_prompt import ZombieAgentPrompt
+
+
+def measure_prompts(episode: Episode) -> Dict:
+    tokens: List[int] = []
+    start = perf_counter()
+    for actor in episode.actors.values():
+        if actor.health == ActorHealth.DEAD:
+            continue
+        prompt = SurvivorAgentPrompt if actor.type == ActorType.HUMAN else ZombieAgentPrompt
+        tokens.append(count_message_tokens(prompt.build_prompt_messages(episode, actor.uid)))
+    return {
+        "prompt_tokens": round(sum(tokens) / len(tokens)),
+        "build_ms": round(1000 * (perf_counter() - start) / len(tokens), 3),
+    }
+
+
+async def run(
+    entity_count: int,
+    turns: int,
+    every: int,
+    compactor: HistoryCompactor | None,
+) -> List[Dict]:
+    episode = build_synthetic_episode_of_size(entity_count)
+    graph = EpisodeTurnGraph(base_model=FakeChatModel(seed=0), persist=False, history_compactor=compactor)
+    samples = []
+    for turn in range(1, turns + 1):
+        living_actor_ids = [actor.uid for actor in episode.actors.values() if actor.health != ActorHealth.DEAD]
+        await graph.ainvoke(episode, living_actor_ids[turn % len(living_actor_ids)])
+        if turn % every == 0:
+            if compactor is not None:
+                await compactor.drain()
+            samples.append({"turn": turn, "actions": len(episode.actions), **measure_prompts(episode)})
+    return samples
+
+
+async def main(args: argparse.Namespace) -> None:
+    uncompacted = await run(args.entities, args.turns, args.every, None)
+    compacted = await run(args.entities, args.turns, args.every, HistoryCompactor(keep_last=args.keep_last, fold_batch=args.fold_batch))
+    for before, after in zip(uncompacted, compacted):
+        print(json.dumps({
+            "turn": before["turn"],
+            "actions": before["actions"],
+            "uncompacted_prompt_tokens": before["prompt_tokens"],
+            "compacted_prompt_tokens": after["prompt_tokens"],
+            "uncompacted_build_ms": before["build_ms"],
+            "compacted_build_ms": after["build_ms"],
+        }))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=500)
+    parser.add_argument("--every", type=int, default=50, help="turns between prompt measurements")
+    parser.add_argument("--entities", type=int, default=40, help="total entities in the synthetic episode")
+    parser.add_argument("--keep-last", type=int, default=4, help="actions per actor kept verbatim")
+    parser.add_argument("--fold-batch", type=int, default=8, help="actions an actor accumulates past keep-last before they are folded")
+    asyncio.run(main(parser.parse_args()))
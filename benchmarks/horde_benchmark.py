@@ -0,0 +1,72 @@
+"""Compares per-zombie action generation against horde batching.
+
+    python -m benchmarks.horde_benchmark
+
+Every zombie is packed into a single location, so horde mode issues one zombie call per round.
+The fake llm charges a fixed latency plus a per-prompt-token cost, and results are printed as JSON lines.
+"""
+
+import argparse
+import asyncio
+import json
+from time import perf_counter
+from typing import Dict, List
+
+from benchmarks.synthetic_episodes import build_synthetic_episode
+from engine.episode_turn_graph import EpisodeTurnGraph
+from llm.fake_llm import FakeChatModel
+from models.core.enums import ActorType
+from prompts.prompt_generations import ZombieActionGeneration, ZombieHordeActionGeneration
+
+
+async def benchmark_horde_size(
+    zombie_count: int,
+    zombie_hordes: bool,
+    latency: float,
+    seconds_per_1k_prompt_tokens: float,
+) -> Dict:
+    episode = build_synthetic_episode(location_count=8, survivor_count=3, zombie_count=zombie_count, item_count=12, zombie_location_count=1)
+    model = FakeChatModel(latency=latency, seconds_per_1k_prompt_tokens=seconds_per_1k_prompt_tokens, seed=0)
+    graph = EpisodeTurnGraph(base_model=model, zombie_hordes=zombie_hordes)
+    zombie_ids = [actor.uid for actor in episode.actors.values() if actor.type == ActorType.ZOMBIE]
+
+    # zombie generation on its own, so the comparison isn't diluted by survivor and evaluator calls
+    start = perf_counter()
+    await asyncio.gather(*[
+        graph._apropose_group_actions(episode, group, None) for group in graph._round_groups(episode, zombie_ids)
+    ])
+    generation_seconds = perf_counter() - start
+    zombie_stats = [model.stats[schema.__name__] for schema in [ZombieActionGeneration, ZombieHordeActionGeneration] if schema.__name__ in model.stats]
+    zombie_calls = sum(stats.calls for stats in zombie_stats)
+    zombie_prompt_tokens = sum(stats.prompt_tokens for stats in zombie_stats)
+
+    round_state = await graph.ainvoke_round(episode)
+
+    return {
+        "zombies": zombie_count,
+        "mode": "horde" if zombie_hordes else "per_zombie",
+        "zombie_calls": zombie_calls,
+        "zombie_prompt_tokens": zombie_prompt_tokens,
+        "zombie_generation_seconds": round(generation_seconds, 3),
+        "round_seconds": round(round_state["elapsed_seconds"], 3),
+    }
+
+
+async def main(
+    sizes: List[int],
+    latency: float,
+    seconds_per_1k_prompt_tokens: float,
+) -> None:
+    for zombie_count in sizes:
+        for zombie_hordes in [False, True]:
+            result = await benchmark_horde_size(zombie_count, zombie_hordes, latency, seconds_per_1k_prompt_tokens)
+            print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5, 20, 50])
+    parser.add_argument("--latency", type=float, default=1.0)
+    parser.add_argument("--seconds-per-1k-prompt-tokens", type=float, default=0.1)
+    args = parser.parse_args()
+    asyncio.run(main(args.sizes, args.latency, args.seconds_per_1k_prompt_tokens))
@@ -0,0 +1,127 @@
+"""Measures junction graph queries and incremental updates against breadth first searches over the junctions dict.
+
+    python -m benchmarks.junction_graph_benchmark
+    python -m benchmarks.junction_graph_benchmark --locations 100 1000 --hops 3 --updates 500
+
+For each landmark size, every location's hop distances are precomputed, then random locations are queried for the
+locations within --hops, a shortest path, and who can hear them. The baseline answers the within query the way the
+schedulers did before the graph, searching outwards over every junction. Junctions are then opened, closed, broken,
+and repaired through apply_entity_update, and the repaired distances are checked against a freshly built graph.
+Prints one JSON line per size.
+"""
+
+import argparse
+import json
+import random
+from collections import deque
+from time import perf_counter
+from typing import Dict
+
+from benchmarks.synthetic_episodes import build_synthetic_episode
+from engine.episode_turn_graph import apply_entity_update
+from models.core.enums import JunctionAccessibility, JunctionCondition
+from models.core.episode import Episode
+from models.core.junction_graph import JunctionGraph, Traversal
+
+
+def scan_within(
+    episode: Episode,
+    location_id: str,
+    hops: int,
+) -> Dict[str, int]:
+    locations = {location_id: 0}
+    frontier = deque([location_id])
+    while frontier:
+        current_id = frontier.popleft()
+        if locations[current_id] >= hops:
+            continue
+        for junction in episode.junctions.values():
+            for here, there in [(junction.from_location_id, junction.to_location_id), (junction.to_location_id, junction.from_location_id)]:
+                if here == current_id and there not in locations:
+                    locations[there] = locations[current_id] + 1
+                    frontier.append(there)
+    return locations
+
+
+def timed(
+    queries: int,
+    query,
+) -> float:
+    """Microseconds per call"""
+    start = perf_counter()
+    for _ in range(queries):
+        query()
+    return round(1e6 * (perf_counter() - start) / queries, 2)
+
+
+def benchmark_size(
+    location_count: int,
+    args: argparse.Namespace,
+) -> Dict:
+    episode = build_synthetic_episode(
+        location_count=location_count,
+        survivor_count=location_count // 4,
+        zombie_count=location_count // 2,
+        item_count=location_count,
+    )
+    rng = random.Random(0)
+    location_ids = list(episode.locations)
+
+    start = perf_counter()
+    graph = episode.get_junction_graph()
+    graph.precompute([Traversal.ANY, Traversal.PASSABLE, Traversal.AUDIBLE])
+    precompute_seconds = perf_counter() - start
+    episode.get_index()
+
+    sources = [rng.choice(location_ids) for _ in range(args.queries)]
+    targets = [rng.choice(location_ids) for _ in range(args.queries)]
+    pairs = iter(zip(sources * 5, targets * 5))
+    same_within = all(graph.within(source, args.hops) == scan_within(episode, source, args.hops) for source in sources[:100])
+
+    result = {
+        "locations": location_count,
+        "junctions": len(episode.junctions),
+        "precompute_ms": round(1000 * precompute_seconds, 1),
+        "scan_within_us": timed(min(args.queries, 200), lambda: scan_within(episode, rng.choice(location_ids), args.hops)),
+        "within_us": timed(args.queries, lambda: graph.within(rng.choice(location_ids), args.hops)),
+        "distance_us": timed(args.queries, lambda: graph.distance(*next(pairs))),
+        "shortest_path_us": timed(args.queries, lambda: graph.shortest_path(*next(pairs))),
+        "listeners_us": timed(args.queries, lambda: episode.get_listeners(rng.choice(location_ids), args.hops)),
+        "same_within": same_within,
+    }
+
+    junction_ids = list(episode.junctions)
+    start = perf_counter()
+    for _ in range(args.updates):
+        junction = episode.junctions[rng.choice(junction_ids)]
+        apply_entity_update(episode, junction.model_copy(update={
+            "accessibility": rng.choice(list(JunctionAccessibility)),
+            "condition": rng.choice(list(JunctionCondition)),
+        }))
+        # queries between updates, so the repaired distances are the ones being served
+        graph.get_distances(rng.choice(location_ids), Traversal.PASSABLE)
+    update_seconds = perf_counter() - start
+
+    start = perf_counter()
+    fresh = JunctionGraph(episode.locations, episode.junctions)
+    fresh.precompute([Traversal.ANY, Traversal.PASSABLE, Traversal.AUDIBLE])
+    rebuild_seconds = perf_counter() - start
+    return result | {
+        "update_us": round(1e6 * update_seconds / args.updates, 1),
+        "rebuild_ms": round(1000 * rebuild_seconds, 1),
+        "same_distances_after_updates": all(
+            graph.get_distances(location_id, traversal) == fresh.get_distances(location_id, traversal)
+            for traversal in Traversal for location_id in location_ids
+        ),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--locations", type=int, nargs="+", default=[50, 200, 1000])
+    parser.add_argument("--hops", type=int, default=2)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--updates", type=int, default=200, help="junction state changes applied after the queries")
+    args = parser.parse_args()
+    for location_count in args.locations:
+        print(json.dumps(benchmark_size(location_count, args)))
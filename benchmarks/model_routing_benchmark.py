@@ -0,0 +1,60 @@
+"""Compares round latency with every call on the default tier against a routing policy that tiers the calls.
+
+    python -m benchmarks.model_routing_benchmark
+    python -m benchmarks.model_routing_benchmark --policy config/model_routing.json --entities 200 --rounds 5
+
+Both runs serve every tier from the fake llm with the tier's fake_latency, so they measure how many calls the policy
+moves to faster tiers and what that does to round latency. The untiered run uses the same policy without its rules.
+Prints one JSON line per run with the per-tier calls, tokens, and latency.
+"""
+
+import argparse
+import asyncio
+import json
+from time import perf_counter
+from typing import Dict
+
+from benchmarks.synthetic_episodes import build_synthetic_episode_of_size
+from engine.episode_turn_graph import EpisodeTurnGraph
+from engine.model_routing import ModelRouter, RoutingPolicy
+
+
+async def run(
+    policy: RoutingPolicy,
+    entity_count: int,
+    rounds: int,
+) -> Dict:
+    episode = build_synthetic_episode_of_size(entity_count)
+    router = ModelRouter(policy, offline=True)
+    graph = EpisodeTurnGraph(persist=False, model_router=router, zombie_hordes=True)
+    start = perf_counter()
+    for _ in range(rounds):
+        await graph.ainvoke_round(episode)
+    elapsed = perf_counter() - start
+    return {
+        "rules": len(policy.rules),
+        "seconds_per_round": round(elapsed / rounds, 3),
+        "tiers": {
+            name: {
+                "calls": stats.calls,
+                "prompt_tokens": stats.prompt_tokens,
+                "completion_tokens": stats.completion_tokens,
+                "ms_per_call": round(stats.ms_per_call, 1),
+            }
+            for name, stats in router.stats.items()
+        },
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    policy = RoutingPolicy.load(args.policy)
+    for run_policy in [policy.model_copy(update={"rules": []}), policy]:
+        print(json.dumps(await run(run_policy, args.entities, args.rounds)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--policy", default="config/model_routing.json")
+    parser.add_argument("--entities", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=3)
+    asyncio.run(main(parser.parse_args()))
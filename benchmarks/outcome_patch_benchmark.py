@@ -0,0 +1,164 @@
+"""Compares evaluator completion tokens and latency between full entity statuses and patch-style outcomes.
+
+    python -m benchmarks.outcome_patch_benchmark
+    python -m benchmarks.outcome_patch_benchmark --entities 200 --turns 40 --seconds-per-1k-completion-tokens 2
+
+Actor turns are recorded once against the fake llm, then replayed: every turn's actions are evaluated and applied
+again in each mode, starting from the same episode. Both modes answer with a responder that makes the same state
+changes. The acting actor's arousal rises and its emotion changes, and the searched location's condition worsens.
+"full" writes those changes as complete resulting entities and "patches" as only the changed fields. Evaluator
+latency grows with the generated tokens, as it does for a real model. Prints one JSON line per mode and checks that
+both replays end in the same state.
+"""
+
+import argparse
+import asyncio
+import json
+import re
+from itertools import cycle
+from time import perf_counter
+from typing import Any, Dict, List, Sequence, Tuple, Type
+
+from langchain_core.messages import BaseMessage
+from pydantic import BaseModel
+
+from benchmarks.synthetic_episodes import build_synthetic_episode_of_size
+from engine.episode_turn_graph import EpisodeTurnGraph, apply_outcomes_to_episode
+from llm.fake_llm import FakeChatModel
+from models.core.actions import Action, EntityPatch, Outcome, OutcomeDelta
+from models.core.entities import ActorEntity, LocationEntity
+from models.core.episode import Episode
+from models.core.enums import ActorArousal, ActorHealth, LocationCondition, OutcomeType
+
+ACTION_ID = re.compile(r"\baction_\d+\b")
+AROUSAL_STEPS = [ActorArousal.CALM, ActorArousal.ALERT, ActorArousal.INTENSE]
+CONDITION_STEPS = [LocationCondition.GOOD_CONDITION, LocationCondition.FUNCTIONAL, LocationCondition.DAMAGED]
+
+
+async def record_turns(
+    entity_count: int,
+    turns: int,
+) -> List[List[Action]]:
+    """The actions of turns taken by living actors in turn, generated against the starting episode"""
+    episode = build_synthetic_episode_of_size(entity_count)
+    graph = EpisodeTurnGraph(base_model=FakeChatModel(seed=0), persist=False)
+    living = [actor.uid for actor in episode.actors.values() if actor.health != ActorHealth.DEAD]
+    recorded = []
+    for _, actor_id in zip(range(turns), cycle(living)):
+        recorded.append(await graph.apropose_actions(episode, actor_id))
+    return recorded
+
+
+def next_step(
+    steps: List,
+    value: Any,
+) -> Any:
+    return steps[(steps.index(value) + 1) % len(steps)] if value in steps else steps[0]
+
+
+def changes_responder(
+    episode: Episode,
+    actions_by_id: Dict[str, Action],
+    patches: bool,
+):
+    """A responder that decides the same changes in both modes, reading the current state from the episode"""
+
+    def respond(
+        schema: Type[BaseModel],
+        messages: Sequence[BaseMessage],
+    ) -> BaseModel:
+        working: Dict[str, BaseModel] = {}
+        outcomes = []
+        text = "\n".join(str(message.content) for message in messages)
+        # the prompt's history also names earlier actions, which already have outcomes
+        evaluated = {outcome.action_id for outcome in episode.outcomes}
+        for action_id in dict.fromkeys(uid for uid in ACTION_ID.findall(text) if uid not in evaluated):
+            action = actions_by_id[action_id]
+            actor: ActorEntity = working.get(action.source_actor_id) or episode.actors[action.source_actor_id]
+            location: LocationEntity = working.get(action.target_entity_id) or episode.locations[action.target_entity_id]
+            arousal = next_step(AROUSAL_STEPS, actor.arousal)
+            emotion = "shaken" if actor.internal.emotion == "wary" else "wary"
+            condition = next_step(CONDITION_STEPS, location.condition)
+            working[actor.uid] = actor.model_copy(update={
+                "arousal": arousal,
+                "internal": actor.internal.model_copy(update={"emotion": emotion}),
+            })
+            working[location.uid] = location.model_copy(update={"condition": condition})
+
+            outcome = {"action_id": action_id, "type": OutcomeType.SUCCESS, "attention": 2, "fact": f"{action_id} turns up signs of a struggle"}
+            if patches:
+                outcomes.append(OutcomeDelta(**outcome, patches=[
+                    EntityPatch(uid=actor.uid, arousal=arousal, emotion=emotion),
+                    EntityPatch(uid=location.uid, condition=condition),
+                ]))
+            else:
+                outcomes.append(Outcome(
+                    **outcome,
+                    resulting_source_entity_status=working[actor.uid],
+                    resulting_target_entity_status=working[location.uid],
+                ))
+        values = {name: "fake" for name, field in schema.model_fields.items() if field.annotation is str}
+        return schema(**values, outcomes=outcomes)
+
+    return respond
+
+
+async def replay(
+    entity_count: int,
+    turns: List[List[Action]],
+    patches: bool,
+    args: argparse.Namespace,
+) -> Tuple[Dict, Episode]:
+    episode = build_synthetic_episode_of_size(entity_count)
+    actions_by_id = {action.uid: action for actions in turns for action in actions}
+    model = FakeChatModel(
+        latency=args.latency,
+        seconds_per_1k_completion_tokens=args.seconds_per_1k_completion_tokens,
+        responder=changes_responder(episode, actions_by_id, patches),
+    )
+    graph = EpisodeTurnGraph(base_model=model, persist=False, outcome_patches=patches)
+
+    evaluator_seconds = 0.0
+    for actions in turns:
+        episode.actions.extend(actions)
+        start = perf_counter()
+        outcomes = await graph.aadjudicate_actions(episode, actions)
+        evaluator_seconds += perf_counter() - start
+        episode.outcomes.extend(outcomes)
+        apply_outcomes_to_episode(episode, outcomes)
+
+    stats = next(iter(model.stats.values()))
+    return {
+        "mode": "patches" if patches else "full",
+        "evaluator_calls": stats.calls,
+        "completion_tokens_per_call": round(stats.completion_tokens / stats.calls, 1),
+        "prompt_tokens_per_call": round(stats.prompt_tokens / stats.calls, 1),
+        "evaluator_ms_per_call": round(1000 * evaluator_seconds / stats.calls, 1),
+    }, episode
+
+
+async def run(args: argparse.Namespace) -> None:
+    turns = await record_turns(args.entities, args.turns)
+    full, full_episode = await replay(args.entities, turns, False, args)
+    patched, patched_episode = await replay(args.entities, turns, True, args)
+    same_state = all(
+        getattr(full_episode, pool) == getattr(patched_episode, pool)
+        for pool in ("actors", "locations", "junctions", "items")
+    )
+    print(json.dumps(full))
+    print(json.dumps({
+        **patched,
+        "completion_token_reduction": round(1 - patched["completion_tokens_per_call"] / full["completion_tokens_per_call"], 3),
+        "latency_reduction": round(1 - patched["evaluator_ms_per_call"] / full["evaluator_ms_per_call"], 3),
+        "same_final_state": same_state,
+    }))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entities", type=int, default=100, help="size of the synthetic episode")
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.05, help="fixed seconds per evaluator call")
+    parser.add_argument("--seconds-per-1k-completion-tokens", type=float, default=1.0,
+                        help="simulated generation time, scaled down from real models so the benchmark runs quickly")
+    asyncio.run(run(parser.parse_args()))
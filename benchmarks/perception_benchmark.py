@@ -0,0 +1,106 @@
+"""Shows that agent prompt size is bounded by what an actor perceives, not by the size of the episode.
+
+    python -m benchmarks.perception_benchmark
+    python -m benchmarks.perception_benchmark --sizes 100 1000 --history-per-location 10
+    python -m benchmarks.perception_benchmark --history-per-location 40 --token-budget 3000
+
+Builds synthetic episodes of increasing size with an action history spread across every location, then prints the mean
+prompt tokens of each agent prompt per size as JSON lines. full_context_tokens is what the same working context would
+cost if it listed the whole episode, as the prompts did before perception scoping.
+"""
+
+import argparse
+import json
+import random
+from typing import Dict, List
+
+from toon import encode_pydantic
+
+from benchmarks.synthetic_episodes import build_synthetic_episode_of_size
+from llm.token_counting import count_message_tokens, count_tokens
+from models.core.actions import Action, Outcome
+from models.core.episode import Episode
+from models.core.enums import ActionType, ActorType, EntityType, OutcomeType
+from prompts.outcome_evaluator_agent_prompt import OutcomeEvaluatorAgentPrompt
+from prompts.survivor_agent_prompt import SurvivorAgentPrompt
+from prompts.zombie_agent_prompt import ZombieAgentPrompt
+
+
+def add_history(
+    episode: Episode,
+    history_per_location: int,
+    seed: int = 0,
+) -> None:
+    """Adds actions and outcomes by random actors, spread evenly over every location"""
+    rng = random.Random(seed)
+    actor_ids = list(episode.actors.keys())
+    for location_id in episode.locations:
+        for _ in range(history_per_location):
+            action = Action(
+                uid=f"action_{rng.randint(1000000, 9999999)}",
+                type=ActionType.INSPECT,
+                location_id=location_id,
+                source_actor_id=rng.choice(actor_ids),
+                target_entity_id=location_id,
+                target_entity_type=EntityType.LOCATION,
+                fact="Someone searches the room for anything useful",
+            )
+            episode.actions.append(action)
+            episode.outcomes.append(Outcome(action_id=action.uid, type=OutcomeType.SUCCESS, attention=1, fact="They find nothing new"))
+
+
+def full_context_tokens(episode: Episode) -> int:
+    return count_tokens("".join([
+        encode_pydantic(list(episode.junctions.values())),
+        encode_pydantic(episode.get_observable_actors()),
+        encode_pydantic(episode.get_held_items()),
+        encode_pydantic(episode.get_dropped_items()),
+        encode_pydantic(episode.actions),
+    ]))
+
+
+def benchmark_size(
+    entity_count: int,
+    history_per_location: int,
+    sample_actors: int,
+    token_budget: int | None = None,
+) -> Dict:
+    episode = build_synthetic_episode_of_size(entity_count)
+    add_history(episode, history_per_location)
+
+    tokens: Dict[str, List[int]] = {"survivor": [], "zombie": [], "evaluator": []}
+    survivors = [actor for actor in episode.actors.values() if actor.type == ActorType.HUMAN]
+    zombies = [actor for actor in episode.actors.values() if actor.type == ActorType.ZOMBIE]
+    for actor in survivors[:sample_actors // 2] + zombies[:sample_actors - sample_actors // 2]:
+        if actor.type == ActorType.HUMAN:
+            tokens["survivor"].append(count_message_tokens(SurvivorAgentPrompt.build_prompt_messages(episode, actor.uid, token_budget)))
+        else:
+            tokens["zombie"].append(count_message_tokens(ZombieAgentPrompt.build_prompt_messages(episode, actor.uid, token_budget)))
+        action = Action(
+            uid="action_0000000",
+            type=ActionType.INSPECT,
+            location_id=actor.location_id,
+            source_actor_id=actor.uid,
+            target_entity_id=actor.location_id,
+            target_entity_type=EntityType.LOCATION,
+            fact="Searches the room",
+        )
+        tokens["evaluator"].append(count_message_tokens(OutcomeEvaluatorAgentPrompt.build_prompt_messages(episode, [action], token_budget=token_budget)))
+
+    return {
+        "entities": entity_count,
+        "actions": len(episode.actions),
+        "full_context_tokens": full_context_tokens(episode),
+        **{f"{prompt}_prompt_tokens": round(sum(counts) / len(counts)) if counts else None for prompt, counts in tokens.items()},
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000], help="total entities per episode")
+    parser.add_argument("--history-per-location", type=int, default=3)
+    parser.add_argument("--token-budget", type=int, default=None, help="pack survivor, zombie, and evaluator prompts into this many estimated tokens")
+    parser.add_argument("--sample-actors", type=int, default=20, help="actors whose prompts are measured per size, half survivors and half zombies")
+    args = parser.parse_args()
+    for entity_count in args.sizes:
+        print(json.dumps(benchmark_size(entity_count, args.history_per_location, args.sample_actors, args.token_budget)))
@@ -0,0 +1,75 @@
+import inspect
+from contextlib import ExitStack, contextmanager
+from functools import wraps
+from time import perf_counter
+from typing import Any, Dict, Iterator, List, Tuple
+
+from pydantic import BaseModel
+
+
+class PhaseTiming(BaseModel):
+    calls: int = 0
+    seconds: float = 0.0
+
+
+class PhaseTimer:
+    """Times named phases by temporarily wrapping the functions that implement them.
+
+    Timings are summed over calls, so phases that run concurrently or nest inside each other
+    (e.g. toon encoding inside prompt building) can add up to more than the wall time.
+    """
+
+    def __init__(self) -> None:
+        self.phases: Dict[str, PhaseTiming] = {}
+
+    @contextmanager
+    def patched(
+        self,
+        targets: List[Tuple[Any, str, str]],
+    ) -> Iterator["PhaseTimer"]:
+        """Wraps each (owner, attribute, phase) target for the duration of the block.
+        Owners are modules or classes, and attributes are functions, methods, or staticmethods."""
+        with ExitStack() as stack:
+            for owner, attribute, phase in targets:
+                stack.enter_context(self._patch(owner, attribute, phase))
+            yield self
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        return {phase: {"calls": timing.calls, "seconds": round(timing.seconds, 4)} for phase, timing in self.phases.items()}
+
+    @contextmanager
+    def _patch(
+        self,
+        owner: Any,
+        attribute: str,
+        phase: str,
+    ) -> Iterator[None]:
+        original = inspect.getattr_static(owner, attribute)
+        function = getattr(owner, attribute)
+        timing = self.phases.setdefault(phase, PhaseTiming())
+
+        if inspect.iscoroutinefunction(function):
+            @wraps(function)
+            async def timed(*args, **kwargs):
+                start = perf_counter()
+                try:
+                    return await function(*args, **kwargs)
+                finally:
+                    timing.calls += 1
+                    timing.seconds += perf_counter() - start
+        else:
+            @wraps(function)
+            def timed(*args, **kwargs):
+                start = perf_counter()
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    timing.calls += 1
+                    timing.seconds += perf_counter() - start
+
+        # plain functions set on a class stay unbound, so instance methods still receive self
+        setattr(owner, attribute, staticmethod(timed) if isinstance(original, staticmethod) else timed)
+        try:
+            yield
+        finally:
+            setattr(owner, attribute, original)
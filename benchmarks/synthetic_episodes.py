@@ -0,0 +1,127 @@
+import random
+
+from models.core.entities import (ActorEntity, ActorInternalState, ItemEntity, JunctionEntity, LandmarkEntity,
+                                  LocationEntity)
+from models.core.episode import Episode
+from models.core.enums import (ActorArousal, ActorControl, ActorHealth, ActorType, ItemCondition, JunctionAccessibility,
+                               JunctionCondition, LocationCondition, LocationType)
+
+FIRST_NAMES = ["Mary", "Jolene", "Cora", "Dale", "Hector", "Priya", "Sam", "Ines", "Walt", "Tomas"]
+LAST_NAMES = ["Hughes", "Okafor", "Reyes", "Lindqvist", "Baker", "Tran", "Moreau", "Kowalski"]
+ROOM_NAMES = ["Lobby", "Office", "Storage Room", "Hallway", "Kitchen", "Garage", "Break Room", "Stairwell"]
+ITEM_NAMES = ["Crowbar", "Flashlight", "First Aid Kit", "Radio", "Tire Iron", "Canned Beans", "Road Map", "Shotgun"]
+
+
+def build_synthetic_episode(
+    location_count: int,
+    survivor_count: int,
+    zombie_count: int,
+    item_count: int,
+    zombie_location_count: int | None = None,
+    seed: int = 0,
+) -> Episode:
+    """Builds a landmark of locations chained by junctions, with a few extra junctions forming loops.
+
+    Survivors and items are spread across all locations. Zombies are spread across the first
+    zombie_location_count locations (all of them by default), so a horde can be packed into one room.
+    """
+    rng = random.Random(seed)
+    uids = iter(rng.sample(range(1000000, 10000000), location_count * 3 + survivor_count + zombie_count + item_count + 1))
+
+    landmark = LandmarkEntity(uid=f"landmark_{next(uids)}", name="Synthetic Landmark", fact="A generated landmark for benchmarking")
+
+    locations = {}
+    for i in range(location_count):
+        location = LocationEntity(
+            uid=f"location_{next(uids)}",
+            name=f"{rng.choice(ROOM_NAMES)} {i}",
+            fact="The room is cluttered with overturned furniture",
+            type=LocationType.EXTERIOR_OPEN if i == 0 else LocationType.INTERIOR,
+            condition=rng.choice(list(LocationCondition)),
+            landmark_id=landmark.uid,
+        )
+        locations[location.uid] = location
+    location_ids = list(locations.keys())
+
+    edges = [(location_ids[i - 1], location_ids[i]) for i in range(1, location_count)]
+    edges += [tuple(rng.sample(location_ids, 2)) for _ in range(location_count // 4)] if location_count > 2 else []
+    junctions = {}
+    for i, (from_location_id, to_location_id) in enumerate(edges):
+        junction = JunctionEntity(
+            uid=f"junction_{next(uids)}",
+            name=f"Door {i}",
+            fact="A steel door with a small window",
+            condition=rng.choice(list(JunctionCondition)),
+            accessibility=rng.choice(list(JunctionAccessibility)),
+            from_location_id=from_location_id,
+            to_location_id=to_location_id,
+        )
+        junctions[junction.uid] = junction
+
+    zombie_location_ids = location_ids[:zombie_location_count or location_count]
+    actors = {}
+    for i in range(survivor_count + zombie_count):
+        is_zombie = i >= survivor_count
+        uid = f"actor_{next(uids)}"
+        actors[uid] = ActorEntity(
+            uid=uid,
+            name=f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            fact="Wears a torn denim jacket and muddy boots",
+            type=ActorType.ZOMBIE if is_zombie else ActorType.HUMAN,
+            health=rng.choice([ActorHealth.GOOD_HEALTH, ActorHealth.FAIR_HEALTH, ActorHealth.POOR_HEALTH]),
+            arousal=ActorArousal.INTENSE if is_zombie else rng.choice([ActorArousal.ALERT, ActorArousal.CALM]),
+            control=ActorControl.DOMINANT if is_zombie else rng.choice([ActorControl.ASSERTIVE, ActorControl.COMPOSED]),
+            location_id=rng.choice(zombie_location_ids if is_zombie else location_ids),
+            internal=ActorInternalState(
+                actor_id=uid,
+                campaign_goal="Find my sister in the city",
+                episode_goal="Escape this landmark",
+                immediate_goal="Find a weapon",
+                emotion="anxious",
+            ),
+        )
+
+    holder_ids = location_ids + [actor.uid for actor in actors.values() if actor.type == ActorType.HUMAN]
+    items = {}
+    for i in range(item_count):
+        item = ItemEntity(
+            uid=f"item_{next(uids)}",
+            name=rng.choice(ITEM_NAMES),
+            fact="It is scuffed but usable",
+            condition=rng.choice([ItemCondition.GOOD_CONDITION, ItemCondition.FUNCTIONAL, ItemCondition.DAMAGED]),
+            holder_id=rng.choice(holder_ids),
+        )
+        items[item.uid] = item
+
+    return Episode(
+        landmark=landmark,
+        locations=locations,
+        junctions=junctions,
+        actors=actors,
+        items=items,
+        actions=[],
+        outcomes=[],
+    )
+
+
+def build_synthetic_episode_of_size(
+    entity_count: int,
+    seed: int = 0,
+) -> Episode:
+    """Builds an episode with roughly entity_count locations, junctions, actors, and items combined.
+
+    An eighth of the entities are locations (about as many again become junctions), a twentieth are survivors,
+    a tenth are zombies, and the rest are items.
+    """
+    location_count = max(2, entity_count // 8)
+    junction_count = location_count - 1 + location_count // 4
+    survivor_count = max(1, entity_count // 20)
+    zombie_count = max(1, entity_count // 10)
+    item_count = max(1, entity_count - location_count - junction_count - survivor_count - zombie_count)
+    return build_synthetic_episode(
+        location_count=location_count,
+        survivor_count=survivor_count,
+        zombie_count=zombie_count,
+        item_count=item_count,
+        seed=seed,
+    )
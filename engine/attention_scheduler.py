@@ -0,0 +1,237 @@
+from __future__ import annotations
+
+from typing import Dict, List
+
+from langchain_core.runnables import RunnableConfig
+from pydantic import BaseModel
+
+from engine.episode_turn_graph import EpisodeTurnGraph
+from models.core.actions import Action
+from models.core.episode import Episode
+from models.core.enums import ActorArousal, ActorControl, ActorHealth
+
+
+class AttentionSchedulerConfig(BaseModel):
+
+    """simulated time that passes per tick, used to report savings per simulated minute"""
+    seconds_per_tick: float = 6.0
+
+    """llm calls a single actor turn costs (action generation + outcome evaluation). None derives each skipped turn's
+    cost from the graph the scheduler runs: a generation call unless the actor's actions come from a policy, and an
+    evaluation call, scaled by the share of actions the graph's outcome resolver has so far left for the evaluator"""
+    llm_calls_per_turn: float | None = None
+
+    arousal_weights: Dict[ActorArousal, float] = {
+        ActorArousal.INTENSE: 3.0,
+        ActorArousal.ALERT: 2.0,
+        ActorArousal.CALM: 1.0,
+        ActorArousal.PASSIVE: 0.5,
+        ActorArousal.UNRESPONSIVE: 0.1,
+    }
+    health_weights: Dict[ActorHealth, float] = {
+        ActorHealth.GOOD_HEALTH: 1.0,
+        ActorHealth.FAIR_HEALTH: 1.0,
+        ActorHealth.POOR_HEALTH: 0.8,
+        ActorHealth.CRITICAL_HEALTH: 0.5,
+    }
+    control_weights: Dict[ActorControl, float] = {
+        ActorControl.IMMOBILIZED: 0.2,
+    }
+
+    """priority of an actor with no recent events nearby, before disposition weights"""
+    base_priority: float = 0.5
+
+    """how many of the most recent outcomes count as recent events"""
+    event_window: int = 20
+
+    """priority added per point of outcome attention in the actor's location"""
+    event_weight: float = 0.5
+
+    """fraction of an event's attention that carries into adjacent locations"""
+    adjacent_falloff: float = 0.5
+
+    """priority added per recent action targeting the actor"""
+    targeted_weight: float = 1.0
+
+    """actors at or above this priority act every tick"""
+    active_threshold: float = 2.0
+
+    """actors below the threshold act once every idle_interval ticks"""
+    idle_interval: int = 4
+
+    """caps the turns taken per tick, highest priority first. None means no cap"""
+    max_turns_per_tick: int | None = None
+
+
+class AttentionSchedulerStats(BaseModel):
+    ticks: int = 0
+    turns: int = 0
+
+    """turns a fixed round-robin would have taken over the same ticks (every living actor, every tick)"""
+    round_robin_turns: int = 0
+
+    """llm calls the turns skipped as idle would have cost"""
+    llm_calls_saved: float = 0.0
+
+    skipped_dead: int = 0
+    skipped_idle: int = 0
+
+
+class AttentionScheduler:
+    """Prioritises the actors whose turns matter most instead of a fixed round-robin.
+
+    Priority combines the actor's arousal, health, and control with the attention of recent outcomes in and next
+    to its location, and how often it has recently been targeted. DEAD actors are skipped before any prompt is built.
+    Actors in quiet locations still act, but only once every idle_interval ticks.
+    """
+
+    def __init__(
+        self,
+        config: AttentionSchedulerConfig | None = None,
+    ) -> None:
+        self.config = config or AttentionSchedulerConfig()
+        self.stats = AttentionSchedulerStats()
+        self.last_turn_tick: Dict[str, int] = {}
+
+    def priorities(
+        self,
+        episode: Episode,
+    ) -> Dict[str, float]:
+        """Priority of every living actor"""
+        config = self.config
+        heat = self._location_heat(episode)
+        recent_actions = episode.actions[-config.event_window:]
+
+        priorities: Dict[str, float] = {}
+        for actor in episode.actors.values():
+            if actor.health == ActorHealth.DEAD:
+                continue
+            targeted = sum(1 for action in recent_actions if action.target_entity_id == actor.uid and action.source_actor_id != actor.uid)
+            disposition = (
+                config.arousal_weights.get(actor.arousal, 1.0)
+                * config.health_weights.get(actor.health, 1.0)
+                * config.control_weights.get(actor.control, 1.0)
+            )
+            priorities[actor.uid] = disposition * (config.base_priority + config.event_weight * heat.get(actor.location_id, 0.0) + config.targeted_weight * targeted)
+        return priorities
+
+    def select_tick(
+        self,
+        episode: Episode,
+    ) -> List[str]:
+        """Advances one tick and returns the actors that act in it, highest priority first"""
+        config = self.config
+        tick = self.stats.ticks
+        self.stats.ticks += 1
+
+        priorities = self.priorities(episode)
+        self.stats.round_robin_turns += len(priorities)
+        self.stats.skipped_dead += len(episode.actors) - len(priorities)
+
+        selected = []
+        for actor_id, priority in sorted(priorities.items(), key=lambda item: item[1], reverse=True):
+            last_turn = self.last_turn_tick.get(actor_id)
+            is_due = last_turn is None or tick - last_turn >= config.idle_interval
+            if priority >= config.active_threshold or is_due:
+                selected.append(actor_id)
+        if config.max_turns_per_tick is not None:
+            selected = selected[:config.max_turns_per_tick]
+
+        for actor_id in selected:
+            self.last_turn_tick[actor_id] = tick
+        self.stats.turns += len(selected)
+        self.stats.skipped_idle += len(priorities) - len(selected)
+        return selected
+
+    def run(
+        self,
+        graph: EpisodeTurnGraph,
+        episode: Episode,
+        ticks: int,
+        config: RunnableConfig | None = None,
+    ) -> AttentionSchedulerStats:
+        for _ in range(ticks):
+            selected = self.select_tick(episode)
+            self._count_savings(graph, episode, selected)
+            for actor_id in selected:
+                graph.invoke(episode=episode, actor_id=actor_id, config=config)
+        return self.stats
+
+    async def arun(
+        self,
+        graph: EpisodeTurnGraph,
+        episode: Episode,
+        ticks: int,
+        config: RunnableConfig | None = None,
+    ) -> AttentionSchedulerStats:
+        for _ in range(ticks):
+            selected = self.select_tick(episode)
+            self._count_savings(graph, episode, selected)
+            for actor_id in selected:
+                await graph.ainvoke(episode=episode, actor_id=actor_id, config=config)
+        return self.stats
+
+    def turn_llm_calls(
+        self,
+        graph: EpisodeTurnGraph,
+        episode: Episode,
+        actor_id: str,
+    ) -> float:
+        """Expected llm calls of one turn of the actor, as the graph is configured"""
+        if self.config.llm_calls_per_turn is not None:
+            return self.config.llm_calls_per_turn
+        generation = 1.0 if graph.is_generated(episode, actor_id) else 0.0
+        evaluation = 1.0
+        resolver = graph.outcome_resolver
+        if resolver is not None and resolver.stats.local + resolver.stats.remote:
+            evaluation = 1 - resolver.stats.local_fraction
+        return generation + evaluation
+
+    def llm_calls_saved(self) -> float:
+        return self.stats.llm_calls_saved
+
+    def llm_calls_saved_per_simulated_minute(self) -> float:
+        simulated_minutes = self.stats.ticks * self.config.seconds_per_tick / 60
+        return self.llm_calls_saved() / simulated_minutes if simulated_minutes else 0.0
+
+    def _count_savings(
+        self,
+        graph: EpisodeTurnGraph,
+        episode: Episode,
+        selected: List[str],
+    ) -> None:
+        """Adds the cost of the living actors left out of a tick. Dead actors cost nothing either way."""
+        selected_ids = set(selected)
+        for actor in episode.actors.values():
+            if actor.health != ActorHealth.DEAD and actor.uid not in selected_ids:
+                self.stats.llm_calls_saved += self.turn_llm_calls(graph, episode, actor.uid)
+
+    def _location_heat(
+        self,
+        episode: Episode,
+    ) -> Dict[str, float]:
+        """Sum of recent outcome attention per location, spilling into adjacent locations"""
+        config = self.config
+        recent_outcomes = episode.outcomes[-config.event_window:]
+        if not recent_outcomes:
+            return {}
+
+        # outcomes only reference their action, so look the actions up among the most recent ones.
+        # actors take at most two actions per outcome-producing turn, so a few windows back is plenty
+        action_ids = {outcome.action_id for outcome in recent_outcomes}
+        actions: Dict[str, Action] = {
+            action.uid: action for action in episode.actions[-config.event_window * 4:] if action.uid in action_ids
+        }
+
+        heat: Dict[str, float] = {}
+        for outcome in recent_outcomes:
+            action = actions.get(outcome.action_id)
+            if action is not None:
+                heat[action.location_id] = heat.get(action.location_id, 0.0) + outcome.attention
+
+        spilled = dict(heat)
+        for junction in episode.junctions.values():
+            for source, destination in [(junction.from_location_id, junction.to_location_id), (junction.to_location_id, junction.from_location_id)]:
+                if source in heat:
+                    spilled[destination] = spilled.get(destination, 0.0) + heat[source] * config.adjacent_falloff
+        return spilled
@@ -1,11 +1,28 @@
 from __future__ import annotations
 
-from typing import Dict, Iterable, List, NotRequired, Sequence, TypedDict
+import asyncio
+from contextlib import nullcontext
+from enum import StrEnum
+from time import perf_counter
+from typing import Callable, ContextManager, Dict, Iterable, List, NotRequired, Sequence, Tuple, Type, TypedDict
 
-from langchain_core.runnables import RunnableConfig
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+from langchain_core.runnables import Runnable, RunnableConfig, RunnableLambda
 from langchain_openai import ChatOpenAI
 from langgraph.graph import END, StateGraph
+from pydantic import BaseModel
 
+from engine.history_compaction import HistoryCompactor
+from engine.model_routing import ModelRouter, ModelTier, RoutedAgent
+from engine.outcome_patches import outcomes_from_deltas
+from engine.outcome_resolver import RuleBasedOutcomeResolver
+from engine.turn_tracing import TurnTracer, record_neo4j_time
+from engine.zombie_policy import ZombiePolicy
+from llm.aliasing import AliasingRunnable, AliasStats
+from llm.cache import LLMResponseCache
+from llm.rate_limiting import SharedRateLimiter
+from llm.replay import TraceRecorder
 from models.core.actions import Action, Outcome
 from models.core.entities import (
     ActorEntity,
@@ -16,18 +33,38 @@ from models.core.entities import (
 from models.core.episode import Episode
 from models.core.enums import ActorHealth, ActorType
 from models.neomodel.queries_neomodel import NeoModelQueries
+from prompts.batch_outcome_evaluator_agent_prompt import BatchOutcomeEvaluatorAgentPrompt
+from prompts.context_packer import PromptBudgets
 from prompts.outcome_evaluator_agent_prompt import OutcomeEvaluatorAgentPrompt
 from prompts.prompt_generations import (
-    OutcomeEvaluationGeneration,
+    FastSurvivorActionGeneration,
+    FastZombieActionGeneration,
+    FastZombieHordeActionGeneration,
+    GenerationProfile,
+    GenerationProfiles,
+    HistorySynopsisGeneration,
     SurivorActionGeneration,
     ZombieActionGeneration,
+    ZombieHordeActionGeneration,
 )
 from prompts.survivor_agent_prompt import SurvivorAgentPrompt
 from prompts.zombie_agent_prompt import ZombieAgentPrompt
+from prompts.zombie_horde_agent_prompt import ZombieHordeAgentPrompt
 
 EpisodeEntity = ActorEntity | LocationEntity | JunctionEntity | ItemEntity
 
 
+class EvaluationScope(StrEnum):
+    """How a round's actions are grouped into evaluator calls"""
+
+    """one call per actor, so actions are resolved without knowing what anyone else did this round"""
+    ACTOR = "ACTOR"
+    """one call per location, adjudicating actions that can interact together"""
+    LOCATION = "LOCATION"
+    """one call for the whole round, adjudicating every proposed action together"""
+    ROUND = "ROUND"
+
+
 class EpisodeTurnState(TypedDict):
     episode: Episode
     actor_id: str
@@ -35,22 +72,112 @@ class EpisodeTurnState(TypedDict):
     outcomes: NotRequired[List[Outcome]]
 
 
+class EpisodeRoundState(TypedDict):
+    episode: Episode
+    actions: List[Action]
+    outcomes: List[Outcome]
+    elapsed_seconds: float
+
+
 class EpisodeTurnGraph:
     """LangGraph flow that processes a single actor turn."""
 
     def __init__(
-        self
+        self,
+        base_model: BaseChatModel | None = None,
+        outcome_resolver: RuleBasedOutcomeResolver | None = None,
+        zombie_policy: ZombiePolicy | None = None,
+        zombie_hordes: bool = False,
+        evaluation_scope: EvaluationScope = EvaluationScope.ROUND,
+        rate_limiter: SharedRateLimiter | None = None,
+        persist: bool = True,
+        response_cache: LLMResponseCache | None = None,
+        trace_recorder: TraceRecorder | None = None,
+        tracer: TurnTracer | None = None,
+        history_compactor: HistoryCompactor | None = None,
+        prompt_budgets: PromptBudgets | None = None,
+        alias_ids: bool = False,
+        outcome_patches: bool = False,
+        generation_profiles: GenerationProfiles | None = None,
+        model_router: ModelRouter | None = None,
     ) -> None:
-        base_model = ChatOpenAI(model="gpt-4.1", temperature=0.9)
+        """base_model: the chat model behind every llm call, defaults to gpt-4.1, or the router's default tier
+        outcome_resolver: when provided, actions with rule-based outcomes skip the evaluator llm
+        zombie_policy: when provided, zombie actions are chosen by the policy instead of zombie_llm
+        zombie_hordes: when True, rounds generate actions for all zombies sharing a location in one horde_llm call
+        evaluation_scope: how ainvoke_round batches actions from different actors into evaluator calls. Defaults to ROUND,
+            adjudicating all of a round's proposed actions together
+        rate_limiter: when provided, every llm call goes through the shared concurrency, request, and token budgets
+        persist: when False, outcomes only update the in-memory episode and nothing is written to Neo4j
+        response_cache: when provided, generations are served from and stored in the on-disk response cache
+        trace_recorder: when provided, every prompt and generation is recorded for offline replay
+        tracer: when provided, every node and round phase runs in a span that records timings and token counts
+        history_compactor: when provided, older actions are folded into synopses after outcomes are applied.
+            Async turns and rounds compact in the background, sync turns compact before returning
+        prompt_budgets: estimated token budgets that prompts pack their surroundings into, per agent type and for the evaluator
+        alias_ids: when True, the llm sees short aliases instead of uids, and generations are translated back
+        outcome_patches: when True, the evaluator generates only the changed fields of each entity, which are merged
+            into full resulting statuses locally, so outcomes are applied and persisted as before
+        generation_profiles: per agent, whether generations reason through a synopsis and plans first (FULL, the default)
+            or only generate the decision (FAST)
+        model_router: when provided, every action and evaluation call goes to the model tier its policy picks for the call"""
+        self.outcome_resolver = outcome_resolver
+        self.zombie_policy = zombie_policy
+        self.zombie_hordes = zombie_hordes
+        self.evaluation_scope = evaluation_scope
+        self.rate_limiter = rate_limiter
+        self.persist = persist
+        self.response_cache = response_cache
+        self.trace_recorder = trace_recorder
+        self.tracer = tracer
+        self.history_compactor = history_compactor
+        self.prompt_budgets = prompt_budgets or PromptBudgets()
+        self.alias_ids = alias_ids
+        self.alias_stats = AliasStats()
+        self.outcome_patches = outcome_patches
+        self.generation_profiles = generation_profiles or GenerationProfiles()
+        self.fast_survivor = self.generation_profiles.survivor == GenerationProfile.FAST
+        self.fast_zombie = self.generation_profiles.zombie == GenerationProfile.FAST
+        self.fast_evaluator = self.generation_profiles.evaluator == GenerationProfile.FAST
+        self.model_router = model_router
+        if base_model is None and model_router is not None:
+            base_model = model_router.base_model(model_router.policy.tier(model_router.policy.default_tier))
+        base_model = base_model or ChatOpenAI(model="gpt-4.1", temperature=0.9)
 
-        self.survivor_llm = base_model.with_structured_output(SurivorActionGeneration)
-        self.zombie_llm = base_model.with_structured_output(ZombieActionGeneration)
-        self.evaluator_llm = base_model.with_structured_output(OutcomeEvaluationGeneration)
+        schemas: Dict[str, Type[BaseModel]] = {
+            "survivor": SurvivorAgentPrompt.FAST_GENERATED_TYPE if self.fast_survivor else SurvivorAgentPrompt.GENERATED_TYPE,
+            "zombie": ZombieAgentPrompt.FAST_GENERATED_TYPE if self.fast_zombie else ZombieAgentPrompt.GENERATED_TYPE,
+            "horde": ZombieHordeAgentPrompt.FAST_GENERATED_TYPE if self.fast_zombie else ZombieHordeAgentPrompt.GENERATED_TYPE,
+            "evaluator": OutcomeEvaluatorAgentPrompt.generated_type(outcome_patches, self.fast_evaluator),
+            "batch_evaluator": BatchOutcomeEvaluatorAgentPrompt.generated_type(outcome_patches, self.fast_evaluator),
+        }
+        self.survivor_llm = self._structured_llm(base_model, schemas["survivor"])
+        self.zombie_llm = self._structured_llm(base_model, schemas["zombie"])
+        self.horde_llm = self._structured_llm(base_model, schemas["horde"])
+        self.evaluator_llm = self._structured_llm(base_model, schemas["evaluator"])
+        self.batch_evaluator_llm = self._structured_llm(base_model, schemas["batch_evaluator"])
+        self.synopsis_llm = self._structured_llm(base_model, HistorySynopsisGeneration)
+
+        # per tier name, the tier's stand-ins for the llms above, keyed like schemas
+        self.tier_llms: Dict[str, Dict[str, Runnable]] = {}
+        if model_router is not None:
+            for tier in model_router.policy.tiers:
+                tier_model = model_router.base_model(tier)
+                self.tier_llms[tier.name] = {name: self._structured_llm(tier_model, schema, tier) for name, schema in schemas.items()}
 
         builder = StateGraph(EpisodeTurnState)
-        builder.add_node("generate_actions", self._generate_actions)
-        builder.add_node("evaluate_actions", self._evaluate_actions)
-        builder.add_node("apply_outcomes", self._apply_outcomes)
+        builder.add_node("generate_actions", RunnableLambda(
+            self._traced("generate_actions", self._generate_actions),
+            afunc=self._atraced("generate_actions", self._agenerate_actions),
+        ))
+        builder.add_node("evaluate_actions", RunnableLambda(
+            self._traced("evaluate_actions", self._evaluate_actions),
+            afunc=self._atraced("evaluate_actions", self._aevaluate_actions),
+        ))
+        builder.add_node("apply_outcomes", RunnableLambda(
+            self._traced("apply_outcomes", self._apply_outcomes),
+            afunc=self._atraced("apply_outcomes", self._aapply_outcomes),
+        ))
 
         builder.set_entry_point("generate_actions")
         builder.add_edge("generate_actions", "evaluate_actions")
@@ -72,6 +199,62 @@ class EpisodeTurnGraph:
         }
         return self.graph.invoke(initial_state, config)
 
+    async def ainvoke(
+        self,
+        episode: Episode,
+        actor_id: str,
+        config: RunnableConfig | None = None,
+    ) -> EpisodeTurnState:
+        """Async version of invoke. LLM calls are awaited rather than blocking."""
+        initial_state: EpisodeTurnState = {
+            "episode": episode,
+            "actor_id": actor_id,
+        }
+        return await self.graph.ainvoke(initial_state, config)
+
+    async def ainvoke_round(
+        self,
+        episode: Episode,
+        config: RunnableConfig | None = None,
+    ) -> EpisodeRoundState:
+        """Runs one simultaneous round: every living actor acts against the same episode snapshot.
+
+        Action generation for all actors is fired concurrently, then the proposed actions are adjudicated
+        concurrently against the post-generation snapshot, and all outcomes are applied once.
+        Outcomes are applied in action order: actors in episode.actors order, each actor's actions in generated order.
+        When two outcomes update the same entity, the later one wins.
+        In horde mode, zombies sharing a location are generated by one call.
+        The evaluation scope decides whether actions are evaluated per actor, per location, or all together (the default).
+        """
+        start = perf_counter()
+        actor_ids = [actor.uid for actor in episode.actors.values() if actor.health != ActorHealth.DEAD]
+
+        with self._span("generate_actions"):
+            proposals = await asyncio.gather(*[
+                self._apropose_group_actions(episode, group, config) for group in self._round_groups(episode, actor_ids)
+            ])
+        actions_by_actor: Dict[str, List[Action]] = {actor_id: [] for actor_id in actor_ids}
+        for action in [action for proposal in proposals for action in proposal]:
+            actions_by_actor.setdefault(action.source_actor_id, []).append(action)
+        actions = [action for actor_actions in actions_by_actor.values() for action in actor_actions]
+        episode.add_actions(actions)
+
+        with self._span("evaluate_actions"):
+            outcomes = await self._aadjudicate_round(episode, actions_by_actor, config)
+        episode.add_outcomes(outcomes)
+
+        with self._span("apply_outcomes"):
+            updated_entities = apply_outcomes_to_episode(episode, outcomes)
+            self._persist_entities(updated_entities.values())
+        self._schedule_compaction(episode)
+
+        return {
+            "episode": episode,
+            "actions": actions,
+            "outcomes": outcomes,
+            "elapsed_seconds": perf_counter() - start,
+        }
+
     def _generate_actions(
         self,
         state: EpisodeTurnState,
@@ -83,17 +266,25 @@ class EpisodeTurnGraph:
         if(actor.health == ActorHealth.DEAD):
             return state
 
-        match actor.type:
-            case ActorType.ZOMBIE:
-                messages = ZombieAgentPrompt.build_prompt_messages(episode, actor_id)
-                generation = self.zombie_llm.invoke(messages)
-                actions = [generation.action]
-            case ActorType.HUMAN:
-                messages = SurvivorAgentPrompt.build_prompt_messages(episode, actor_id)
-                generation = self.survivor_llm.invoke(messages)
-                actions = list(generation.actions)
+        actions = self._policy_actions(episode, actor)
+        if actions is None:
+            llm, messages = self._build_action_request(episode, actor)
+            actions = self._generation_actions(llm.invoke(messages))
 
-        episode.actions.extend(actions)
+        episode.add_actions(actions)
+        return {**state, "episode": episode, "actions": actions}
+
+    async def _agenerate_actions(
+        self,
+        state: EpisodeTurnState,
+        config: RunnableConfig | None = None,
+    ) -> EpisodeTurnState:
+        episode = state["episode"]
+        actions = await self.apropose_actions(episode, state["actor_id"], config)
+        if not actions:
+            return state
+
+        episode.add_actions(actions)
         return {**state, "episode": episode, "actions": actions}
 
     def _evaluate_actions(
@@ -106,10 +297,27 @@ class EpisodeTurnGraph:
         if not actions:
             return state
 
-        messages = OutcomeEvaluatorAgentPrompt.build_prompt_messages(episode, actions)
-        generation = self.evaluator_llm.invoke(messages)
-        outcomes = list(generation.outcomes)
-        episode.outcomes.extend(outcomes)
+        outcomes, deferred = self._resolve_locally(episode, actions)
+        if deferred:
+            llm, messages = self._build_evaluation_request(episode, deferred)
+            generation = llm.invoke(messages)
+            outcomes.extend(self._generated_outcomes(episode, deferred, generation))
+        episode.add_outcomes(outcomes)
+
+        return {**state, "episode": episode, "outcomes": outcomes}
+
+    async def _aevaluate_actions(
+        self,
+        state: EpisodeTurnState,
+        config: RunnableConfig | None = None,
+    ) -> EpisodeTurnState:
+        episode = state["episode"]
+        actions = state.get("actions", [])
+        if not actions:
+            return state
+
+        outcomes = await self.aadjudicate_actions(episode, actions, config)
+        episode.add_outcomes(outcomes)
 
         return {**state, "episode": episode, "outcomes": outcomes}
 
@@ -124,9 +332,317 @@ class EpisodeTurnGraph:
             return state
 
         updated_entities = apply_outcomes_to_episode(episode, outcomes)
-        persist_entities(updated_entities.values())
+        self._persist_entities(updated_entities.values())
+        if self.history_compactor is not None:
+            self.history_compactor.compact(episode)
         return {**state, "episode": episode}
 
+    async def _aapply_outcomes(
+        self,
+        state: EpisodeTurnState,
+        _: RunnableConfig | None = None,
+    ) -> EpisodeTurnState:
+        episode = state["episode"]
+        outcomes = state.get("outcomes", [])
+        if not outcomes:
+            return state
+
+        self.commit_outcomes(episode, outcomes)
+        return {**state, "episode": episode}
+
+    async def apropose_actions(
+        self,
+        episode: Episode,
+        actor_id: str,
+        config: RunnableConfig | None = None,
+    ) -> List[Action]:
+        """Generates an actor's actions without recording them on the episode."""
+        actor = episode.actors[actor_id]
+        if(actor.health == ActorHealth.DEAD):
+            return []
+
+        actions = self._policy_actions(episode, actor)
+        if actions is not None:
+            return actions
+
+        # messages are built before the first await so that concurrent proposals share one snapshot
+        llm, messages = self._build_action_request(episode, actor)
+        generation = await llm.ainvoke(messages, config)
+        return self._generation_actions(generation)
+
+    def is_generated(
+        self,
+        episode: Episode,
+        actor_id: str,
+    ) -> bool:
+        """True if the actor's actions come from an llm call, rather than from a policy or not at all because it is dead."""
+        actor = episode.actors[actor_id]
+        return actor.health != ActorHealth.DEAD and not (actor.type == ActorType.ZOMBIE and self.zombie_policy is not None)
+
+    async def _apropose_group_actions(
+        self,
+        episode: Episode,
+        actor_ids: List[str],
+        config: RunnableConfig | None = None,
+    ) -> List[Action]:
+        if len(actor_ids) == 1:
+            return await self.apropose_actions(episode, actor_ids[0], config)
+
+        messages = ZombieHordeAgentPrompt.build_prompt_messages(episode, actor_ids, self.prompt_budgets.horde, self.fast_zombie)
+        llm = self._routed_llm(self.horde_llm, "horde", RoutedAgent.HORDE, episode, actor_ids, messages)
+        generation = await llm.ainvoke(messages, config)
+        return self._horde_actions(generation, actor_ids)
+
+    def _round_groups(
+        self,
+        episode: Episode,
+        actor_ids: List[str],
+    ) -> List[List[str]]:
+        """Groups actors whose actions are generated together. Only llm-driven zombies in horde mode are grouped."""
+        if not self.zombie_hordes or self.zombie_policy is not None:
+            return [[actor_id] for actor_id in actor_ids]
+
+        groups: Dict[str, List[str]] = {}
+        for actor_id in actor_ids:
+            actor = episode.actors[actor_id]
+            key = f"horde:{actor.location_id}" if actor.type == ActorType.ZOMBIE else actor_id
+            groups.setdefault(key, []).append(actor_id)
+        return list(groups.values())
+
+    async def aadjudicate_actions(
+        self,
+        episode: Episode,
+        actions: List[Action],
+        config: RunnableConfig | None = None,
+    ) -> List[Outcome]:
+        """Evaluates actions without recording or applying the outcomes."""
+        outcomes, deferred = self._resolve_locally(episode, actions)
+        if deferred:
+            llm, messages = self._build_evaluation_request(episode, deferred)
+            generation = await llm.ainvoke(messages, config)
+            outcomes.extend(self._generated_outcomes(episode, deferred, generation))
+        return outcomes
+
+    def commit_outcomes(
+        self,
+        episode: Episode,
+        outcomes: Sequence[Outcome],
+    ) -> Dict[str, EpisodeEntity]:
+        """Applies recorded outcomes to the episode, persists the updated entities, and schedules history compaction."""
+        updated_entities = apply_outcomes_to_episode(episode, outcomes)
+        self._persist_entities(updated_entities.values())
+        self._schedule_compaction(episode)
+        return updated_entities
+
+    async def _aadjudicate_round(
+        self,
+        episode: Episode,
+        actions_by_actor: Dict[str, List[Action]],
+        config: RunnableConfig | None = None,
+    ) -> List[Outcome]:
+        """Evaluates a round's actions in batches according to the evaluation scope, returning outcomes in action order."""
+        outcomes: List[Outcome] = []
+        batches: Dict[str, List[Action]] = {}
+        for actor_id, actor_actions in actions_by_actor.items():
+            if not actor_actions:
+                continue
+            local_outcomes, deferred = self._resolve_locally(episode, actor_actions)
+            outcomes.extend(local_outcomes)
+            if not deferred:
+                continue
+            match self.evaluation_scope:
+                case EvaluationScope.ACTOR:
+                    key = actor_id
+                case EvaluationScope.LOCATION:
+                    key = deferred[0].location_id
+                case EvaluationScope.ROUND:
+                    key = "round"
+            batches.setdefault(key, []).extend(deferred)
+
+        adjudications = await asyncio.gather(*[
+            self._aevaluate_batch(episode, batch, config) for batch in batches.values()
+        ])
+        outcomes.extend(outcome for adjudication in adjudications for outcome in adjudication)
+
+        actions = [action for actor_actions in actions_by_actor.values() for action in actor_actions]
+        return order_outcomes(actions, outcomes)
+
+    async def _aevaluate_batch(
+        self,
+        episode: Episode,
+        actions: List[Action],
+        config: RunnableConfig | None = None,
+    ) -> List[Outcome]:
+        """Evaluates actions that skipped the local resolver, using the batch prompt when they span several actors."""
+        llm, messages = self._build_evaluation_request(episode, actions)
+        generation = await llm.ainvoke(messages, config)
+        return self._generated_outcomes(episode, actions, generation)
+
+    def _build_evaluation_request(
+        self,
+        episode: Episode,
+        actions: List[Action],
+    ) -> Tuple[Runnable, List[BaseMessage]]:
+        actor_ids = list(dict.fromkeys(action.source_actor_id for action in actions))
+        if len(actor_ids) == 1:
+            messages = OutcomeEvaluatorAgentPrompt.build_prompt_messages(episode, actions, self.outcome_patches, self.fast_evaluator, self.prompt_budgets.evaluator)
+            return self._routed_llm(self.evaluator_llm, "evaluator", RoutedAgent.EVALUATOR, episode, actor_ids, messages, actions), messages
+        messages = BatchOutcomeEvaluatorAgentPrompt.build_prompt_messages(episode, actions, self.outcome_patches, self.fast_evaluator, self.prompt_budgets.evaluator)
+        return self._routed_llm(self.batch_evaluator_llm, "batch_evaluator", RoutedAgent.EVALUATOR, episode, actor_ids, messages, actions), messages
+
+    def _generated_outcomes(
+        self,
+        episode: Episode,
+        actions: List[Action],
+        generation: BaseModel,
+    ) -> List[Outcome]:
+        """The evaluator generation's outcomes, with patches merged into full entity statuses when outcome_patches is set"""
+        if self.outcome_patches:
+            return outcomes_from_deltas(episode, actions, generation.outcomes)
+        return list(generation.outcomes)
+
+    def _resolve_locally(
+        self,
+        episode: Episode,
+        actions: List[Action],
+    ) -> Tuple[List[Outcome], List[Action]]:
+        """Splits actions into rule-based outcomes and the actions left for the evaluator llm."""
+        if self.outcome_resolver is None:
+            return [], list(actions)
+        return self.outcome_resolver.partition(episode, actions)
+
+    def _policy_actions(
+        self,
+        episode: Episode,
+        actor: ActorEntity,
+    ) -> List[Action] | None:
+        """Actions chosen without an llm, or None if the actor's actions need to be generated."""
+        if actor.type == ActorType.ZOMBIE and self.zombie_policy is not None:
+            return [self.zombie_policy.choose_action(episode, actor.uid)]
+        return None
+
+    def _build_action_request(
+        self,
+        episode: Episode,
+        actor: ActorEntity,
+    ) -> Tuple[Runnable, List[BaseMessage]]:
+        match actor.type:
+            case ActorType.ZOMBIE:
+                messages = ZombieAgentPrompt.build_prompt_messages(episode, actor.uid, self.prompt_budgets.zombie, self.fast_zombie)
+                return self._routed_llm(self.zombie_llm, "zombie", RoutedAgent.ZOMBIE, episode, [actor.uid], messages), messages
+            case ActorType.HUMAN:
+                messages = SurvivorAgentPrompt.build_prompt_messages(episode, actor.uid, self.prompt_budgets.survivor, self.fast_survivor)
+                return self._routed_llm(self.survivor_llm, "survivor", RoutedAgent.SURVIVOR, episode, [actor.uid], messages), messages
+
+    def _routed_llm(
+        self,
+        llm: Runnable,
+        name: str,
+        agent: RoutedAgent,
+        episode: Episode,
+        actor_ids: List[str],
+        messages: List[BaseMessage],
+        actions: Sequence[Action] = (),
+    ) -> Runnable:
+        """The llm for a call: llm itself without a router, otherwise its stand-in from the tier the router picks"""
+        if self.model_router is None:
+            return llm
+        request = self.model_router.request(agent, episode, actor_ids, messages, [action.type for action in actions])
+        return self.tier_llms[self.model_router.choose(request).name][name]
+
+    def _structured_llm(
+        self,
+        base_model: BaseChatModel,
+        schema: Type[BaseModel],
+        tier: ModelTier | None = None,
+    ) -> Runnable:
+        llm = base_model.with_structured_output(schema)
+        if tier is not None:
+            # innermost, so a tier's stats measure only its model's calls
+            llm = self.model_router.wrap(llm, tier)
+        if self.alias_ids:
+            # just outside the tier stats, so caching, recording, and tracing all see the prompts and generations with full uids
+            llm = AliasingRunnable(llm, schema, self.alias_stats)
+        if self.rate_limiter is not None:
+            llm = self.rate_limiter.wrap(llm)
+        if self.response_cache is not None:
+            # outside the limiter, so cache hits spend no rate budget
+            llm = self.response_cache.wrap(llm, base_model, schema)
+        if self.trace_recorder is not None:
+            llm = self.trace_recorder.wrap(llm, schema)
+        if self.tracer is not None:
+            llm = self.tracer.wrap(llm, schema)
+        return llm
+
+    def _traced(
+        self,
+        name: str,
+        node: Callable,
+    ) -> Callable:
+        return self.tracer.traced(name, node) if self.tracer is not None else node
+
+    def _atraced(
+        self,
+        name: str,
+        node: Callable,
+    ) -> Callable:
+        return self.tracer.atraced(name, node) if self.tracer is not None else node
+
+    def _span(
+        self,
+        name: str,
+    ) -> ContextManager:
+        return self.tracer.span(name) if self.tracer is not None else nullcontext()
+
+    def _persist_entities(
+        self,
+        entities: Iterable[EpisodeEntity],
+    ) -> None:
+        if self.persist:
+            start = perf_counter()
+            persist_entities(entities)
+            record_neo4j_time(perf_counter() - start)
+
+    def _schedule_compaction(
+        self,
+        episode: Episode,
+    ) -> None:
+        if self.history_compactor is not None:
+            self.history_compactor.schedule(episode)
+
+    @staticmethod
+    def _horde_actions(
+        generation: ZombieHordeActionGeneration | FastZombieHordeActionGeneration,
+        actor_ids: List[str],
+    ) -> List[Action]:
+        """Keeps the first action generated for each zombie in the horde, dropping any others."""
+        actions: Dict[str, Action] = {}
+        for action in generation.actions:
+            if action.source_actor_id in actor_ids and action.source_actor_id not in actions:
+                actions[action.source_actor_id] = action
+        return [actions[actor_id] for actor_id in actor_ids if actor_id in actions]
+
+    @staticmethod
+    def _generation_actions(
+        generation: SurivorActionGeneration | ZombieActionGeneration | FastSurvivorActionGeneration | FastZombieActionGeneration,
+    ) -> List[Action]:
+        match generation:
+            case ZombieActionGeneration() | FastZombieActionGeneration():
+                return [generation.action]
+            case SurivorActionGeneration() | FastSurvivorActionGeneration():
+                return list(generation.actions)
+
+
+def order_outcomes(
+    actions: Sequence[Action],
+    outcomes: Sequence[Outcome],
+) -> List[Outcome]:
+    """Stable sorts outcomes into the order of the actions they resolve. Outcomes for unknown actions go last."""
+    positions: Dict[str, int] = {}
+    for i, action in enumerate(actions):
+        positions.setdefault(action.uid, i)
+    return sorted(outcomes, key=lambda outcome: positions.get(outcome.action_id, len(actions)))
+
 
 def apply_outcomes_to_episode(
     episode: Episode,
@@ -147,18 +663,22 @@ def apply_outcomes_to_episode(
 
 
 def apply_entity_update(episode: Episode, entity: EpisodeEntity) -> None:
-    """Applies a single entity update to the in-memory episode."""
+    """Applies a single entity update to the in-memory episode, versioning it past the entity it replaces."""
     match entity:
         case ActorEntity():
-            episode.actors[entity.uid] = entity
+            pool = "actors"
         case LocationEntity():
-            episode.locations[entity.uid] = entity
+            pool = "locations"
         case JunctionEntity():
-            episode.junctions[entity.uid] = entity
+            pool = "junctions"
         case ItemEntity():
-            episode.items[entity.uid] = entity
+            pool = "items"
         case _:
             raise ValueError(f"Unsupported entity type: {type(entity)}")
+    previous = getattr(episode, pool).get(entity.uid)
+    if previous is not None:
+        entity.supersede(previous)
+    episode.put_entity(pool, entity)
 
 
 def persist_entities(entities: Iterable[EpisodeEntity]) -> None:
@@ -0,0 +1,268 @@
+from __future__ import annotations
+
+import asyncio
+from abc import ABC, abstractmethod
+from typing import Dict, List, Tuple
+
+from langchain_core.runnables import Runnable
+from pydantic import BaseModel
+
+from models.core.actions import Action, Outcome
+from models.core.episode import Episode, EpisodeHistory, HistorySynopsis
+from prompts.history_synopsis_agent_prompt import HistorySynopsisAgentPrompt
+
+
+class HistoryFold(BaseModel):
+    """The actions one compaction folds, planned against a snapshot of the episode"""
+
+    """the actions to fold into each actor's synopsis, oldest first"""
+    by_actor: Dict[str, List[Action]] = {}
+
+    """the same actions, grouped by where they happened"""
+    by_location: Dict[str, List[Action]] = {}
+
+    outcomes: Dict[str, Outcome] = {}
+
+    """per actor, the index into episode.actions of their first action left verbatim"""
+    unfolded_from: Dict[str, int] = {}
+
+    """the lowest index of any action left verbatim"""
+    scan_start: int = 0
+
+    @property
+    def empty(self) -> bool:
+        return not self.by_actor
+
+
+class HistorySummarizer(ABC):
+    """Extends a synopsis with newly folded actions. aextend runs extend unless overridden"""
+
+    @abstractmethod
+    def extend(
+        self,
+        subject_name: str,
+        synopsis: HistorySynopsis,
+        actions: List[Action],
+        outcomes: List[Outcome],
+    ) -> str:
+        ...
+
+    async def aextend(
+        self,
+        subject_name: str,
+        synopsis: HistorySynopsis,
+        actions: List[Action],
+        outcomes: List[Outcome],
+    ) -> str:
+        return self.extend(subject_name, synopsis, actions, outcomes)
+
+
+class FactHistorySummarizer(HistorySummarizer):
+    """Appends each folded action's fact and outcome, dropping the oldest sentences once the synopsis passes max_chars.
+
+    Costs no llm calls, so it suits fake runs and benchmarks, but it forgets rather than condenses.
+    """
+
+    def __init__(
+        self,
+        max_chars: int = 600,
+    ) -> None:
+        self.max_chars = max_chars
+
+    def extend(
+        self,
+        subject_name: str,
+        synopsis: HistorySynopsis,
+        actions: List[Action],
+        outcomes: List[Outcome],
+    ) -> str:
+        outcome_facts = {outcome.action_id: outcome.fact for outcome in outcomes}
+        sentences = [sentence for sentence in synopsis.synopsis.split("\n") if sentence]
+        for action in actions:
+            outcome_fact = outcome_facts.get(action.uid)
+            sentences.append(f"{action.fact}: {outcome_fact}" if outcome_fact else action.fact)
+        while len(sentences) > 1 and sum(len(sentence) + 1 for sentence in sentences) > self.max_chars:
+            sentences.pop(0)
+        return "\n".join(sentences)
+
+
+class LLMHistorySummarizer(HistorySummarizer):
+    """Has the llm rewrite the synopsis to include the folded actions. llm is a structured HistorySynopsisGeneration runnable,
+    such as EpisodeTurnGraph.synopsis_llm, so the calls share the graph's rate limiter, cache, and tracer."""
+
+    def __init__(
+        self,
+        llm: Runnable,
+    ) -> None:
+        self.llm = llm
+
+    def extend(
+        self,
+        subject_name: str,
+        synopsis: HistorySynopsis,
+        actions: List[Action],
+        outcomes: List[Outcome],
+    ) -> str:
+        messages = HistorySynopsisAgentPrompt.build_prompt_messages(subject_name, synopsis, actions, outcomes)
+        return self.llm.invoke(messages).synopsis
+
+    async def aextend(
+        self,
+        subject_name: str,
+        synopsis: HistorySynopsis,
+        actions: List[Action],
+        outcomes: List[Outcome],
+    ) -> str:
+        messages = HistorySynopsisAgentPrompt.build_prompt_messages(subject_name, synopsis, actions, outcomes)
+        return (await self.llm.ainvoke(messages)).synopsis
+
+
+class HistoryCompactor:
+    """Keeps agent prompts flat over long episodes by folding older actions into per-actor and per-location synopses.
+
+    Each actor's last keep_last actions stay verbatim. Once an actor has fold_batch actions beyond those, the older ones
+    are folded: the actor's synopsis and the synopses of the locations they happened in are extended with them, and
+    surroundings stop listing them. Synopses are stored on episode.history and only ever extended, never rebuilt.
+
+    schedule runs compactions as background tasks, so turns never wait on the summarizer. Actions stay verbatim until
+    their fold is committed, so prompts built while a compaction is running lose nothing.
+    """
+
+    def __init__(
+        self,
+        keep_last: int = 4,
+        fold_batch: int = 8,
+        summarizer: HistorySummarizer | None = None,
+    ) -> None:
+        self.keep_last = keep_last
+        self.fold_batch = fold_batch
+        self.summarizer = summarizer or FactHistorySummarizer()
+        self.tasks: Dict[int, asyncio.Task] = {}
+
+    def compact(
+        self,
+        episode: Episode,
+    ) -> None:
+        fold = self.plan(episode)
+        if fold.empty:
+            return
+        synopses = [
+            (key, self.summarizer.extend(name, synopsis, actions, self._outcomes(fold, actions)))
+            for key, name, synopsis, actions in self._subjects(episode, fold)
+        ]
+        self._commit(episode, fold, synopses)
+
+    async def acompact(
+        self,
+        episode: Episode,
+    ) -> None:
+        fold = self.plan(episode)
+        if fold.empty:
+            return
+        subjects = self._subjects(episode, fold)
+        texts = await asyncio.gather(*[
+            self.summarizer.aextend(name, synopsis, actions, self._outcomes(fold, actions))
+            for _, name, synopsis, actions in subjects
+        ])
+        self._commit(episode, fold, [(key, text) for (key, _, _, _), text in zip(subjects, texts)])
+
+    def schedule(
+        self,
+        episode: Episode,
+    ) -> asyncio.Task:
+        """Starts a background compaction unless one is already running for the episode. Must be called from a running loop."""
+        task = self.tasks.get(id(episode))
+        if task is not None and not task.done():
+            return task
+        if task is not None and task.exception() is not None:
+            raise task.exception()
+        task = asyncio.create_task(self.acompact(episode))
+        self.tasks[id(episode)] = task
+        return task
+
+    async def drain(self) -> None:
+        """Waits for every scheduled compaction, raising the first failure"""
+        tasks, self.tasks = list(self.tasks.values()), {}
+        await asyncio.gather(*tasks)
+
+    def plan(
+        self,
+        episode: Episode,
+    ) -> HistoryFold:
+        history = self._history(episode)
+        unfolded: Dict[str, List[Tuple[int, Action]]] = {}
+        for index, action in enumerate(episode.actions[history.scan_start:], history.scan_start):
+            if not history.is_folded(index, action):
+                unfolded.setdefault(action.source_actor_id, []).append((index, action))
+
+        fold = HistoryFold(scan_start=len(episode.actions))
+        for actor_id, indexed_actions in unfolded.items():
+            if len(indexed_actions) >= self.keep_last + self.fold_batch:
+                folded, kept = indexed_actions[:-self.keep_last], indexed_actions[-self.keep_last:]
+                fold.by_actor[actor_id] = [action for _, action in folded]
+                fold.unfolded_from[actor_id] = kept[0][0]
+                for _, action in folded:
+                    fold.by_location.setdefault(action.location_id, []).append(action)
+            else:
+                kept = indexed_actions
+            if kept:
+                fold.scan_start = min(fold.scan_start, kept[0][0])
+        if fold.empty:
+            return fold
+
+        folded_ids = {action.uid for actions in fold.by_actor.values() for action in actions}
+        fold.outcomes = {outcome.action_id: outcome for outcome in episode.get_outcomes_of(folded_ids)}
+        return fold
+
+    def _history(
+        self,
+        episode: Episode,
+    ) -> EpisodeHistory:
+        if episode.history is None:
+            episode.history = EpisodeHistory(keep_last=self.keep_last)
+        return episode.history
+
+    @staticmethod
+    def _subjects(
+        episode: Episode,
+        fold: HistoryFold,
+    ) -> List[Tuple[Tuple[str, str], str, HistorySynopsis, List[Action]]]:
+        """(key, name, current synopsis, actions to fold) for every actor and location the fold extends"""
+        history = episode.history
+        subjects = []
+        for actor_id, actions in fold.by_actor.items():
+            actor = episode.actors.get(actor_id)
+            synopsis = history.actor_synopses.get(actor_id) or HistorySynopsis(subject_id=actor_id)
+            subjects.append((("actor", actor_id), actor.name if actor else actor_id, synopsis, actions))
+        for location_id, actions in fold.by_location.items():
+            location = episode.locations.get(location_id)
+            synopsis = history.location_synopses.get(location_id) or HistorySynopsis(subject_id=location_id)
+            subjects.append((("location", location_id), location.name if location else location_id, synopsis, actions))
+        return subjects
+
+    @staticmethod
+    def _outcomes(
+        fold: HistoryFold,
+        actions: List[Action],
+    ) -> List[Outcome]:
+        return [fold.outcomes[action.uid] for action in actions if action.uid in fold.outcomes]
+
+    @staticmethod
+    def _commit(
+        episode: Episode,
+        fold: HistoryFold,
+        synopses: List[Tuple[Tuple[str, str], str]],
+    ) -> None:
+        """Swaps in the extended synopses and moves the fold boundaries in one step, with no await in between"""
+        history = episode.history
+        for (kind, subject_id), text in synopses:
+            synopses_by_id = history.actor_synopses if kind == "actor" else history.location_synopses
+            folded = fold.by_actor[subject_id] if kind == "actor" else fold.by_location[subject_id]
+            previous = synopses_by_id.get(subject_id)
+            synopses_by_id[subject_id] = HistorySynopsis(
+                subject_id=subject_id,
+                action_count=(previous.action_count if previous else 0) + len(folded),
+                synopsis=text,
+            )
+        history.unfolded_from.update(fold.unfolded_from)
+        history.scan_start = fold.scan_start
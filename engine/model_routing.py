@@ -0,0 +1,295 @@
+from __future__ import annotations
+
+import os
+import threading
+from enum import StrEnum
+from pathlib import Path
+from time import perf_counter
+from typing import Any, Dict, List, Sequence
+
+from langchain_core.messages import BaseMessage
+from langchain_core.runnables import Runnable, RunnableConfig
+from pydantic import BaseModel, model_validator
+
+from llm.token_counting import count_message_tokens, count_tokens
+from models.core.actions import Outcome
+from models.core.enums import ActionType, ActorType, OutcomeType
+from models.core.episode import Episode
+
+
+class RoutedAgent(StrEnum):
+    SURVIVOR = "SURVIVOR"
+    ZOMBIE = "ZOMBIE"
+    HORDE = "HORDE"
+    """single and batch outcome evaluations"""
+    EVALUATOR = "EVALUATOR"
+
+
+class TierProvider(StrEnum):
+    """OPENAI serves a tier from the OpenAI api or any OpenAI-compatible endpoint, FAKE from the offline fake llm"""
+    OPENAI = "OPENAI"
+    FAKE = "FAKE"
+
+
+class ModelTier(BaseModel):
+    name: str
+    model: str
+    provider: TierProvider = TierProvider.OPENAI
+    temperature: float = 0.9
+
+    """an OpenAI-compatible endpoint to use instead of the OpenAI api, like a local vLLM or Ollama server"""
+    base_url: str | None = None
+
+    """environment variable holding the endpoint's api key. Local endpoints that don't check keys can leave it unset"""
+    api_key_env: str | None = None
+
+    """seconds per call when the tier is served by the fake llm, so offline runs show the tiers' relative speeds"""
+    fake_latency: float = 0.5
+
+
+class RoutingRule(BaseModel):
+    """Sends calls matching every condition set on the rule to its tier. Unset conditions match any call."""
+
+    tier: str
+    agents: List[RoutedAgent] = []
+    actor_types: List[ActorType] = []
+
+    """matches when every action being evaluated has one of these types. Action generation calls never match"""
+    action_types: List[ActionType] = []
+
+    min_tension: int | None = None
+    max_tension: int | None = None
+    min_prompt_tokens: int | None = None
+    max_prompt_tokens: int | None = None
+
+    def matches(
+        self,
+        request: RouteRequest,
+    ) -> bool:
+        if self.agents and request.agent not in self.agents:
+            return False
+        if self.actor_types and not set(request.actor_types) <= set(self.actor_types):
+            return False
+        if self.action_types and (not request.action_types or not set(request.action_types) <= set(self.action_types)):
+            return False
+        if self.min_tension is not None and request.tension < self.min_tension:
+            return False
+        if self.max_tension is not None and request.tension > self.max_tension:
+            return False
+        if self.min_prompt_tokens is not None and request.prompt_tokens < self.min_prompt_tokens:
+            return False
+        if self.max_prompt_tokens is not None and request.prompt_tokens > self.max_prompt_tokens:
+            return False
+        return True
+
+
+class RoutingPolicy(BaseModel):
+    """Model tiers and the rules choosing between them, usually loaded from a JSON config file.
+    Rules are checked in order and the first match wins. Calls no rule matches go to the default tier."""
+
+    tiers: List[ModelTier]
+    rules: List[RoutingRule] = []
+    default_tier: str
+
+    """how many of the episode's latest actions count towards tension"""
+    tension_lookback: int = 32
+
+    @model_validator(mode="after")
+    def check_tiers(self) -> RoutingPolicy:
+        names = {tier.name for tier in self.tiers}
+        unknown = {self.default_tier, *(rule.tier for rule in self.rules)} - names
+        if unknown:
+            raise ValueError(f"unknown tiers {', '.join(sorted(unknown))}")
+        return self
+
+    @classmethod
+    def load(
+        cls,
+        path: str | Path,
+    ) -> RoutingPolicy:
+        return cls.model_validate_json(Path(path).read_text())
+
+    def tier(
+        self,
+        name: str,
+    ) -> ModelTier:
+        return next(tier for tier in self.tiers if tier.name == name)
+
+
+class RouteRequest(BaseModel):
+    """What the router knows about a call when choosing its tier"""
+
+    agent: RoutedAgent
+    actor_types: List[ActorType] = []
+    action_types: List[ActionType] = []
+
+    """violent FIGHT outcomes among the episode's latest actions in the acting actors' locations"""
+    tension: int = 0
+    prompt_tokens: int = 0
+
+
+class TierStats(BaseModel):
+    calls: int = 0
+    errors: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    seconds: float = 0.0
+
+    @property
+    def ms_per_call(self) -> float:
+        return 1000 * self.seconds / self.calls if self.calls else 0.0
+
+
+class ModelRouter:
+    """Chooses a model tier per llm call, and keeps per-tier latency and token stats.
+
+    offline serves every tier from the fake llm with the tier's fake_latency, so a policy can be tried without any
+    endpoint running. max_retries is passed to every tier's client when set.
+    """
+
+    def __init__(
+        self,
+        policy: RoutingPolicy,
+        offline: bool = False,
+        max_retries: int | None = None,
+    ) -> None:
+        self.policy = policy
+        self.offline = offline
+        self.max_retries = max_retries
+        self.stats: Dict[str, TierStats] = {tier.name: TierStats() for tier in policy.tiers}
+        self.lock = threading.Lock()
+
+    def choose(
+        self,
+        request: RouteRequest,
+    ) -> ModelTier:
+        for rule in self.policy.rules:
+            if rule.matches(request):
+                return self.policy.tier(rule.tier)
+        return self.policy.tier(self.policy.default_tier)
+
+    def base_model(
+        self,
+        tier: ModelTier,
+    ) -> Any:
+        if self.offline or tier.provider == TierProvider.FAKE:
+            from llm.fake_llm import FakeChatModel
+
+            return FakeChatModel(latency=tier.fake_latency, jitter=tier.fake_latency / 2, seed=0)
+
+        from langchain_openai import ChatOpenAI
+
+        api_key = os.getenv(tier.api_key_env) if tier.api_key_env else None
+        if tier.base_url is not None:
+            # local OpenAI-compatible servers usually accept any key, but the client requires one
+            api_key = api_key or "not-needed"
+        retries = {} if self.max_retries is None else {"max_retries": self.max_retries}
+        return ChatOpenAI(model=tier.model, temperature=tier.temperature, base_url=tier.base_url, api_key=api_key, **retries)
+
+    def wrap(
+        self,
+        runnable: Runnable,
+        tier: ModelTier,
+    ) -> TierStatsRunnable:
+        return TierStatsRunnable(runnable, self, self.stats[tier.name])
+
+    def request(
+        self,
+        agent: RoutedAgent,
+        episode: Episode,
+        actor_ids: Sequence[str],
+        messages: Sequence[BaseMessage],
+        action_types: Sequence[ActionType] = (),
+    ) -> RouteRequest:
+        actors = [episode.actors[actor_id] for actor_id in actor_ids]
+        return RouteRequest(
+            agent=agent,
+            actor_types=list(dict.fromkeys(actor.type for actor in actors)),
+            action_types=list(dict.fromkeys(action_types)),
+            tension=episode_tension(episode, {actor.location_id for actor in actors}, self.policy.tension_lookback),
+            prompt_tokens=count_message_tokens(messages),
+        )
+
+
+class TierStatsRunnable(Runnable[Sequence[BaseMessage], BaseModel]):
+    """Records the latency and tokens of every call to a tier's model"""
+
+    def __init__(
+        self,
+        runnable: Runnable,
+        router: ModelRouter,
+        stats: TierStats,
+    ) -> None:
+        self.runnable = runnable
+        self.router = router
+        self.stats = stats
+
+    def invoke(
+        self,
+        input: Sequence[BaseMessage],
+        config: RunnableConfig | None = None,
+        **kwargs: Any,
+    ) -> BaseModel:
+        start = perf_counter()
+        try:
+            generation = self.runnable.invoke(input, config, **kwargs)
+        except Exception:
+            self._record_error()
+            raise
+        self._record(input, generation, perf_counter() - start)
+        return generation
+
+    async def ainvoke(
+        self,
+        input: Sequence[BaseMessage],
+        config: RunnableConfig | None = None,
+        **kwargs: Any,
+    ) -> BaseModel:
+        start = perf_counter()
+        try:
+            generation = await self.runnable.ainvoke(input, config, **kwargs)
+        except Exception:
+            self._record_error()
+            raise
+        self._record(input, generation, perf_counter() - start)
+        return generation
+
+    def _record_error(self) -> None:
+        with self.router.lock:
+            self.stats.errors += 1
+
+    def _record(
+        self,
+        input: Sequence[BaseMessage],
+        generation: BaseModel,
+        seconds: float,
+    ) -> None:
+        prompt_tokens = count_message_tokens(input)
+        completion_tokens = count_tokens(generation.model_dump_json()) if isinstance(generation, BaseModel) else 0
+        with self.router.lock:
+            self.stats.calls += 1
+            self.stats.seconds += seconds
+            self.stats.prompt_tokens += prompt_tokens
+            self.stats.completion_tokens += completion_tokens
+
+
+def episode_tension(
+    episode: Episode,
+    location_ids: set[str],
+    lookback: int,
+) -> int:
+    """FIGHTs among the episode's latest lookback actions that took place in the given locations and had a violent outcome:
+    one that changed an entity, or a critical success or failure. Unresolved fights and ones evaluated as no-ops don't count."""
+    fight_ids = [
+        action.uid for action in episode.actions[-lookback:]
+        if action.type == ActionType.FIGHT and action.location_id in location_ids
+    ]
+    return len({outcome.action_id for outcome in episode.get_outcomes_of(fight_ids) if is_violent(outcome)})
+
+
+def is_violent(outcome: Outcome) -> bool:
+    return (
+        outcome.type in (OutcomeType.CRITICAL_SUCCESS, OutcomeType.CRITICAL_FAILURE)
+        or outcome.resulting_source_entity_status is not None
+        or outcome.resulting_target_entity_status is not None
+    )
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+from typing import Dict, List, Sequence
+
+from pydantic import ValidationError
+
+from models.core.actions import Action, EntityPatch, Outcome, OutcomeDelta
+from models.core.entities import ActorEntity, ActorInternalState, Entity, ItemEntity
+from models.core.episode import Episode
+
+"""patch fields that live in an actor's internal state"""
+INTERNAL_FIELDS = set(ActorInternalState.model_fields) & set(EntityPatch.model_fields)
+
+
+class InvalidPatchError(ValueError):
+    """Raised when a patch names an entity it can't change, a field the entity doesn't have, or a value the field doesn't allow"""
+    pass
+
+
+def patch_entity(
+    episode: Episode,
+    entity: Entity,
+    patch: EntityPatch,
+) -> Entity:
+    """A copy of the entity with the patch's fields merged in, validated as the entity's own type.
+
+    Enum values are checked against the entity's field, so a junction condition patched onto an item is rejected.
+    Moved actors and items must end up in a known location or holder.
+    """
+    changes = patch.model_dump(mode="json", exclude_none=True, exclude={"uid"})
+    internal_changes = {field: changes.pop(field) for field in list(changes) if field in INTERNAL_FIELDS}
+    unknown = set(changes) - set(type(entity).model_fields)
+    if internal_changes and not isinstance(entity, ActorEntity):
+        unknown |= set(internal_changes)
+    if unknown:
+        raise InvalidPatchError(f"{entity.uid} has no field {', '.join(sorted(unknown))}")
+
+    if "location_id" in changes and changes["location_id"] not in episode.locations:
+        raise InvalidPatchError(f"{entity.uid} can't move to unknown location {changes['location_id']}")
+    if "holder_id" in changes and changes["holder_id"] not in episode.locations and changes["holder_id"] not in episode.actors:
+        raise InvalidPatchError(f"{entity.uid} can't be held by unknown holder {changes['holder_id']}")
+
+    values = entity.model_dump()
+    values.update(changes)
+    if internal_changes:
+        values["internal"].update(internal_changes)
+    try:
+        return type(entity).model_validate(values)
+    except ValidationError as error:
+        raise InvalidPatchError(f"invalid patch for {entity.uid}: {error}") from error
+
+
+def outcomes_from_deltas(
+    episode: Episode,
+    actions: Sequence[Action],
+    deltas: Sequence[OutcomeDelta],
+) -> List[Outcome]:
+    """Converts patch-style outcomes into Outcomes with full resulting entity statuses.
+
+    Patches apply in order on top of each other, so when several outcomes in one evaluation change the same
+    entity, the later status includes the earlier changes, as the full statuses of a batch evaluation would.
+    The episode itself is left unchanged.
+    """
+    actions_by_id = {action.uid: action for action in actions}
+    patched: Dict[str, Entity] = {}
+    outcomes: List[Outcome] = []
+    for delta in deltas:
+        action = actions_by_id.get(delta.action_id)
+        outcome = Outcome(action_id=delta.action_id, type=delta.type, attention=delta.attention, fact=delta.fact)
+        for patch in delta.patches:
+            if action is None or patch.uid not in (action.source_actor_id, action.target_entity_id):
+                raise InvalidPatchError(f"{delta.action_id} can't change {patch.uid}")
+            entity = patched.get(patch.uid) or _find_entity(episode, patch.uid)
+            if entity is None:
+                raise InvalidPatchError(f"unknown entity {patch.uid}")
+            entity = patch_entity(episode, entity, patch)
+            patched[patch.uid] = entity
+            if patch.uid == action.source_actor_id:
+                outcome.resulting_source_entity_status = entity
+            else:
+                outcome.resulting_target_entity_status = entity
+        outcomes.append(outcome)
+    return outcomes
+
+
+def _find_entity(
+    episode: Episode,
+    uid: str,
+) -> Entity | None:
+    for entities in (episode.actors, episode.locations, episode.junctions, episode.items):
+        if uid in entities:
+            return entities[uid]
+    return None
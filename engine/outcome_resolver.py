@@ -0,0 +1,246 @@
+from __future__ import annotations
+
+import random
+from typing import Dict, List, Tuple
+
+from pydantic import BaseModel
+
+from models.core.actions import Action, Outcome
+from models.core.entities import ActorEntity, ItemEntity
+from models.core.episode import Episode
+from models.core.enums import (ActionType, ActorArousal, ActorControl, ActorHealth, EntityType,
+                               JunctionAccessibility, JunctionCondition, OutcomeType)
+
+
+class ResolverStats(BaseModel):
+    local: int = 0
+    remote: int = 0
+
+    @property
+    def local_fraction(self) -> float:
+        total = self.local + self.remote
+        return self.local / total if total else 0.0
+
+
+class RuleBasedOutcomeResolver:
+    """Resolves actions with deterministic or table-driven outcomes without calling the evaluator llm.
+
+    The rates and modifiers mirror the ones documented in OutcomeEvaluatorAgentPrompt:
+        - MOVE through an OPEN or DESTROYED junction always succeeds
+        - FREEZE always succeeds at doing nothing (unless it could kill a CRITICAL_HEALTH actor)
+        - FOCUS has no outcome of its own
+        - HOLD of an item laying in the actor's location succeeds 80% of the time before modifiers
+    Everything else is left for the evaluator llm.
+
+    The prompt states the health modifiers as numbers but the FOCUS bonus and the arousal modifiers only in words,
+    so those are given numbers here: FOCUS adds 10%, ALERT adds 5%, PASSIVE takes 10%, and INTENSE doubles the
+    chance of critical outcomes. The evaluator llm reads the same words its own way, so locally resolved grabs
+    may succeed at slightly different rates than evaluated ones.
+    """
+
+    HOLD_ITEM_BASE_RATE = 0.8
+    CRITICAL_RATE = 0.05
+    FOCUS_BONUS = 0.1
+
+    HEALTH_MODIFIERS = {
+        ActorHealth.GOOD_HEALTH: 0.2,
+        ActorHealth.FAIR_HEALTH: 0.0,
+        ActorHealth.POOR_HEALTH: -0.2,
+        ActorHealth.CRITICAL_HEALTH: -0.4,
+    }
+
+    AROUSAL_MODIFIERS = {
+        ActorArousal.ALERT: 0.05,
+        ActorArousal.PASSIVE: -0.1,
+    }
+
+    """multiplies CRITICAL_RATE"""
+    AROUSAL_CRITICAL_MULTIPLIERS = {
+        ActorArousal.INTENSE: 2.0,
+    }
+
+    CONTROL_MODIFIERS = {
+        ActorControl.DOMINANT: 0.1,
+        ActorControl.ASSERTIVE: 0.1,
+        ActorControl.SUBMISSIVE: -0.1,
+        ActorControl.IMMOBILIZED: -0.2,
+    }
+
+    def __init__(
+        self,
+        seed: int | None = None,
+    ) -> None:
+        self.rng = random.Random(seed)
+        self.stats = ResolverStats()
+
+    def partition(
+        self,
+        episode: Episode,
+        actions: List[Action],
+    ) -> Tuple[List[Outcome], List[Action]]:
+        """Splits an actor's actions into locally resolved outcomes and actions that still need the evaluator.
+
+        Actions are resolved in order against a working copy of the acting actor, so a second MOVE starts from
+        wherever the first one left the actor. Once an action is deferred, every later action is deferred too,
+        since the state it would start from is unknown. If an earlier local outcome changed state that the evaluator
+        would not see, the whole set is deferred instead. A FOCUS is deferred alongside other deferred actions
+        since it modifies their chance of success.
+        """
+        outcomes: List[Outcome] = []
+        deferred: List[Action] = []
+        focus: List[Action] = []
+        working: Dict[str, ActorEntity] = {}
+        focused = any(action.type == ActionType.FOCUS for action in actions)
+
+        for action in actions:
+            if action.type == ActionType.FOCUS:
+                focus.append(action)
+                continue
+
+            outcome = None if deferred else self.resolve(episode, action, working, focused)
+            if outcome is None:
+                deferred.append(action)
+                continue
+
+            outcomes.append(outcome)
+            if outcome.resulting_source_entity_status is not None:
+                working[action.source_actor_id] = outcome.resulting_source_entity_status
+
+        if deferred and any(self._changes_state(outcome) for outcome in outcomes):
+            outcomes, deferred = [], list(actions)
+        elif deferred:
+            deferred = focus + deferred
+        self.stats.remote += len(deferred)
+        self.stats.local += len(actions) - len(deferred)
+        return outcomes, deferred
+
+    def resolve(
+        self,
+        episode: Episode,
+        action: Action,
+        working: Dict[str, ActorEntity] | None = None,
+        focused: bool = False,
+    ) -> Outcome | None:
+        """Returns the outcome of an action, or None if the action needs the evaluator llm.
+        focused is whether the actor also took a FOCUS action this turn."""
+        actor = (working or {}).get(action.source_actor_id) or episode.actors.get(action.source_actor_id)
+        if actor is None:
+            return None
+
+        if actor.health == ActorHealth.DEAD or actor.arousal == ActorArousal.UNRESPONSIVE:
+            return self._outcome(action, OutcomeType.FAILURE, 0, f"{actor.name} does not act")
+
+        match action.type:
+            case ActionType.FREEZE:
+                return self._resolve_freeze(action, actor)
+            case ActionType.MOVE:
+                return self._resolve_move(episode, action, actor)
+            case ActionType.HOLD:
+                return self._resolve_hold(episode, action, actor, focused)
+        return None
+
+    def _resolve_freeze(
+        self,
+        action: Action,
+        actor: ActorEntity,
+    ) -> Outcome | None:
+        # a CRITICAL_HEALTH actor that keeps freezing may die, which is a judgement call for the evaluator
+        if actor.health == ActorHealth.CRITICAL_HEALTH:
+            return None
+        return self._outcome(action, OutcomeType.SUCCESS, 0, f"{actor.name} stays still")
+
+    def _resolve_move(
+        self,
+        episode: Episode,
+        action: Action,
+        actor: ActorEntity,
+    ) -> Outcome | None:
+        if action.target_entity_type != EntityType.JUNCTION:
+            return None
+        junction = episode.junctions.get(action.target_entity_id)
+        if junction is None:
+            return None
+        if junction.accessibility != JunctionAccessibility.OPEN and junction.condition != JunctionCondition.DESTROYED:
+            return None
+
+        match actor.location_id:
+            case junction.from_location_id:
+                destination = episode.locations.get(junction.to_location_id)
+            case junction.to_location_id:
+                destination = episode.locations.get(junction.from_location_id)
+            case _:
+                return None
+        if destination is None:
+            return None
+
+        moved = actor.model_copy(update={"location_id": destination.uid})
+        return self._outcome(action, OutcomeType.SUCCESS, 1, f"{actor.name} moves through the {junction.name} into the {destination.name}", source=moved)
+
+    def _resolve_hold(
+        self,
+        episode: Episode,
+        action: Action,
+        actor: ActorEntity,
+        focused: bool = False,
+    ) -> Outcome | None:
+        if action.target_entity_type != EntityType.ITEM:
+            return None
+        item = episode.items.get(action.target_entity_id)
+        if item is None or item.holder_id != actor.location_id:
+            return None
+
+        chance = self.HOLD_ITEM_BASE_RATE
+        chance += self.HEALTH_MODIFIERS.get(actor.health, 0.0)
+        chance += self.AROUSAL_MODIFIERS.get(actor.arousal, 0.0)
+        chance += self.CONTROL_MODIFIERS.get(actor.control, 0.0)
+        if focused:
+            chance += self.FOCUS_BONUS
+        critical_rate = self.CRITICAL_RATE * self.AROUSAL_CRITICAL_MULTIPLIERS.get(actor.arousal, 1.0)
+        outcome_type = self._roll(min(max(chance, 0.0), 1.0), critical_rate)
+
+        match outcome_type:
+            case OutcomeType.CRITICAL_SUCCESS | OutcomeType.SUCCESS:
+                held: ItemEntity = item.model_copy(update={"holder_id": actor.uid})
+                return self._outcome(action, outcome_type, 1, f"{actor.name} picks up the {item.name}", target=held)
+            case OutcomeType.FAILURE:
+                return self._outcome(action, outcome_type, 1, f"{actor.name} fails to pick up the {item.name}")
+            case OutcomeType.CRITICAL_FAILURE:
+                return self._outcome(action, outcome_type, 2, f"{actor.name} fumbles the {item.name} with a loud clatter")
+
+    def _roll(
+        self,
+        chance: float,
+        critical_rate: float = CRITICAL_RATE,
+    ) -> OutcomeType:
+        roll = self.rng.random()
+        if roll < chance * critical_rate:
+            return OutcomeType.CRITICAL_SUCCESS
+        if roll < chance:
+            return OutcomeType.SUCCESS
+        if roll >= 1 - (1 - chance) * critical_rate:
+            return OutcomeType.CRITICAL_FAILURE
+        return OutcomeType.FAILURE
+
+    @staticmethod
+    def _changes_state(
+        outcome: Outcome,
+    ) -> bool:
+        return outcome.resulting_source_entity_status is not None or outcome.resulting_target_entity_status is not None
+
+    @staticmethod
+    def _outcome(
+        action: Action,
+        outcome_type: OutcomeType,
+        attention: int,
+        fact: str,
+        source: ActorEntity | None = None,
+        target: ItemEntity | None = None,
+    ) -> Outcome:
+        return Outcome(
+            action_id=action.uid,
+            type=outcome_type,
+            attention=attention,
+            resulting_source_entity_status=source,
+            resulting_target_entity_status=target,
+            fact=fact,
+        )
@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import asyncio
+from time import perf_counter
+from typing import Dict, List, Set
+
+from langchain_core.runnables import RunnableConfig
+from pydantic import BaseModel
+
+from engine.episode_turn_graph import EpisodeTurnGraph
+from models.core.episode import Episode
+from models.core.enums import ActorHealth, ActorType
+from models.core.junction_graph import Traversal
+
+
+class ParallelTickReport(BaseModel):
+    """Timing of a single tick, where every living actor takes one full turn"""
+
+    turns: int
+    conflict_edges: int
+    elapsed_seconds: float
+
+    """sum of the individual turn durations. busy / elapsed is the achieved parallelism"""
+    busy_seconds: float
+
+    @property
+    def parallelism(self) -> float:
+        return self.busy_seconds / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+    @property
+    def turns_per_second(self) -> float:
+        return self.turns / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+
+class ParallelRunReport(BaseModel):
+    ticks: List[ParallelTickReport] = []
+
+    @property
+    def turns(self) -> int:
+        return sum(tick.turns for tick in self.ticks)
+
+    @property
+    def elapsed_seconds(self) -> float:
+        return sum(tick.elapsed_seconds for tick in self.ticks)
+
+    @property
+    def parallelism(self) -> float:
+        busy = sum(tick.busy_seconds for tick in self.ticks)
+        return busy / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+    @property
+    def turns_per_second(self) -> float:
+        return self.turns / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+
+class ParallelTurnScheduler:
+    """Runs full actor turns in parallel when the actors cannot affect each other.
+
+    At the start of each tick, every living actor gets a footprint: the locations it could reach this turn
+    (following junction endpoints regardless of their accessibility), the junctions attached to those locations,
+    the items lying in them, and the items it holds. Actors whose footprints overlap conflict, and a conflicting
+    actor waits for every earlier conflicting actor (in episode.actors order) to finish its turn before starting.
+    Non-conflicting actors run their generate -> evaluate -> apply turns concurrently.
+
+    Talking over a communication device can reach beyond a footprint. Those effects are tolerated as they only
+    change what an actor knows, not the entities another concurrent turn is resolving against.
+    """
+
+    DEFAULT_REACH = {
+        ActorType.HUMAN: 2, # survivors take two actions, so they can MOVE twice
+        ActorType.ZOMBIE: 1,
+    }
+
+    def __init__(
+        self,
+        graph: EpisodeTurnGraph,
+        reach: Dict[ActorType, int] | None = None,
+    ) -> None:
+        self.graph = graph
+        self.reach = reach or self.DEFAULT_REACH
+
+    async def arun(
+        self,
+        episode: Episode,
+        ticks: int,
+        config: RunnableConfig | None = None,
+    ) -> ParallelRunReport:
+        report = ParallelRunReport()
+        for _ in range(ticks):
+            report.ticks.append(await self.arun_tick(episode, config))
+        return report
+
+    async def arun_tick(
+        self,
+        episode: Episode,
+        config: RunnableConfig | None = None,
+    ) -> ParallelTickReport:
+        actor_ids = [actor.uid for actor in episode.actors.values() if actor.health != ActorHealth.DEAD]
+        conflicts = self.build_conflict_graph(episode, actor_ids)
+        durations: List[float] = []
+        tasks: Dict[str, asyncio.Task] = {}
+
+        async def run_turn(actor_id: str, dependencies: List[asyncio.Task]) -> None:
+            if dependencies:
+                await asyncio.gather(*dependencies)
+            # an earlier turn in this tick may have killed the actor
+            if episode.actors[actor_id].health == ActorHealth.DEAD:
+                return
+            turn_start = perf_counter()
+            await self.graph.ainvoke(episode, actor_id, config)
+            durations.append(perf_counter() - turn_start)
+
+        start = perf_counter()
+        for actor_id in actor_ids:
+            dependencies = [tasks[other_id] for other_id in conflicts[actor_id] if other_id in tasks]
+            tasks[actor_id] = asyncio.create_task(run_turn(actor_id, dependencies))
+        await asyncio.gather(*tasks.values())
+
+        return ParallelTickReport(
+            turns=len(durations),
+            conflict_edges=sum(len(others) for others in conflicts.values()) // 2,
+            elapsed_seconds=perf_counter() - start,
+            busy_seconds=sum(durations),
+        )
+
+    def build_conflict_graph(
+        self,
+        episode: Episode,
+        actor_ids: List[str],
+    ) -> Dict[str, Set[str]]:
+        """Maps each actor to the set of actors whose turns could touch the same entities"""
+        footprints = {actor_id: self.get_footprint(episode, actor_id) for actor_id in actor_ids}
+        conflicts: Dict[str, Set[str]] = {actor_id: set() for actor_id in actor_ids}
+        for i, actor_id in enumerate(actor_ids):
+            for other_id in actor_ids[i + 1:]:
+                if not footprints[actor_id].isdisjoint(footprints[other_id]):
+                    conflicts[actor_id].add(other_id)
+                    conflicts[other_id].add(actor_id)
+        return conflicts
+
+    def get_footprint(
+        self,
+        episode: Episode,
+        actor_id: str,
+    ) -> Set[str]:
+        """The uids of every entity the actor's turn could read or change"""
+        actor = episode.actors[actor_id]
+        reach = self.reach.get(actor.type, 1)
+
+        # locations within reach through any junction, and the junctions leading out of all but the farthest
+        graph = episode.get_junction_graph()
+        locations = graph.within(actor.location_id, reach, Traversal.ANY)
+        junctions = {
+            junction_id for location_id, hops in locations.items() if hops < reach
+            for junction_id in graph.get_exits(location_id, Traversal.ANY)
+        }
+        items = {item.uid for item in episode.get_items_held_by([*locations, actor_id])}
+        return {actor_id} | locations.keys() | junctions | items
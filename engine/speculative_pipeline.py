@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import asyncio
+from time import perf_counter
+from typing import List, Sequence
+
+from langchain_core.runnables import RunnableConfig
+from pydantic import BaseModel
+
+from engine.episode_turn_graph import EpisodeTurnGraph
+from models.core.actions import Action
+from models.core.episode import Environment, Episode
+
+
+class SpeculationStats(BaseModel):
+    hits: int = 0
+    misses: int = 0
+
+    """generation time that overlapped with the previous actor's evaluation on committed speculations"""
+    hidden_seconds: float = 0.0
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class Speculation:
+    """An in-flight action generation for the next actor, started against the current episode snapshot"""
+
+    def __init__(
+        self,
+        graph: EpisodeTurnGraph,
+        episode: Episode,
+        actor_id: str,
+        config: RunnableConfig | None = None,
+    ) -> None:
+        self.actor_id = actor_id
+        self.observed: Environment | None = None
+        self.started = perf_counter()
+        self.finished: float | None = None
+        self.task = asyncio.create_task(self._generate(graph, episode, config))
+
+    async def _generate(
+        self,
+        graph: EpisodeTurnGraph,
+        episode: Episode,
+        config: RunnableConfig | None = None,
+    ) -> List[Action]:
+        # the prompt is built from the surroundings before the proposal first awaits, so nothing can change in between
+        self.observed = episode.get_actor_surroundings(self.actor_id)
+        actions = await graph.apropose_actions(episode, self.actor_id, config)
+        self.finished = perf_counter()
+        return actions
+
+    def is_clean(self, episode: Episode) -> bool:
+        """True if the speculating actor's surroundings, including the actions and outcomes it perceives, are the same
+        as when its prompt was built. A speculation whose prompt is not built yet will build it from the current episode."""
+        return self.observed is None or self.observed == episode.get_actor_surroundings(self.actor_id)
+
+    def cancel(self) -> None:
+        self.task.cancel()
+
+
+class SpeculativeTurnPipeline:
+    """Opt-in turn runner that overlaps actor N's evaluation with actor N+1's action generation.
+
+    Once actor N's actions are generated, actor N+1's generation is started speculatively against the episode
+    as it stands before N's outcomes are applied. After N's outcomes are applied, the speculation is committed
+    if nothing N+1 perceives changed: its surroundings' entities, and the actions and outcomes that happened in
+    view of it. Otherwise it is re-run against the updated episode. Only actors whose actions come from an llm
+    call are speculated on, since policy actors read beyond their surroundings and take no time to propose.
+    """
+
+    def __init__(
+        self,
+        graph: EpisodeTurnGraph,
+    ) -> None:
+        self.graph = graph
+        self.stats = SpeculationStats()
+
+    async def arun(
+        self,
+        episode: Episode,
+        actor_ids: Sequence[str],
+        config: RunnableConfig | None = None,
+    ) -> Episode:
+        speculation: Speculation | None = None
+        for i, actor_id in enumerate(actor_ids):
+            if speculation is not None:
+                actions = await self._resolve_speculation(episode, speculation, config)
+            else:
+                actions = await self.graph.apropose_actions(episode, actor_id, config)
+
+            speculation = None
+            if i + 1 < len(actor_ids) and self.graph.is_generated(episode, actor_ids[i + 1]):
+                speculation = Speculation(self.graph, episode, actor_ids[i + 1], config)
+
+            if not actions:
+                continue
+            episode.add_actions(actions)
+
+            try:
+                outcomes = await self.graph.aadjudicate_actions(episode, actions, config)
+            except BaseException:
+                if speculation is not None:
+                    speculation.cancel()
+                raise
+            episode.add_outcomes(outcomes)
+            self.graph.commit_outcomes(episode, outcomes)
+
+        return episode
+
+    async def _resolve_speculation(
+        self,
+        episode: Episode,
+        speculation: Speculation,
+        config: RunnableConfig | None = None,
+    ) -> List[Action]:
+        if not speculation.is_clean(episode):
+            speculation.cancel()
+            self.stats.misses += 1
+            return await self.graph.apropose_actions(episode, speculation.actor_id, config)
+
+        self.stats.hits += 1
+        waiting_from = perf_counter()
+        actions = await speculation.task
+        self.stats.hidden_seconds += min(speculation.finished, waiting_from) - speculation.started
+        return actions
+
@@ -0,0 +1,364 @@
+from __future__ import annotations
+
+import re
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from pathlib import Path
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterator, List, Sequence, Type
+
+from langchain_core.messages import BaseMessage
+from langchain_core.runnables import Runnable, RunnableConfig
+from langchain_core.runnables.config import merge_configs
+from pydantic import BaseModel
+
+from llm.prompt_caching import PromptCacheSimulator, UsageCallbackHandler
+from llm.token_counting import count_message_tokens, count_tokens
+
+"""prompt section headers, mapped to the section their content is counted under"""
+SECTION_HEADERS: Dict[str, str] = {
+    "Your Character:": "character",
+    "Acting Character:": "character",
+    "Acting Characters:": "character",
+    "Your Horde:": "character",
+    "Actions:": "actions",
+    "Environment:": "location",
+    "Current Landmark:": "location",
+    "Locations (within landmark):": "location",
+    "Junctions:": "junctions",
+    "Actors:": "actors",
+    "Items:": "items",
+    "Recent actions:": "action_history",
+    "Earlier history:": "action_history",
+}
+_INDENT = re.compile(r"^\s*")
+
+_current_span: ContextVar[TraceSpan | None] = ContextVar("current_span", default=None)
+
+
+class TraceSpan(BaseModel):
+    name: str
+    actor_id: str | None = None
+
+    """unix time the span started at"""
+    start_time: float
+    duration_seconds: float = 0.0
+
+    llm_calls: int = 0
+    llm_seconds: float = 0.0
+    prompt_tokens: int = 0
+
+    """as reported by the provider. Without usage data, counted from the structured generation's JSON,
+    which is what a tool-calling completion returns"""
+    completion_tokens: int = 0
+
+    """prompt tokens served from the provider's prompt cache. Simulated when the model reports no usage"""
+    cached_prompt_tokens: int = 0
+
+    """prompt characters by section, summed over the span's llm calls"""
+    prompt_chars: Dict[str, int] = {}
+
+    neo4j_seconds: float = 0.0
+
+
+class SpanSink(ABC):
+    """Receives every finished span. Sinks holding resources override close, which does nothing by default"""
+
+    @abstractmethod
+    def emit(
+        self,
+        span: TraceSpan,
+    ) -> None:
+        ...
+
+    def close(self) -> None:
+        pass
+
+
+class InMemorySpanSink(SpanSink):
+
+    def __init__(self) -> None:
+        self.spans: List[TraceSpan] = []
+
+    def emit(
+        self,
+        span: TraceSpan,
+    ) -> None:
+        self.spans.append(span)
+
+
+class JsonlSpanSink(SpanSink):
+    """Appends one JSON span per line"""
+
+    def __init__(
+        self,
+        path: str | Path,
+    ) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.file = open(path, "a", encoding="utf-8")
+
+    def emit(
+        self,
+        span: TraceSpan,
+    ) -> None:
+        self.file.write(span.model_dump_json() + "\n")
+        self.file.flush()
+
+    def close(self) -> None:
+        self.file.close()
+
+
+class OpenTelemetrySpanSink(SpanSink):
+    """Re-emits spans through an OpenTelemetry tracer, the global one by default. Needs opentelemetry-api installed."""
+
+    def __init__(
+        self,
+        tracer: Any = None,
+    ) -> None:
+        try:
+            from opentelemetry import trace
+        except ImportError as error:
+            raise ImportError("OpenTelemetrySpanSink needs the opentelemetry-api package") from error
+        self.tracer = tracer or trace.get_tracer("aipocalypse.engine")
+
+    def emit(
+        self,
+        span: TraceSpan,
+    ) -> None:
+        attributes: Dict[str, Any] = {
+            "llm_calls": span.llm_calls,
+            "llm_seconds": span.llm_seconds,
+            "prompt_tokens": span.prompt_tokens,
+            "completion_tokens": span.completion_tokens,
+            "cached_prompt_tokens": span.cached_prompt_tokens,
+            "neo4j_seconds": span.neo4j_seconds,
+            **{f"prompt_chars.{section}": chars for section, chars in span.prompt_chars.items()},
+        }
+        if span.actor_id is not None:
+            attributes["actor_id"] = span.actor_id
+        start_ns = int(span.start_time * 1e9)
+        otel_span = self.tracer.start_span(span.name, start_time=start_ns, attributes=attributes)
+        otel_span.end(end_time=start_ns + int(span.duration_seconds * 1e9))
+
+
+class TurnTracer:
+    """Opens spans around turn graph nodes and sends each finished span to every sink.
+
+    LLM calls and Neo4j writes made while a span is open add their tokens and timings to it, including calls made
+    by concurrent tasks started inside the span. Totals per span name are kept for summary_table.
+    """
+
+    def __init__(
+        self,
+        sinks: List[SpanSink] | None = None,
+    ) -> None:
+        self.sinks = sinks if sinks is not None else [InMemorySpanSink()]
+        self.prompt_cache = PromptCacheSimulator()
+        # running totals per span name, so long runs don't keep every span around
+        self.totals: Dict[str, TraceSpan] = {}
+        self.counts: Dict[str, int] = {}
+
+    @contextmanager
+    def span(
+        self,
+        name: str,
+        actor_id: str | None = None,
+    ) -> Iterator[TraceSpan]:
+        span = TraceSpan(name=name, actor_id=actor_id, start_time=time.time())
+        token = _current_span.set(span)
+        start = perf_counter()
+        try:
+            yield span
+        finally:
+            span.duration_seconds = perf_counter() - start
+            _current_span.reset(token)
+            self._accumulate(span)
+            for sink in self.sinks:
+                sink.emit(span)
+
+    def traced(
+        self,
+        name: str,
+        node: Callable,
+    ) -> Callable:
+        """Wraps a sync graph node so every call runs in a span"""
+        @wraps(node)
+        def traced_node(state, *args, **kwargs):
+            with self.span(name, state.get("actor_id")):
+                return node(state, *args, **kwargs)
+        return traced_node
+
+    def atraced(
+        self,
+        name: str,
+        node: Callable,
+    ) -> Callable:
+        """Wraps an async graph node so every call runs in a span"""
+        @wraps(node)
+        async def traced_node(state, *args, **kwargs):
+            with self.span(name, state.get("actor_id")):
+                return await node(state, *args, **kwargs)
+        return traced_node
+
+    def wrap(
+        self,
+        runnable: Runnable,
+        schema: Type[BaseModel],
+    ) -> TracedRunnable:
+        return TracedRunnable(runnable, schema, self)
+
+    def close(self) -> None:
+        for sink in self.sinks:
+            sink.close()
+
+    def summary_table(self) -> str:
+        """Per span name totals, followed by mean prompt characters per llm call by section"""
+        rows = [["span", "count", "total_s", "mean_s", "llm_calls", "llm_s", "prompt_tok", "cached_tok", "cached_%", "completion_tok", "neo4j_s"]]
+        section_chars: Dict[str, int] = {}
+        for name, total in self.totals.items():
+            rows.append([
+                name,
+                str(self.counts[name]),
+                f"{total.duration_seconds:.3f}",
+                f"{total.duration_seconds / self.counts[name]:.3f}",
+                str(total.llm_calls),
+                f"{total.llm_seconds:.3f}",
+                str(total.prompt_tokens),
+                str(total.cached_prompt_tokens),
+                f"{100 * total.cached_prompt_tokens / total.prompt_tokens:.1f}" if total.prompt_tokens else "-",
+                str(total.completion_tokens),
+                f"{total.neo4j_seconds:.3f}",
+            ])
+            for section, chars in total.prompt_chars.items():
+                section_chars[section] = section_chars.get(section, 0) + chars
+
+        llm_calls = sum(total.llm_calls for total in self.totals.values())
+        if not llm_calls:
+            return _format_table(rows)
+        section_rows = [["prompt section", "mean_chars"]] + [
+            [section, str(chars // llm_calls)] for section, chars in sorted(section_chars.items(), key=lambda item: -item[1])
+        ]
+        return _format_table(rows) + "\n\n" + _format_table(section_rows)
+
+    def _accumulate(
+        self,
+        span: TraceSpan,
+    ) -> None:
+        total = self.totals.setdefault(span.name, TraceSpan(name=span.name, start_time=span.start_time))
+        self.counts[span.name] = self.counts.get(span.name, 0) + 1
+        total.duration_seconds += span.duration_seconds
+        total.llm_calls += span.llm_calls
+        total.llm_seconds += span.llm_seconds
+        total.prompt_tokens += span.prompt_tokens
+        total.completion_tokens += span.completion_tokens
+        total.cached_prompt_tokens += span.cached_prompt_tokens
+        total.neo4j_seconds += span.neo4j_seconds
+        for section, chars in span.prompt_chars.items():
+            total.prompt_chars[section] = total.prompt_chars.get(section, 0) + chars
+
+
+class TracedRunnable(Runnable[Sequence[BaseMessage], BaseModel]):
+    """Adds an llm call's timing, tokens, and prompt section sizes to the current span"""
+
+    def __init__(
+        self,
+        runnable: Runnable,
+        schema: Type[BaseModel],
+        tracer: TurnTracer,
+    ) -> None:
+        self.runnable = runnable
+        self.schema = schema
+        self.tracer = tracer
+
+    def invoke(
+        self,
+        input: Sequence[BaseMessage],
+        config: RunnableConfig | None = None,
+        **kwargs: Any,
+    ) -> BaseModel:
+        usage = UsageCallbackHandler()
+        start = perf_counter()
+        generation = self.runnable.invoke(input, merge_configs(config, {"callbacks": [usage]}), **kwargs)
+        self._record(input, generation, perf_counter() - start, usage)
+        return generation
+
+    async def ainvoke(
+        self,
+        input: Sequence[BaseMessage],
+        config: RunnableConfig | None = None,
+        **kwargs: Any,
+    ) -> BaseModel:
+        usage = UsageCallbackHandler()
+        start = perf_counter()
+        generation = await self.runnable.ainvoke(input, merge_configs(config, {"callbacks": [usage]}), **kwargs)
+        self._record(input, generation, perf_counter() - start, usage)
+        return generation
+
+    def _record(
+        self,
+        messages: Sequence[BaseMessage],
+        generation: Any,
+        seconds: float,
+        usage: UsageCallbackHandler,
+    ) -> None:
+        span = current_span()
+        if span is None:
+            return
+        span.llm_calls += 1
+        span.llm_seconds += seconds
+        if usage.calls:
+            span.prompt_tokens += usage.input_tokens
+            span.completion_tokens += usage.output_tokens
+            span.cached_prompt_tokens += usage.cached_tokens
+        else:
+            span.prompt_tokens += count_message_tokens(messages)
+            span.completion_tokens += count_tokens(generation.model_dump_json()) if isinstance(generation, BaseModel) else 0
+            span.cached_prompt_tokens += self.tracer.prompt_cache.cached_tokens(messages)
+        for section, chars in prompt_sections(messages).items():
+            span.prompt_chars[section] = span.prompt_chars.get(section, 0) + chars
+
+
+def current_span() -> TraceSpan | None:
+    return _current_span.get()
+
+
+def record_neo4j_time(seconds: float) -> None:
+    span = current_span()
+    if span is not None:
+        span.neo4j_seconds += seconds
+
+
+def prompt_sections(messages: Sequence[BaseMessage]) -> Dict[str, int]:
+    """Characters per prompt section, split on the working context headers.
+
+    Everything before the first character header counts as instructions, as does template text dedented back out of
+    a section. Interpolated content isn't indented by the template past its first line, so lines indented less than
+    the first character header stay in the current section.
+    """
+    sections: Dict[str, int] = {}
+    for message in messages:
+        section, base_indent, header_indent = "instructions", None, -1
+        for line in str(message.content).splitlines(keepends=True):
+            stripped = line.strip()
+            line_indent = len(_INDENT.match(line).group(0))
+            header_section = SECTION_HEADERS.get(stripped)
+            if header_section == "character" and base_indent is None:
+                base_indent = line_indent
+            if base_indent is not None and header_section is not None:
+                section, header_indent = header_section, line_indent
+            elif stripped and base_indent is not None and base_indent <= line_indent <= header_indent:
+                section, header_indent = "instructions", -1
+            sections[section] = sections.get(section, 0) + len(line)
+    return sections
+
+
+def _format_table(rows: List[List[str]]) -> str:
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    return "\n".join(
+        "  ".join(cell.ljust(width) if i == 0 else cell.rjust(width) for i, (cell, width) in enumerate(zip(row, widths)))
+        for row in rows
+    )
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import random
+from abc import ABC, abstractmethod
+
+from models.core.actions import Action
+from models.core.entities import ActorEntity, JunctionEntity
+from models.core.episode import Episode
+from models.core.enums import ActionType, ActorArousal, ActorControl, ActorHealth, ActorType, EntityType
+from models.core.junction_graph import Traversal, is_passable
+
+
+class ZombiePolicy(ABC):
+    """Chooses a zombie's next action locally, in place of the zombie llm"""
+
+    @abstractmethod
+    def choose_action(
+        self,
+        episode: Episode,
+        actor_id: str,
+    ) -> Action:
+        ...
+
+
+class HeuristicZombiePolicy(ZombiePolicy):
+    """Basic and aggressive zombie behaviour, following ZOMBIE_ACTION_RULES:
+        - incapacitated zombies FREEZE
+        - a zombie sharing a location with a living human attacks one of them (FIGHT, or sometimes HOLD to grab them)
+        - otherwise it heads for the nearest living human, walking through passable junctions and battering closed ones
+        - with no human reachable, it wanders through a passable junction
+    """
+
+    def __init__(
+        self,
+        seed: int | None = None,
+        grab_chance: float = 0.2,
+    ) -> None:
+        self.rng = random.Random(seed)
+        self.grab_chance = grab_chance
+
+    def choose_action(
+        self,
+        episode: Episode,
+        actor_id: str,
+    ) -> Action:
+        zombie = episode.actors[actor_id]
+        if zombie.arousal == ActorArousal.UNRESPONSIVE or zombie.control == ActorControl.IMMOBILIZED:
+            return self._action(zombie, ActionType.FREEZE, zombie.uid, EntityType.ACTOR, f"{zombie.name} stands motionless")
+
+        prey = [
+            actor for actor in episode.actors.values()
+            if actor.type == ActorType.HUMAN and actor.health != ActorHealth.DEAD and actor.location_id == zombie.location_id
+        ]
+        if prey:
+            target = self.rng.choice(prey)
+            if self.rng.random() < self.grab_chance:
+                return self._action(zombie, ActionType.HOLD, target.uid, EntityType.ACTOR, f"{zombie.name} grabs at {target.name}")
+            return self._action(zombie, ActionType.FIGHT, target.uid, EntityType.ACTOR, f"{zombie.name} lunges to bite {target.name}")
+
+        junction = self._first_junction_towards_prey(episode, zombie)
+        if junction is None:
+            exits = episode.get_junction_graph().get_exits(zombie.location_id, Traversal.PASSABLE)
+            passable = [episode.junctions[junction_id] for junction_id in exits]
+            if not passable:
+                return self._action(zombie, ActionType.FREEZE, zombie.uid, EntityType.ACTOR, f"{zombie.name} sways in place")
+            junction = self.rng.choice(passable)
+
+        if is_passable(junction):
+            return self._action(zombie, ActionType.MOVE, junction.uid, EntityType.JUNCTION, f"{zombie.name} shambles through the {junction.name}")
+        return self._action(zombie, ActionType.FIGHT, junction.uid, EntityType.JUNCTION, f"{zombie.name} batters the {junction.name}")
+
+    def _first_junction_towards_prey(
+        self,
+        episode: Episode,
+        zombie: ActorEntity,
+    ) -> JunctionEntity | None:
+        """Along a shortest path through junctions of any accessibility, since zombies will batter through closed ones"""
+        graph = episode.get_junction_graph()
+        distances = graph.get_distances(zombie.location_id, Traversal.ANY)
+        prey_locations = [
+            actor.location_id for actor in episode.actors.values()
+            if actor.type == ActorType.HUMAN and actor.health != ActorHealth.DEAD
+            and actor.location_id != zombie.location_id and actor.location_id in distances
+        ]
+        if not prey_locations:
+            return None
+        nearest = min(prey_locations, key=lambda location_id: (distances[location_id], graph.location_positions[location_id]))
+        return episode.junctions[graph.shortest_path(zombie.location_id, nearest, Traversal.ANY)[0]]
+
+    def _action(
+        self,
+        zombie: ActorEntity,
+        action_type: ActionType,
+        target_entity_id: str,
+        target_entity_type: EntityType,
+        fact: str,
+    ) -> Action:
+        return Action(
+            uid=f"action_{self.rng.randint(1000000, 9999999)}",
+            type=action_type,
+            location_id=zombie.location_id,
+            source_actor_id=zombie.uid,
+            target_entity_id=target_entity_id,
+            target_entity_type=target_entity_type,
+            fact=fact,
+        )
+
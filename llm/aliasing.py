@@ -0,0 +1,213 @@
+from __future__ import annotations
+
+import json
+import re
+import threading
+from typing import Any, Dict, List, Sequence, Type
+
+from langchain_core.messages import BaseMessage, SystemMessage
+from langchain_core.runnables import Runnable, RunnableConfig
+from pydantic import BaseModel
+
+from llm.token_counting import count_message_tokens, count_tokens
+
+UID_PATTERN = re.compile(r"\b(landmark|location|junction|actor|item|action)_\d+\b")
+# aliases start with @, which prose never puts in front of a word, so free text like "an A4 sheet" is never mistaken for one
+ALIAS_PATTERN = re.compile(r"@[MLJAIX]\d+\b")
+ID_ALIAS_PATTERN = re.compile(r"@?[MLJAIX]\d+")
+ALIAS_PREFIXES = {
+    "landmark": "M",
+    "location": "L",
+    "junction": "J",
+    "actor": "A",
+    "item": "I",
+    "action": "X",
+}
+
+"""told to the llm right after the static prefix, so every aliased prompt still shares its cacheable prefix"""
+ALIAS_NOTE = """
+        Ids in this prompt are shortened to aliases starting with @: @A for actors, @L for locations, @J for junctions, @I for items, @X for actions, and @M for the landmark.
+        Refer to existing entities and actions by their alias exactly as written, @ included. Give new actions a uid in the usual action_<number> format.
+        """
+
+
+class UnknownAliasError(ValueError):
+    """Raised when a generation refers to an alias that its prompt never used"""
+    pass
+
+
+class AliasStats(BaseModel):
+    calls: int = 0
+    input_tokens: int = 0
+    aliased_input_tokens: int = 0
+
+    """tokens of the generation with full uids, as it would have been generated without aliasing"""
+    output_tokens: int = 0
+    aliased_output_tokens: int = 0
+
+    """generations rejected for referring to an unknown alias"""
+    rejected: int = 0
+
+    @property
+    def input_reduction(self) -> float:
+        return 1 - self.aliased_input_tokens / self.input_tokens if self.input_tokens else 0.0
+
+    @property
+    def output_reduction(self) -> float:
+        return 1 - self.aliased_output_tokens / self.output_tokens if self.output_tokens else 0.0
+
+
+class UidAliases:
+    """A reversible map between the uids in one prompt and short aliases like @A3, @L2, or @J5.
+
+    Aliases are numbered per entity type in order of first appearance, so the same prompt always gets the same aliases.
+    """
+
+    def __init__(self) -> None:
+        self.by_uid: Dict[str, str] = {}
+        self.by_alias: Dict[str, str] = {}
+
+    @classmethod
+    def from_messages(
+        cls,
+        messages: Sequence[BaseMessage],
+    ) -> UidAliases:
+        aliases = cls()
+        counts: Dict[str, int] = {}
+        for message in messages:
+            for match in UID_PATTERN.finditer(str(message.content)):
+                uid = match.group(0)
+                if uid in aliases.by_uid:
+                    continue
+                prefix = ALIAS_PREFIXES[match.group(1)]
+                counts[prefix] = counts.get(prefix, 0) + 1
+                alias = f"@{prefix}{counts[prefix]}"
+                aliases.by_uid[uid] = alias
+                aliases.by_alias[alias] = uid
+        return aliases
+
+    def alias_text(
+        self,
+        text: str,
+    ) -> str:
+        return UID_PATTERN.sub(lambda match: self.by_uid.get(match.group(0), match.group(0)), text)
+
+    def alias_messages(
+        self,
+        messages: Sequence[BaseMessage],
+    ) -> List[BaseMessage]:
+        aliased = [message.model_copy(update={"content": self.alias_text(str(message.content))}) for message in messages]
+        return aliased[:1] + [SystemMessage(ALIAS_NOTE)] + aliased[1:]
+
+    def resolve_text(
+        self,
+        text: str,
+    ) -> str:
+        """Restores the uids of known aliases in free text, leaving anything else, unknown aliases included, untouched"""
+        return ALIAS_PATTERN.sub(lambda match: self.by_alias.get(match.group(0), match.group(0)), text)
+
+    def resolve_id(
+        self,
+        value: str,
+    ) -> str:
+        """Restores the uid behind an id field's alias. Full uids pass through, so new actions keep their generated uids.
+        Id fields hold nothing but an id, so an alias written without its @ is resolved too."""
+        if not ID_ALIAS_PATTERN.fullmatch(value):
+            return value
+        value = value if value.startswith("@") else f"@{value}"
+        if value not in self.by_alias:
+            raise UnknownAliasError(f"unknown alias {value}")
+        return self.by_alias[value]
+
+    def resolve_generation(
+        self,
+        generation: BaseModel,
+    ) -> BaseModel:
+        values = _map_strings(generation.model_dump(mode="json"), self.resolve_id, self.resolve_text)
+        return type(generation).model_validate(values)
+
+    def alias_generation(
+        self,
+        generation: BaseModel,
+    ) -> Dict[str, Any]:
+        """The generation as the llm would write it against the aliased prompt"""
+        alias = lambda value: self.by_uid.get(value, value)
+        return _map_strings(generation.model_dump(mode="json"), alias, self.alias_text)
+
+
+class AliasingRunnable(Runnable[Sequence[BaseMessage], BaseModel]):
+    """Sends prompts with uids replaced by short aliases, and restores the uids in the generations"""
+
+    def __init__(
+        self,
+        runnable: Runnable,
+        schema: Type[BaseModel],
+        stats: AliasStats,
+    ) -> None:
+        self.runnable = runnable
+        self.schema = schema
+        self.stats = stats
+        self.lock = threading.Lock()
+
+    def invoke(
+        self,
+        input: Sequence[BaseMessage],
+        config: RunnableConfig | None = None,
+        **kwargs: Any,
+    ) -> BaseModel:
+        aliases = UidAliases.from_messages(input)
+        aliased_input = aliases.alias_messages(input)
+        generation = self.schema.model_validate(self.runnable.invoke(aliased_input, config, **kwargs))
+        return self._resolve(aliases, input, aliased_input, generation)
+
+    async def ainvoke(
+        self,
+        input: Sequence[BaseMessage],
+        config: RunnableConfig | None = None,
+        **kwargs: Any,
+    ) -> BaseModel:
+        aliases = UidAliases.from_messages(input)
+        aliased_input = aliases.alias_messages(input)
+        generation = self.schema.model_validate(await self.runnable.ainvoke(aliased_input, config, **kwargs))
+        return self._resolve(aliases, input, aliased_input, generation)
+
+    def _resolve(
+        self,
+        aliases: UidAliases,
+        input: Sequence[BaseMessage],
+        aliased_input: Sequence[BaseMessage],
+        generation: BaseModel,
+    ) -> BaseModel:
+        try:
+            resolved = aliases.resolve_generation(generation)
+        except UnknownAliasError:
+            with self.lock:
+                self.stats.rejected += 1
+            raise
+        with self.lock:
+            self.stats.calls += 1
+            self.stats.input_tokens += count_message_tokens(input)
+            self.stats.aliased_input_tokens += count_message_tokens(aliased_input)
+            self.stats.output_tokens += count_tokens(resolved.model_dump_json())
+            self.stats.aliased_output_tokens += count_tokens(generation.model_dump_json())
+        return resolved
+
+
+def _map_strings(
+    value: Any,
+    map_id,
+    map_text,
+    key: str = "",
+) -> Any:
+    """Applies map_id to uid and *_id fields and map_text to every other string, through nested dicts and lists"""
+    match value:
+        case dict():
+            return {field: _map_strings(item, map_id, map_text, field) for field, item in value.items()}
+        case list():
+            return [_map_strings(item, map_id, map_text, key) for item in value]
+        case str() if key == "uid" or key.endswith("_id"):
+            return map_id(value)
+        case str():
+            return map_text(value)
+        case _:
+            return value
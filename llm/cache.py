@@ -0,0 +1,239 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from enum import StrEnum
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Sequence, Type
+
+from langchain_core.messages import BaseMessage
+from langchain_core.runnables import Runnable, RunnableConfig
+from pydantic import BaseModel
+
+
+class CacheMode(StrEnum):
+    """READ_THROUGH serves hits and stores misses, WRITE_ONLY always calls the llm and refreshes the stored response"""
+    READ_THROUGH = "READ_THROUGH"
+    WRITE_ONLY = "WRITE_ONLY"
+    OFF = "OFF"
+
+
+class CacheStats(BaseModel):
+    hits: int = 0
+    misses: int = 0
+    writes: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class LLMResponseCache:
+    """SQLite-backed cache of validated structured generations.
+
+    Responses are keyed on the model, its temperature, the generation schema, and the prompt messages, so a
+    re-run from the same episode state replays identical prompts from disk. When the stored responses grow
+    past max_bytes, the least recently used ones are evicted. Hits only note their access time in memory, so
+    they do no disk writes. The noted times are written in batches of touch_batch, and before every eviction.
+    """
+
+    def __init__(
+        self,
+        path: str | Path = "sandbox/llm_cache.sqlite",
+        max_bytes: int = 256 * 1024 * 1024,
+        mode: CacheMode = CacheMode.READ_THROUGH,
+        touch_batch: int = 256,
+    ) -> None:
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.mode = mode
+        self.touch_batch = touch_batch
+
+        # key -> access time of hits not yet written, in the order they were hit
+        self.touched: Dict[str, float] = {}
+        self.stats = CacheStats()
+        self.lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(self.path, check_same_thread=False)
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                schema TEXT NOT NULL,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                accessed REAL NOT NULL
+            )
+        """)
+        self.connection.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+        self.connection.commit()
+        self.total_bytes = self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def wrap(
+        self,
+        runnable: Runnable,
+        base_model: Any,
+        schema: Type[BaseModel],
+    ) -> Runnable:
+        if self.mode == CacheMode.OFF:
+            return runnable
+        return CachedRunnable(runnable, self, model_key(base_model), schema)
+
+    def key_for(
+        self,
+        model: str,
+        schema: Type[BaseModel],
+        messages: Sequence[BaseMessage],
+    ) -> str:
+        payload = json.dumps({
+            "model": model,
+            "schema": schema.__name__,
+            "schema_hash": _schema_hash(schema),
+            "messages": [[message.type, message.content] for message in messages],
+        }, sort_keys=True)
+        return _hash(payload)
+
+    def get(
+        self,
+        key: str,
+        schema: Type[BaseModel],
+    ) -> BaseModel | None:
+        if self.mode != CacheMode.READ_THROUGH:
+            return None
+        with self.lock:
+            row = self.connection.execute("SELECT value FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.stats.misses += 1
+                return None
+            self.touched[key] = time.time()
+            if len(self.touched) >= self.touch_batch:
+                self._write_touches()
+                self.connection.commit()
+            self.stats.hits += 1
+        return schema.model_validate_json(row[0])
+
+    def put(
+        self,
+        key: str,
+        generation: BaseModel,
+    ) -> None:
+        if self.mode == CacheMode.OFF:
+            return
+        value = generation.model_dump_json()
+        size = len(value.encode())
+        with self.lock:
+            previous = self.connection.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self.connection.execute(
+                "INSERT OR REPLACE INTO responses (key, schema, value, size, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, type(generation).__name__, value, size, time.time()),
+            )
+            self.total_bytes += size - (previous[0] if previous else 0)
+            self.stats.writes += 1
+            self.touched.pop(key, None)
+            self._write_touches()
+            self._evict()
+            self.connection.commit()
+
+    def clear(self) -> None:
+        with self.lock:
+            self.connection.execute("DELETE FROM responses")
+            self.connection.commit()
+            self.touched.clear()
+            self.total_bytes = 0
+
+    def close(self) -> None:
+        with self.lock:
+            self._write_touches()
+            self.connection.commit()
+        self.connection.close()
+
+    def _write_touches(self) -> None:
+        """Writes the access times noted by hits. Callers hold the lock and commit."""
+        if self.touched:
+            self.connection.executemany("UPDATE responses SET accessed = ? WHERE key = ?", [(accessed, key) for key, accessed in self.touched.items()])
+            self.touched.clear()
+
+    def _evict(self) -> None:
+        """Drops least recently used responses until the cache fits in max_bytes. Callers hold the lock."""
+        while self.total_bytes > self.max_bytes:
+            rows = self.connection.execute("SELECT key, size FROM responses ORDER BY accessed LIMIT 64").fetchall()
+            if not rows:
+                self.total_bytes = 0
+                return
+            for key, size in rows:
+                if self.total_bytes <= self.max_bytes:
+                    return
+                self.connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.total_bytes -= size
+                self.stats.evictions += 1
+
+
+class CachedRunnable(Runnable[Sequence[BaseMessage], BaseModel]):
+
+    def __init__(
+        self,
+        runnable: Runnable,
+        cache: LLMResponseCache,
+        model: str,
+        schema: Type[BaseModel],
+    ) -> None:
+        self.runnable = runnable
+        self.cache = cache
+        self.model = model
+        self.schema = schema
+
+    def invoke(
+        self,
+        input: Sequence[BaseMessage],
+        config: RunnableConfig | None = None,
+        **kwargs: Any,
+    ) -> BaseModel:
+        key = self.cache.key_for(self.model, self.schema, input)
+        cached = self.cache.get(key, self.schema)
+        if cached is not None:
+            return cached
+        return self._store(key, self.runnable.invoke(input, config, **kwargs))
+
+    async def ainvoke(
+        self,
+        input: Sequence[BaseMessage],
+        config: RunnableConfig | None = None,
+        **kwargs: Any,
+    ) -> BaseModel:
+        key = self.cache.key_for(self.model, self.schema, input)
+        cached = self.cache.get(key, self.schema)
+        if cached is not None:
+            return cached
+        return self._store(key, await self.runnable.ainvoke(input, config, **kwargs))
+
+    def _store(
+        self,
+        key: str,
+        generation: Any,
+    ) -> BaseModel:
+        generation = self.schema.model_validate(generation)
+        self.cache.put(key, generation)
+        return generation
+
+
+def model_key(base_model: Any) -> str:
+    """Identifies the model behind a runnable: its class, model name, and temperature"""
+    model_name = getattr(base_model, "model_name", None) or getattr(base_model, "model", None)
+    temperature = getattr(base_model, "temperature", None)
+    return f"{type(base_model).__name__}:{model_name}:{temperature}"
+
+
+@lru_cache(maxsize=None)
+def _schema_hash(schema: Type[BaseModel]) -> str:
+    """Changes whenever the schema's fields do, so edited schemas never read stale responses"""
+    return _hash(json.dumps(schema.model_json_schema(), sort_keys=True))
+
+
+def _hash(value: str) -> str:
+    return hashlib.sha256(value.encode()).hexdigest()
@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import asyncio
+import random
+import re
+import time
+from collections import deque
+from functools import partial
+from typing import Any, Callable, Deque, Dict, List, Sequence, Type
+
+from langchain_core.messages import BaseMessage
+from langchain_core.runnables import Runnable, RunnableConfig
+from pydantic import BaseModel
+
+from llm.token_counting import count_message_tokens, count_tokens
+from models.core.actions import Action, Outcome
+from models.core.enums import ActionType, EntityType, OutcomeType
+
+Responder = Callable[[Type[BaseModel], Sequence[BaseMessage]], BaseModel]
+
+
+class FakeCallStats(BaseModel):
+    calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    wait_seconds: float = 0.0
+    rate_limited: int = 0
+
+
+class FakeRateLimitError(Exception):
+    """Raised like openai's RateLimitError when the fake provider's requests per minute are exceeded"""
+    status_code = 429
+
+
+class FakeChatModel:
+    """Offline stand-in for ChatOpenAI.
+
+    with_structured_output returns a runnable that returns a schema-valid generation built by the responder after a
+    simulated latency, which grows with the prompt's tokens and the generation's tokens. Stats are kept per schema name.
+    When requests_per_minute is set, calls beyond it within a sliding minute fail with FakeRateLimitError.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        seconds_per_1k_prompt_tokens: float = 0.0,
+        seconds_per_1k_completion_tokens: float = 0.0,
+        responder: Responder | None = None,
+        seed: int | None = None,
+        requests_per_minute: float | None = None,
+    ) -> None:
+        self.latency = latency
+        self.jitter = jitter
+        self.seconds_per_1k_prompt_tokens = seconds_per_1k_prompt_tokens
+        self.seconds_per_1k_completion_tokens = seconds_per_1k_completion_tokens
+        # salted so a model and a zombie policy sharing a seed don't draw the same action uids
+        self.rng = random.Random(None if seed is None else f"fake-llm:{seed}")
+        # the default responder draws action uids from the model's rng, so seeded runs generate the same uids
+        self.responder = responder or partial(default_responder, rng=self.rng)
+        self.requests_per_minute = requests_per_minute
+        self.stats: Dict[str, FakeCallStats] = {}
+        self.request_times: Deque[float] = deque()
+
+    def with_structured_output(
+        self,
+        schema: Type[BaseModel],
+        **_: Any,
+    ) -> FakeStructuredLLM:
+        return FakeStructuredLLM(self, schema)
+
+    def delay_for(
+        self,
+        prompt_tokens: int,
+        completion_tokens: int = 0,
+    ) -> float:
+        delay = self.latency + self.jitter * self.rng.uniform(-1, 1)
+        delay += prompt_tokens / 1000 * self.seconds_per_1k_prompt_tokens
+        delay += completion_tokens / 1000 * self.seconds_per_1k_completion_tokens
+        return max(delay, 0.0)
+
+    def check_rate_limit(self) -> bool:
+        """Records a request and returns False when it exceeds the simulated requests per minute"""
+        if self.requests_per_minute is None:
+            return True
+        now = time.monotonic()
+        while self.request_times and now - self.request_times[0] >= 60:
+            self.request_times.popleft()
+        if len(self.request_times) >= self.requests_per_minute:
+            return False
+        self.request_times.append(now)
+        return True
+
+
+class FakeStructuredLLM(Runnable[Sequence[BaseMessage], BaseModel]):
+
+    def __init__(
+        self,
+        model: FakeChatModel,
+        schema: Type[BaseModel],
+    ) -> None:
+        self.model = model
+        self.schema = schema
+
+    def invoke(
+        self,
+        input: Sequence[BaseMessage],
+        config: RunnableConfig | None = None,
+        **kwargs: Any,
+    ) -> BaseModel:
+        generation, delay = self._respond(input)
+        time.sleep(delay)
+        return generation
+
+    async def ainvoke(
+        self,
+        input: Sequence[BaseMessage],
+        config: RunnableConfig | None = None,
+        **kwargs: Any,
+    ) -> BaseModel:
+        generation, delay = self._respond(input)
+        await asyncio.sleep(delay)
+        return generation
+
+    def _respond(
+        self,
+        messages: Sequence[BaseMessage],
+    ) -> tuple[BaseModel, float]:
+        """The generation and how long to wait before returning it"""
+        stats = self.model.stats.setdefault(self.schema.__name__, FakeCallStats())
+        if not self.model.check_rate_limit():
+            stats.rate_limited += 1
+            raise FakeRateLimitError(f"fake provider limit of {self.model.requests_per_minute} requests per minute exceeded")
+
+        generation = self.model.responder(self.schema, messages)
+        prompt_tokens = count_message_tokens(messages)
+        completion_tokens = count_tokens(generation.model_dump_json(exclude_none=True))
+        delay = self.model.delay_for(prompt_tokens, completion_tokens)
+        stats.calls += 1
+        stats.prompt_tokens += prompt_tokens
+        stats.completion_tokens += completion_tokens
+        stats.wait_seconds += delay
+        return generation, delay
+
+
+_ACTOR_SECTION = re.compile(r"(?:Your Character|Acting Character|Your Horde):(.*?)(?:Environment:|Actions:|$)", re.S)
+_ACTIONS_SECTION = re.compile(r"Actions:(.*?)(?:Environment:|$)", re.S)
+# aliased prompts (see llm.aliasing) name actors, locations, and actions as @A3, @L2, and @X5
+_ENTITY_ID = re.compile(r"\bactor_\d+|\blocation_\d+|@A\d+\b|@L\d+\b")
+_ACTION_ID = re.compile(r"\baction_\d+|@X\d+\b")
+
+
+def default_responder(
+    schema: Type[BaseModel],
+    messages: Sequence[BaseMessage],
+    rng: random.Random | None = None,
+) -> BaseModel:
+    """Builds a generation by reading the acting actors and actions out of the prompt.
+
+    Actors INSPECT their own location (which always needs an evaluator call), and every evaluated action succeeds
+    without changing state. Any other string field on the schema is filled with a placeholder.
+    New action uids are drawn from rng, or from an unseeded one when it is None.
+    """
+    rng = rng or random.Random()
+    text = "\n".join(str(message.content) for message in messages)
+    values: Dict[str, Any] = {
+        name: "fake" for name, field in schema.model_fields.items() if field.annotation is str
+    }
+
+    if "outcomes" in schema.model_fields:
+        # dumped, so they validate as either Outcome or OutcomeDelta
+        values["outcomes"] = [_fake_outcome(action_id).model_dump(exclude_none=True) for action_id in _action_ids(text)]
+    elif "actions" in schema.model_fields:
+        actors = _actor_locations(text)
+        if len(actors) == 1:
+            # a single actor generating a list is a survivor, who takes two actions
+            actors = actors * 2
+        values["actions"] = [_fake_action(actor_id, location_id, rng) for actor_id, location_id in actors]
+    elif "action" in schema.model_fields:
+        values["action"] = _fake_action(*_actor_locations(text)[0], rng)
+
+    return schema.model_validate(values)
+
+
+def _actor_locations(text: str) -> List[tuple[str, str]]:
+    """Pairs each acting actor with the first location that follows it"""
+    section = _ACTOR_SECTION.search(text)
+    pairs: Dict[str, str] = {}
+    actor_id = None
+    for uid in _ENTITY_ID.findall(section.group(1) if section else text):
+        if uid.startswith("actor_") or uid.startswith("@A"):
+            actor_id = uid
+        elif actor_id is not None and actor_id not in pairs:
+            pairs[actor_id] = uid
+    return list(pairs.items())
+
+
+def _action_ids(text: str) -> List[str]:
+    section = _ACTIONS_SECTION.search(text)
+    return list(dict.fromkeys(_ACTION_ID.findall(section.group(1) if section else text)))
+
+
+def _fake_action(
+    actor_id: str,
+    location_id: str,
+    rng: random.Random,
+) -> Action:
+    return Action(
+        uid=f"action_{rng.randint(1000000, 9999999)}",
+        type=ActionType.INSPECT,
+        location_id=location_id,
+        source_actor_id=actor_id,
+        target_entity_id=location_id,
+        target_entity_type=EntityType.LOCATION,
+        fact=f"{actor_id} searches {location_id}",
+    )
+
+
+def _fake_outcome(
+    action_id: str,
+) -> Outcome:
+    return Outcome(
+        action_id=action_id,
+        type=OutcomeType.SUCCESS,
+        attention=1,
+        fact=f"{action_id} succeeds",
+    )
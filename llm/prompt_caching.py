@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import hashlib
+from collections import OrderedDict
+from typing import Any, Dict, Sequence
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import LLMResult
+
+from llm.token_counting import count_tokens
+
+"""OpenAI only caches prompts whose shared prefix is at least this long, and caches it in increments"""
+MIN_CACHED_PREFIX_TOKENS = 1024
+CACHED_PREFIX_INCREMENT = 128
+
+
+class UsageCallbackHandler(BaseCallbackHandler):
+    """Collects the token usage chat models report, including prompt tokens served from the provider's cache"""
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.cached_tokens = 0
+
+    def on_llm_end(
+        self,
+        response: LLMResult,
+        **kwargs: Any,
+    ) -> None:
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if not usage:
+                    continue
+                self.calls += 1
+                self.input_tokens += usage.get("input_tokens", 0)
+                self.output_tokens += usage.get("output_tokens", 0)
+                self.cached_tokens += cached_tokens_from_usage(usage)
+
+
+class PromptCacheSimulator:
+    """Estimates provider prompt caching when no usage is reported, e.g. against the fake llm.
+
+    Mirrors OpenAI's automatic caching: when a prompt's leading messages were sent before and add up to at least
+    MIN_CACHED_PREFIX_TOKENS, they count as cached, rounded down to CACHED_PREFIX_INCREMENT. Prefixes are compared
+    a whole message at a time, and only the most recent max_prefixes are remembered.
+    """
+
+    def __init__(
+        self,
+        max_prefixes: int = 10_000,
+    ) -> None:
+        self.max_prefixes = max_prefixes
+        self.seen: OrderedDict[str, None] = OrderedDict()
+
+    def cached_tokens(
+        self,
+        messages: Sequence[BaseMessage],
+    ) -> int:
+        digest = hashlib.sha256()
+        prefix_tokens = 0
+        cached = 0
+        for message in messages:
+            digest.update(f"{message.type}\0{message.content}\0".encode())
+            prefix_tokens += count_tokens(str(message.content))
+            key = digest.hexdigest()
+            if key in self.seen:
+                self.seen.move_to_end(key)
+                cached = prefix_tokens
+            else:
+                self.seen[key] = None
+                if len(self.seen) > self.max_prefixes:
+                    self.seen.popitem(last=False)
+        if cached < MIN_CACHED_PREFIX_TOKENS:
+            return 0
+        return cached - cached % CACHED_PREFIX_INCREMENT
+
+
+def cached_tokens_from_usage(usage: Dict[str, Any]) -> int:
+    """Cached prompt tokens from langchain usage metadata, including service tier variants like priority_cache_read"""
+    details = usage.get("input_token_details") or {}
+    return sum(value or 0 for key, value in details.items() if key.endswith("cache_read"))
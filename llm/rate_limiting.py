@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from typing import Any, Awaitable, Callable, Sequence, TypeVar
+
+from langchain_core.messages import BaseMessage
+from langchain_core.runnables import Runnable, RunnableConfig
+from pydantic import BaseModel
+
+from llm.token_counting import count_message_tokens
+
+T = TypeVar("T")
+
+
+class TokenBucket:
+    """A continuously refilling budget, e.g. requests or tokens per minute.
+
+    reserve() deducts immediately and returns how long the caller must wait for the budget to cover it,
+    which lets the same bucket serve both async and blocking callers.
+    """
+
+    def __init__(
+        self,
+        per_minute: float,
+    ) -> None:
+        self.capacity = per_minute
+        self.rate = per_minute / 60
+        self.available = per_minute
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(
+        self,
+        amount: float,
+    ) -> float:
+        with self.lock:
+            now = time.monotonic()
+            self.available = min(self.capacity, self.available + (now - self.updated) * self.rate)
+            self.updated = now
+            # a single request larger than the whole budget waits for a full bucket rather than forever
+            self.available -= min(amount, self.capacity)
+            return max(0.0, -self.available / self.rate)
+
+
+class RateLimiterStats(BaseModel):
+
+    """attempts made through the limiter, retries included"""
+    requests: int = 0
+
+    """attempts answered with a 429"""
+    rate_limited: int = 0
+
+    """time spent waiting on budgets and backoff, summed over concurrent requests"""
+    waited_seconds: float = 0.0
+
+
+class RateLimitExceeded(Exception):
+    """Raised once a request has been rate limited more times than the limiter retries"""
+    pass
+
+
+class SharedRateLimiter:
+    """Concurrency, request and token budgets shared by every llm client wrapped with it.
+
+    Requests reserve from a requests/min and a tokens/min bucket (prompt tokens plus an estimated completion),
+    and async requests hold one of max_concurrency slots while in flight. A 429 from any client pauses all of
+    them for the current backoff, which doubles on consecutive 429s and halves back down on successes.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 8,
+        requests_per_minute: float = 500,
+        tokens_per_minute: float = 200_000,
+        completion_tokens_estimate: int = 500,
+        max_retries: int = 6,
+        initial_backoff: float = 1.0,
+        max_backoff: float = 60.0,
+    ) -> None:
+        self.max_concurrency = max_concurrency
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.completion_tokens_estimate = completion_tokens_estimate
+        self.max_retries = max_retries
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+
+        self.backoff = initial_backoff
+        self.paused_until = 0.0
+        self.stats = RateLimiterStats()
+        self._semaphore: asyncio.Semaphore | None = None
+
+    def wrap(
+        self,
+        runnable: Runnable,
+    ) -> RateLimitedRunnable:
+        return RateLimitedRunnable(runnable, self)
+
+    async def arun(
+        self,
+        call: Callable[[], Awaitable[T]],
+        prompt_tokens: int,
+    ) -> T:
+        for _ in range(self.max_retries + 1):
+            async with self._get_semaphore():
+                await self._await(self._reserve(prompt_tokens))
+                try:
+                    result = await call()
+                except Exception as error:
+                    if not is_rate_limit_error(error):
+                        raise
+                    self._on_rate_limited()
+                    continue
+            self._on_success()
+            return result
+        raise RateLimitExceeded(f"still rate limited after {self.max_retries} retries")
+
+    def run(
+        self,
+        call: Callable[[], T],
+        prompt_tokens: int,
+    ) -> T:
+        """Blocking version of arun. Blocking callers share the budgets and backoff but not the concurrency slots."""
+        for _ in range(self.max_retries + 1):
+            wait = self._reserve(prompt_tokens)
+            self.stats.waited_seconds += wait
+            time.sleep(wait)
+            try:
+                result = call()
+            except Exception as error:
+                if not is_rate_limit_error(error):
+                    raise
+                self._on_rate_limited()
+                continue
+            self._on_success()
+            return result
+        raise RateLimitExceeded(f"still rate limited after {self.max_retries} retries")
+
+    def _reserve(
+        self,
+        prompt_tokens: int,
+    ) -> float:
+        self.stats.requests += 1
+        return max(
+            self.paused_until - time.monotonic(),
+            self.requests.reserve(1),
+            self.tokens.reserve(prompt_tokens + self.completion_tokens_estimate),
+        )
+
+    async def _await(
+        self,
+        wait: float,
+    ) -> None:
+        self.stats.waited_seconds += max(wait, 0.0)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def _on_rate_limited(self) -> None:
+        self.stats.rate_limited += 1
+        self.paused_until = max(self.paused_until, time.monotonic() + self.backoff)
+        self.backoff = min(self.backoff * 2, self.max_backoff)
+
+    def _on_success(self) -> None:
+        self.backoff = max(self.backoff / 2, self.initial_backoff)
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # created lazily so the limiter can be built outside of an event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+
+class RateLimitedRunnable(Runnable[Sequence[BaseMessage], Any]):
+
+    def __init__(
+        self,
+        runnable: Runnable,
+        limiter: SharedRateLimiter,
+    ) -> None:
+        self.runnable = runnable
+        self.limiter = limiter
+
+    def invoke(
+        self,
+        input: Sequence[BaseMessage],
+        config: RunnableConfig | None = None,
+        **kwargs: Any,
+    ) -> Any:
+        return self.limiter.run(lambda: self.runnable.invoke(input, config, **kwargs), count_message_tokens(input))
+
+    async def ainvoke(
+        self,
+        input: Sequence[BaseMessage],
+        config: RunnableConfig | None = None,
+        **kwargs: Any,
+    ) -> Any:
+        return await self.limiter.arun(lambda: self.runnable.ainvoke(input, config, **kwargs), count_message_tokens(input))
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """True for openai's RateLimitError and any other error carrying an http 429 status"""
+    return getattr(error, "status_code", None) == 429
@@ -0,0 +1,243 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Sequence, Tuple, Type
+
+from langchain_core.messages import BaseMessage
+from langchain_core.runnables import Runnable, RunnableConfig
+from pydantic import BaseModel
+
+from models.core.episode import Episode
+
+
+class TraceRecord(BaseModel):
+    schema_name: str
+    prompt_hash: str
+
+    """(message type, content) pairs, kept so a trace can be inspected or diffed against new prompts"""
+    messages: List[Tuple[str, str]]
+
+    generation: Dict[str, Any]
+
+
+class EpisodeTrace(BaseModel):
+    """The starting episode of a run and every llm call made during it, in call order"""
+    episode: Episode
+    records: List[TraceRecord] = []
+
+    def save(
+        self,
+        path: str | Path,
+    ) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            f.write(self.model_dump_json())
+
+    @classmethod
+    def load(
+        cls,
+        path: str | Path,
+    ) -> EpisodeTrace:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            return cls.model_validate_json(f.read())
+
+
+class TraceRecorder:
+    """Captures the starting episode and every structured generation made through the runnables it wraps.
+
+    The episode is snapshotted when the recorder is created, so create it before the run starts mutating the episode.
+    """
+
+    def __init__(
+        self,
+        episode: Episode,
+    ) -> None:
+        self.trace = EpisodeTrace(episode=episode.model_copy(deep=True))
+        self.lock = threading.Lock()
+
+    def wrap(
+        self,
+        runnable: Runnable,
+        schema: Type[BaseModel],
+    ) -> RecordingRunnable:
+        return RecordingRunnable(runnable, self, schema)
+
+    def record(
+        self,
+        schema: Type[BaseModel],
+        messages: Sequence[BaseMessage],
+        generation: BaseModel,
+    ) -> None:
+        record = TraceRecord(
+            schema_name=schema.__name__,
+            prompt_hash=prompt_hash(messages),
+            messages=[(message.type, str(message.content)) for message in messages],
+            generation=generation.model_dump(mode="json"),
+        )
+        with self.lock:
+            self.trace.records.append(record)
+
+    def save(
+        self,
+        path: str | Path,
+    ) -> None:
+        self.trace.save(path)
+
+
+class RecordingRunnable(Runnable[Sequence[BaseMessage], BaseModel]):
+
+    def __init__(
+        self,
+        runnable: Runnable,
+        recorder: TraceRecorder,
+        schema: Type[BaseModel],
+    ) -> None:
+        self.runnable = runnable
+        self.recorder = recorder
+        self.schema = schema
+
+    def invoke(
+        self,
+        input: Sequence[BaseMessage],
+        config: RunnableConfig | None = None,
+        **kwargs: Any,
+    ) -> BaseModel:
+        generation = self.schema.model_validate(self.runnable.invoke(input, config, **kwargs))
+        self.recorder.record(self.schema, input, generation)
+        return generation
+
+    async def ainvoke(
+        self,
+        input: Sequence[BaseMessage],
+        config: RunnableConfig | None = None,
+        **kwargs: Any,
+    ) -> BaseModel:
+        generation = self.schema.model_validate(await self.runnable.ainvoke(input, config, **kwargs))
+        self.recorder.record(self.schema, input, generation)
+        return generation
+
+
+class ReplayStats(BaseModel):
+    """calls served by a record with the same prompt"""
+    matched: int = 0
+
+    """calls whose prompt changed since recording, served by the schema's next unused record instead"""
+    fallback: int = 0
+
+
+class ReplayExhausted(Exception):
+    """Raised when a call has no unused record left to serve it"""
+    pass
+
+
+class ReplayChatModel:
+    """Offline stand-in for ChatOpenAI that serves the generations of a recorded trace.
+
+    A call is served by the first unused record with the same schema and prompt. When the engine's prompts have
+    changed since recording, strict replays raise ReplayExhausted, otherwise the call gets the schema's next unused
+    record in recorded order.
+    """
+
+    def __init__(
+        self,
+        trace: EpisodeTrace,
+        strict: bool = False,
+    ) -> None:
+        self.trace = trace
+        self.strict = strict
+        self.stats = ReplayStats()
+        self.used = [False] * len(trace.records)
+        self.lock = threading.Lock()
+
+        # record indices in recorded order, per prompt and per schema
+        self.by_prompt: Dict[Tuple[str, str], Deque[int]] = {}
+        self.by_schema: Dict[str, Deque[int]] = {}
+        for index, record in enumerate(trace.records):
+            self.by_prompt.setdefault((record.schema_name, record.prompt_hash), deque()).append(index)
+            self.by_schema.setdefault(record.schema_name, deque()).append(index)
+
+    @classmethod
+    def load(
+        cls,
+        path: str | Path,
+        strict: bool = False,
+    ) -> ReplayChatModel:
+        return cls(EpisodeTrace.load(path), strict=strict)
+
+    def starting_episode(self) -> Episode:
+        """A fresh copy of the recorded starting episode"""
+        return self.trace.episode.model_copy(deep=True)
+
+    def with_structured_output(
+        self,
+        schema: Type[BaseModel],
+        **_: Any,
+    ) -> ReplayStructuredLLM:
+        return ReplayStructuredLLM(self, schema)
+
+    def next_generation(
+        self,
+        schema: Type[BaseModel],
+        messages: Sequence[BaseMessage],
+    ) -> BaseModel:
+        key = prompt_hash(messages)
+        with self.lock:
+            index = self._next_unused(self.by_prompt.get((schema.__name__, key)))
+            if index is not None:
+                self.stats.matched += 1
+            elif not self.strict:
+                index = self._next_unused(self.by_schema.get(schema.__name__))
+                if index is not None:
+                    self.stats.fallback += 1
+            if index is None:
+                raise ReplayExhausted(f"no unused {schema.__name__} record for prompt {key[:12]}")
+            self.used[index] = True
+        return schema.model_validate(self.trace.records[index].generation)
+
+    def _next_unused(
+        self,
+        indices: Deque[int] | None,
+    ) -> int | None:
+        while indices:
+            index = indices.popleft()
+            if not self.used[index]:
+                return index
+        return None
+
+
+class ReplayStructuredLLM(Runnable[Sequence[BaseMessage], BaseModel]):
+
+    def __init__(
+        self,
+        model: ReplayChatModel,
+        schema: Type[BaseModel],
+    ) -> None:
+        self.model = model
+        self.schema = schema
+
+    def invoke(
+        self,
+        input: Sequence[BaseMessage],
+        config: RunnableConfig | None = None,
+        **kwargs: Any,
+    ) -> BaseModel:
+        return self.model.next_generation(self.schema, input)
+
+    async def ainvoke(
+        self,
+        input: Sequence[BaseMessage],
+        config: RunnableConfig | None = None,
+        **kwargs: Any,
+    ) -> BaseModel:
+        return self.model.next_generation(self.schema, input)
+
+
+def prompt_hash(messages: Sequence[BaseMessage]) -> str:
+    payload = json.dumps([[message.type, message.content] for message in messages])
+    return hashlib.sha256(payload.encode()).hexdigest()
@@ -0,0 +1,35 @@
+from functools import cache
+from math import ceil
+from typing import Sequence
+
+from langchain_core.messages import BaseMessage
+
+"""rough average for english prose and TOON encoded entities with gpt-4.1's tokenizer"""
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Fast, dependency free token estimate"""
+    return ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def count_tokens(text: str) -> int:
+    """Exact token count when the tiktoken encoding is available locally, otherwise an estimate"""
+    encoding = _load_encoding()
+    if encoding is None:
+        return estimate_tokens(text)
+    return len(encoding.encode(text))
+
+
+def count_message_tokens(messages: Sequence[BaseMessage]) -> int:
+    return sum(count_tokens(str(message.content)) for message in messages)
+
+
+@cache
+def _load_encoding():
+    # tiktoken downloads encodings on first use, so this fails offline unless the encoding is already cached
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        return None
@@ -4,7 +4,8 @@ from typing import List
 from pydantic import BaseModel
 
 from models.core.entities import ActorEntity, ItemEntity, JunctionEntity, LocationEntity
-from models.core.enums import ActionType, EntityType, OutcomeType
+from models.core.enums import (ActionType, ActorArousal, ActorControl, ActorHealth, EntityType, ItemCondition,
+                               JunctionAccessibility, JunctionCondition, LocationCondition, OutcomeType)
 
 
 class Action(BaseModel):
@@ -36,3 +37,54 @@ class Outcome(BaseModel):
 
     """a single, short declarative statement about the outcome of an action. Should not describe further actions."""
     fact: str
+
+
+class EntityPatch(BaseModel):
+    """The fields of one entity that an outcome changed. Fields that did not change are omitted."""
+
+    """uid of the changed entity, either the action's source actor or its target entity"""
+    uid: str
+
+    """a new single, declarative statement about the entity, only if the outcome changed it"""
+    fact: str | None = None
+
+    """actors only"""
+    health: ActorHealth | None = None
+    arousal: ActorArousal | None = None
+    control: ActorControl | None = None
+
+    """actors only, the location the actor is now in"""
+    location_id: str | None = None
+
+    """locations, junctions, and items, using the condition values of the entity's type"""
+    condition: LocationCondition | JunctionCondition | ItemCondition | None = None
+
+    """junctions only"""
+    accessibility: JunctionAccessibility | None = None
+
+    """items only, the actor or location now holding the item"""
+    holder_id: str | None = None
+
+    """actors only, changes to the actor's internal state"""
+    emotion: str | None = None
+    immediate_goal: str | None = None
+    is_infected: bool | None = None
+
+
+class OutcomeDelta(BaseModel):
+    """An Outcome that describes state changes as patches instead of full entities"""
+
+    """the action that caused this outcome"""
+    action_id: str
+
+    """how successful the action was from the perspective of the source actor"""
+    type: OutcomeType
+
+    """how much attention does the action draw (how loud or visible is it)"""
+    attention: int
+
+    """one patch per entity whose state the outcome changed. If nothing changed, leave this empty"""
+    patches: List[EntityPatch] = []
+
+    """a single, short declarative statement about the outcome of an action. Should not describe further actions."""
+    fact: str
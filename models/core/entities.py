@@ -1,5 +1,5 @@
-from typing import List
-from pydantic import BaseModel
+from typing import Any, Dict, List, Tuple
+from pydantic import BaseModel, PrivateAttr
 
 from models.core.enums import (ActorArousal, ActorControl, ActorHealth, ActorType, ItemCondition, 
                                JunctionAccessibility, JunctionCondition, LocationCondition, LocationType)
@@ -24,6 +24,55 @@ class Entity(BaseModel):
     """a single, declaritive statement that describes the current state of the entity"""
     fact: str
 
+    _version: int = PrivateAttr(default=0)
+
+    """the entity's TOON encoding as (version, fields, text), reused by prompts until the version changes"""
+    _fragment: Tuple[int, Tuple[str, ...] | None, str] | None = PrivateAttr(default=None)
+
+    @property
+    def version(self) -> int:
+        """Bumped whenever a field is assigned, a copy is made with updates, or the entity replaces another in an episode"""
+        return self._version
+
+    def __eq__(
+        self,
+        other: Any,
+    ) -> bool:
+        # versions and cached fragments are bookkeeping, so entities with the same fields are equal
+        if not isinstance(other, BaseModel):
+            return NotImplemented
+        return type(self) is type(other) and self.__dict__ == other.__dict__
+
+    def __setattr__(
+        self,
+        name: str,
+        value: Any,
+    ) -> None:
+        super().__setattr__(name, value)
+        if name in type(self).model_fields:
+            self._version += 1
+
+    def model_copy(
+        self,
+        *,
+        update: Dict[str, Any] | None = None,
+        deep: bool = False,
+    ):
+        copy = super().model_copy(update=update, deep=deep)
+        if update:
+            copy._version += 1
+        return copy
+
+    def supersede(
+        self,
+        previous: "Entity",
+    ) -> None:
+        """Versions this entity past the one it replaces"""
+        if previous is not self:
+            self._version = max(self._version, previous._version + 1)
+        else:
+            self._version += 1
+
 class LandmarkEntity(Entity):
     """A public, noteworthy location that would appear on a map"""
     pass
@@ -82,10 +131,15 @@ class ObservableActorEntity(Entity):
 class ActorEntity(ObservableActorEntity):
     internal: ActorInternalState
 
+    _observable: Tuple[int, ObservableActorEntity] | None = PrivateAttr(default=None)
+
     def get_observable(self):
-        copy = self.__dict__.copy()
-        copy.pop("internal")
-        return ObservableActorEntity(**copy)
+        # reused until the actor changes, so its encoded fragment is too
+        if self._observable is None or self._observable[0] != self._version:
+            copy = self.__dict__.copy()
+            copy.pop("internal")
+            self._observable = (self._version, ObservableActorEntity(**copy))
+        return self._observable[1]
    
 class ItemEntity(Entity):
     condition: ItemCondition
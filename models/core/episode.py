@@ -1,9 +1,133 @@
 
-from typing import Dict, List
-from pydantic import BaseModel
+from copy import copy
+from typing import Any, Dict, Iterable, List, Sequence, Set, Tuple
+from pydantic import BaseModel, PrivateAttr
 
 from models.core.actions import Action, Outcome
 from models.core.entities import ActorEntity, ObservableActorEntity, ItemEntity, JunctionEntity, LandmarkEntity, LocationEntity
+from models.core.junction_graph import JunctionGraph, Traversal, graph_shape, is_see_through
+
+class HistorySynopsis(BaseModel):
+
+    """the actor or location whose older actions are summarized"""
+    subject_id: str
+
+    """how many actions have been folded into the synopsis"""
+    action_count: int = 0
+
+    synopsis: str = ""
+
+
+class EpisodeHistory(BaseModel):
+    """Older actions folded out of agent prompts, summarized per actor and per location. Maintained by a HistoryCompactor."""
+
+    """how many of each actor's most recent actions stay verbatim in prompts"""
+    keep_last: int
+
+    actor_synopses: Dict[str, HistorySynopsis] = {}
+    location_synopses: Dict[str, HistorySynopsis] = {}
+
+    """per actor, the index into episode.actions of their first action that is not folded"""
+    unfolded_from: Dict[str, int] = {}
+
+    """every action before this index into episode.actions is folded, so surroundings start scanning here"""
+    scan_start: int = 0
+
+    def is_folded(
+        self,
+        index: int,
+        action: Action,
+    ) -> bool:
+        return index < self.unfolded_from.get(action.source_actor_id, 0)
+
+
+class EnvironmentIndex:
+    """Spatial and ownership lookups over an environment's entities, so queries only touch the entities they return.
+
+    Lookups return entities in the order of the environment's dicts, the order a full scan would give.
+    Kept current by Environment.update_index, which Episode.put_entity (and so apply_entity_update) calls for every
+    entity it puts. put_entity is the only supported way to change an episode's entities: a direct write such as
+    episode.items[uid] = item goes unnoticed and leaves the index stale, since index_shape cannot see it.
+    """
+
+    def __init__(
+        self,
+        env: "Environment",
+    ) -> None:
+        self.actors_by_location: Dict[str, Set[str]] = {}
+        self.junctions_by_location: Dict[str, Set[str]] = {}
+        self.items_by_holder: Dict[str, Set[str]] = {}
+        self.actor_locations: Dict[str, str] = {}
+        self.junction_ends: Dict[str, Tuple[str, str]] = {}
+        self.item_holders: Dict[str, str] = {}
+
+        # each uid's position in its entity dict, for ordering lookups without scanning the dicts
+        self.positions: Dict[str, int] = {}
+        for entities in (env.locations, env.junctions, env.actors, env.items):
+            self.positions.update((uid, position) for position, uid in enumerate(entities))
+
+        for actor in env.actors.values():
+            self.put(actor)
+        for junction in env.junctions.values():
+            self.put(junction)
+        for item in env.items.values():
+            self.put(item)
+        self.shape = index_shape(env)
+
+    def put(
+        self,
+        entity: Any,
+    ) -> None:
+        """Indexes an entity, moving it out of wherever its previous version was indexed"""
+        match entity:
+            case ObservableActorEntity():
+                _move(self.actors_by_location, self.actor_locations, entity.uid, entity.location_id)
+            case JunctionEntity():
+                previous = self.junction_ends.pop(entity.uid, ())
+                for location_id in previous:
+                    self.junctions_by_location[location_id].discard(entity.uid)
+                self.junction_ends[entity.uid] = (entity.from_location_id, entity.to_location_id)
+                for location_id in self.junction_ends[entity.uid]:
+                    self.junctions_by_location.setdefault(location_id, set()).add(entity.uid)
+            case ItemEntity():
+                _move(self.items_by_holder, self.item_holders, entity.uid, entity.holder_id)
+
+    def lookup(
+        self,
+        index: Dict[str, Set[str]],
+        keys: Iterable[str],
+    ) -> List[str]:
+        """The uids indexed under any of the keys, in dict order"""
+        uids = set()
+        for key in keys:
+            uids |= index.get(key, set())
+        return sorted(uids, key=self.positions.__getitem__)
+
+
+def index_shape(env: "Environment") -> Tuple[int, ...]:
+    """Changes whenever entities are added to or removed from the environment, or its dicts are replaced.
+    It does not change when an entity is replaced under its uid, which only put_entity or update_index can report."""
+    return tuple(
+        value
+        for entities in (env.locations, env.junctions, env.actors, env.items)
+        for value in (id(entities), len(entities))
+    )
+
+
+def _move(
+    index: Dict[str, Set[str]],
+    keys: Dict[str, str],
+    uid: str,
+    key: str,
+) -> None:
+    previous = keys.get(uid)
+    if previous == key:
+        return
+    if previous is not None:
+        index[previous].discard(uid)
+    index.setdefault(key, set()).add(uid)
+    keys[uid] = key
+
 
 class Environment(BaseModel):
     landmark: LandmarkEntity
@@ -15,35 +139,339 @@ class Environment(BaseModel):
     actions: List[Action] = []
     outcomes: List[Outcome] = []
 
+    """when set, actions folded into its synopses are left out of surroundings and the synopses are given instead"""
+    history: EpisodeHistory | None = None
+
+    """built on the first lookup, and rebuilt if entities are added or removed other than through put_entity.
+    An entity replaced under its uid or changed in place other than through put_entity needs a call to update_index."""
+    _index: EnvironmentIndex | None = PrivateAttr(default=None)
+
+    """built on the first query, and kept current like the index"""
+    _junction_graph: JunctionGraph | None = PrivateAttr(default=None)
+
+    """action id -> positions of its outcomes in the outcomes list. Outcomes are only ever appended, so each lookup
+    indexes just the ones added since the last, and the whole list is reindexed only when it is replaced"""
+    _outcomes_by_action_id: Dict[str, List[int]] = PrivateAttr(default_factory=dict)
+    _indexed_outcomes: Tuple[List[Outcome] | None, int] = PrivateAttr(default=(None, 0))
+
+    def __eq__(
+        self,
+        other: Any,
+    ) -> bool:
+        # the index and junction graph are derived from the fields, so environments with the same fields are equal
+        if not isinstance(other, BaseModel):
+            return NotImplemented
+        return type(self) is type(other) and self.__dict__ == other.__dict__
+
+    def get_index(self) -> EnvironmentIndex:
+        index = self._index
+        if index is None or index.shape != index_shape(self):
+            index = self._index = EnvironmentIndex(self)
+        return index
+
+    def get_junction_graph(self) -> JunctionGraph:
+        graph = self._junction_graph
+        if graph is None or graph.shape != graph_shape(self.locations, self.junctions):
+            graph = self._junction_graph = JunctionGraph(self.locations, self.junctions)
+        return graph
+
+    def update_index(
+        self,
+        entity: Any,
+    ) -> None:
+        """Re-indexes an entity that was just put into, or changed in, one of the entity dicts"""
+        graph = self._junction_graph
+        if graph is not None and isinstance(entity, JunctionEntity | LocationEntity):
+            if isinstance(entity, JunctionEntity):
+                graph.update_junction(entity)
+            else:
+                graph.location_positions.setdefault(entity.uid, len(graph.location_positions))
+            graph.shape = graph_shape(self.locations, self.junctions)
+
+        index = self._index
+        if index is None:
+            return
+        if entity.uid not in index.positions:
+            for entities in (self.locations, self.junctions, self.actors, self.items):
+                if entity.uid in entities:
+                    index.positions[entity.uid] = len(entities) - 1
+        index.put(entity)
+        index.shape = index_shape(self)
+
+    def get_outcomes_of(
+        self,
+        action_ids: Iterable[str],
+    ) -> List[Outcome]:
+        """Outcomes of the actions, in the order they were recorded"""
+        outcomes = self.outcomes
+        # the indexed list itself is kept rather than its id, which a later list could reuse
+        indexed_list, indexed = self._indexed_outcomes
+        if indexed_list is not outcomes or indexed > len(outcomes):
+            self._outcomes_by_action_id, indexed = {}, 0
+        by_action_id = self._outcomes_by_action_id
+        for position in range(indexed, len(outcomes)):
+            by_action_id.setdefault(outcomes[position].action_id, []).append(position)
+        self._indexed_outcomes = (outcomes, len(outcomes))
+
+        positions = sorted(position for action_id in action_ids for position in by_action_id.get(action_id, ()))
+        return [outcomes[position] for position in positions]
+
+    def get_actors_at(
+        self,
+        location_ids: Iterable[str],
+    ) -> List[ActorEntity]:
+        index = self.get_index()
+        return [self.actors[uid] for uid in index.lookup(index.actors_by_location, location_ids)]
+
+    def get_junctions_at(
+        self,
+        location_ids: Iterable[str],
+    ) -> List[JunctionEntity]:
+        """Junctions with either side in one of the locations"""
+        index = self.get_index()
+        return [self.junctions[uid] for uid in index.lookup(index.junctions_by_location, location_ids)]
+
+    def get_items_held_by(
+        self,
+        holder_ids: Iterable[str],
+    ) -> List[ItemEntity]:
+        index = self.get_index()
+        return [self.items[uid] for uid in index.lookup(index.items_by_holder, holder_ids)]
+
+    def get_actors_within(
+        self,
+        location_id: str,
+        hops: int,
+        traversal: Traversal = Traversal.ANY,
+    ) -> List[ActorEntity]:
+        """Actors in locations at most hops away through junctions of the traversal"""
+        return self.get_actors_at(self.get_junction_graph().within(location_id, hops, traversal))
+
+    def get_listeners(
+        self,
+        location_id: str,
+        hops: int = 1,
+    ) -> List[ActorEntity]:
+        """Actors who can hear something happening in the location, when its sound carries through at most hops junctions"""
+        return self.get_actors_within(location_id, hops, Traversal.AUDIBLE)
+
     def get_actor_surroundings(self, actor_id: str):
-        target_actor = self.actors[actor_id]
-        location = self.locations[target_actor.location_id]
-        junctions = {junction.uid: junction for junction in self.junctions.values() if location.uid in [junction.from_location_id, junction.to_location_id]}
-        actors = {actor.uid: actor for actor in self.actors.values() if actor.location_id == location.uid}
-        items = {item.uid: item for item in self.items.values() if item.holder_id in actors.keys() or item.holder_id == location.uid or item.holder_id == actor_id}
+        return self.get_group_surroundings([actor_id])
+
+    def get_group_surroundings(self, actor_ids: List[str]):
+        """What the actors perceive: their own locations, adjacent locations seen through see-through junctions, the actors in
+        all of those, the items they can reach, and the actions (with outcomes) that happened where they could see them.
+        With a compacted history, older actions are replaced by the synopses of the actors and their visible locations."""
+        actor_location_ids = {self.actors[actor_id].location_id for actor_id in actor_ids}
+        junctions = {junction.uid: junction for junction in self.get_junctions_at(actor_location_ids)}
+
+        visible_location_ids = set(actor_location_ids)
+        for junction in junctions.values():
+            if is_see_through(junction):
+                visible_location_ids.update([junction.from_location_id, junction.to_location_id])
+
+        # own locations first, so prompts can rely on the first locations being where the actors are
+        positions = self.get_index().positions
+        location_ids = sorted((location_id for location_id in actor_location_ids if location_id in self.locations), key=positions.__getitem__)
+        location_ids += sorted((location_id for location_id in visible_location_ids - actor_location_ids if location_id in self.locations), key=positions.__getitem__)
+        actors = {actor.uid: actor for actor in self.get_actors_at(visible_location_ids)}
+        reaching_ids = {actor.uid for actor in actors.values() if actor.location_id in actor_location_ids} | actor_location_ids
+        items = {item.uid: item for item in self.get_items_held_by(reaching_ids)}
+
+        scan_start = self.history.scan_start if self.history is not None else 0
+        actions = [
+            action for index, action in enumerate(self.actions[scan_start:], scan_start)
+            if (action.location_id in visible_location_ids or action.source_actor_id in actor_ids or action.target_entity_id in actor_ids)
+            and (self.history is None or not self.history.is_folded(index, action))
+        ]
+        action_ids = {action.uid for action in actions}
+
+        history = None
+        if self.history is not None:
+            history = EpisodeHistory(
+                keep_last=self.history.keep_last,
+                actor_synopses={actor_id: self.history.actor_synopses[actor_id] for actor_id in actor_ids if actor_id in self.history.actor_synopses},
+                location_synopses={location_id: self.history.location_synopses[location_id] for location_id in location_ids if location_id in self.history.location_synopses},
+            )
 
         return Environment(
             landmark=self.landmark,
-            locations={location.uid: location},
+            locations={location_id: self.locations[location_id] for location_id in location_ids},
             junctions=junctions,
             actors=actors,
             items=items,
-            actions=self.actions, # TODO: filter down
-            outcomes=self.outcomes, # TODO: filter down
+            actions=actions,
+            outcomes=self.get_outcomes_of(action_ids),
+            history=history,
         )
     
     def get_actor_targeting_actions(self, actor_id: str) -> List[Action]:
         return [action for action in self.actions if action.target_entity_id == actor_id]
     
     def get_held_items(self) -> List[ItemEntity]:
-        return [item for item in self.items.values() if item.holder_id not in self.locations.keys()]
+        index = self.get_index()
+        return self.get_items_held_by(holder_id for holder_id in index.items_by_holder if holder_id not in self.locations)
     
     def get_dropped_items(self) -> List[ItemEntity]:
-        return [item for item in self.items.values() if item.holder_id in self.locations.keys()]
+        index = self.get_index()
+        return self.get_items_held_by(holder_id for holder_id in index.items_by_holder if holder_id in self.locations)
     
     def get_observable_actors(self) -> List[ObservableActorEntity]:
         return [actor.get_observable() for actor in self.actors.values()]
+
+    def get_history_synopses(self) -> List[HistorySynopsis]:
+        """Actor synopses, then location synopses. Empty until a compactor has folded something."""
+        if self.history is None:
+            return []
+        return list(self.history.actor_synopses.values()) + list(self.history.location_synopses.values())
     
-class Episode(Environment):
+"""the fields holding entities by uid, and the append-only history lists"""
+ENTITY_POOLS = ("locations", "junctions", "actors", "items")
+HISTORY_POOLS = ("actions", "outcomes")
+
+
+class ForkConflictError(ValueError):
+    """Raised when a fork is merged into an episode that changed the fork's entities or extended its history since forking"""
     pass
+
+
+class Episode(Environment):
+    """An environment whose entities are changed over a run.
+
+    fork() gives a what-if copy in constant time. The fork shares the entity dicts and history lists, and an episode
+    copies a dict or list only when it first writes to it while it is shared, so forks and the episode they came from
+    never see each other's changes. Entities themselves are never copied: updates replace them rather than change them.
+    Writes must go through put_entity (as apply_entity_update does), add_actions, and add_outcomes for this to hold.
+    A fork ends with merge(), which applies its changes to the episode it came from, or discard(). Forks can be
+    forked in turn. A fork dropped without either still counts as holding its pools, which only costs the other
+    holders a copy on their next write.
+    """
+
+    """id of a pool -> how many open episodes hold it, shared by an episode and all its forks, nested ones included.
+    A pool missing from it is held by its episode alone."""
+    _holders: Dict[int, int] = PrivateAttr(default_factory=dict)
+
+    """for a fork: the episode it came from, and pool -> uid -> entity it replaced (None for new entities)"""
+    _parent: "Episode | None" = PrivateAttr(default=None)
+    _replaced: Dict[str, Dict[str, Any]] = PrivateAttr(default_factory=dict)
+    _forked_history: Tuple[int, int] = PrivateAttr(default=(0, 0))
+
+    """set once a fork is merged or discarded"""
+    _closed: bool = PrivateAttr(default=False)
+
+    def fork(self) -> "Episode":
+        """A copy of the episode to try changes on, sharing everything until either side writes.
+        History synopses are deep copied, as compaction changes them in place."""
+        self._require_open()
+        fork = Episode.model_construct(**{
+            **{name: getattr(self, name) for name in type(self).model_fields},
+            "history": self.history.model_copy(deep=True) if self.history is not None else None,
+        })
+        fork._holders = self._holders
+        fork._parent = self
+        fork._forked_history = (len(self.actions), len(self.outcomes))
+        for pool in (*ENTITY_POOLS, *HISTORY_POOLS):
+            key = id(getattr(self, pool))
+            self._holders[key] = self._holders.get(key, 1) + 1
+        return fork
+
+    def merge(self) -> None:
+        """Applies the fork's entity changes and new actions and outcomes to the episode it came from, and closes the fork.
+
+        Raises ForkConflictError, leaving both episodes unchanged, if the parent replaced any entity the fork changed
+        or gained actions or outcomes since the fork.
+        """
+        parent = self._require_parent()
+        parent._require_open()
+        if (len(parent.actions), len(parent.outcomes)) != self._forked_history:
+            raise ForkConflictError("the episode's history moved on since the fork")
+        for pool, replaced in self._replaced.items():
+            entities = getattr(parent, pool)
+            changed = [uid for uid, entity in replaced.items() if entities.get(uid) is not entity]
+            if changed:
+                raise ForkConflictError(f"the episode changed {', '.join(sorted(changed))} since the fork")
+
+        for pool, replaced in self._replaced.items():
+            entities = getattr(self, pool)
+            for uid in replaced:
+                parent.put_entity(pool, entities[uid])
+        actions_from, outcomes_from = self._forked_history
+        parent.add_actions(self.actions[actions_from:])
+        parent.add_outcomes(self.outcomes[outcomes_from:])
+        parent.history = self.history
+        self._close()
+
+    def discard(self) -> None:
+        """Closes the fork without applying its changes"""
+        self._require_parent()
+        self._close()
+
+    def put_entity(
+        self,
+        pool: str,
+        entity: Any,
+    ) -> None:
+        """Puts an entity into one of the entity pools by uid, keeping lookups current"""
+        entities = self.writable(pool)
+        if self._parent is not None:
+            self._replaced.setdefault(pool, {}).setdefault(entity.uid, entities.get(entity.uid))
+        entities[entity.uid] = entity
+        self.update_index(entity)
+
+    def add_actions(
+        self,
+        actions: Sequence[Action],
+    ) -> None:
+        if actions:
+            self.writable("actions").extend(actions)
+
+    def add_outcomes(
+        self,
+        outcomes: Sequence[Outcome],
+    ) -> None:
+        if outcomes:
+            self.writable("outcomes").extend(outcomes)
+
+    def writable(
+        self,
+        pool: str,
+    ) -> Any:
+        """The pool's dict or list, copied first if another open episode holds it too.
+        The copy is shallow: it shares the entities, actions, and outcomes themselves."""
+        self._require_open()
+        entities = getattr(self, pool)
+        if self._holders.get(id(entities), 1) > 1:
+            self._release(entities)
+            entities = copy(entities)
+            setattr(self, pool, entities)
+        return entities
+
+    def _require_open(self) -> None:
+        if self._closed:
+            raise ValueError("the fork was merged or discarded, so it can't be changed or forked")
+
+    def _require_parent(self) -> "Episode":
+        self._require_open()
+        if self._parent is None:
+            raise ValueError("only a fork can be merged or discarded")
+        return self._parent
+
+    def _release(
+        self,
+        pool: Any,
+    ) -> None:
+        """Stops counting this episode as a holder of the pool"""
+        key = id(pool)
+        holders = self._holders.get(key, 1) - 1
+        if holders > 1:
+            self._holders[key] = holders
+        else:
+            self._holders.pop(key, None)
+
+    def _close(self) -> None:
+        for pool in (*ENTITY_POOLS, *HISTORY_POOLS):
+            self._release(getattr(self, pool))
+        self._closed = True
+        self._parent = None
+
     
\ No newline at end of file
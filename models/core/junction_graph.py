@@ -0,0 +1,255 @@
+from __future__ import annotations
+
+from collections import deque
+from enum import StrEnum
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from models.core.entities import JunctionEntity, LocationEntity
+from models.core.enums import JunctionAccessibility, JunctionCondition
+
+
+def is_passable(junction: JunctionEntity) -> bool:
+    return junction.accessibility == JunctionAccessibility.OPEN or junction.condition == JunctionCondition.DESTROYED
+
+
+def is_see_through(junction: JunctionEntity) -> bool:
+    """An open junction, or one damaged enough to see through, lets actors perceive the location on its other side"""
+    return junction.accessibility == JunctionAccessibility.OPEN or junction.condition in [JunctionCondition.DAMAGED, JunctionCondition.DESTROYED]
+
+
+def is_audible_through(junction: JunctionEntity) -> bool:
+    """Sound carries through closed, locked, and barricaded junctions. Only an intact blockage stops it"""
+    return junction.accessibility != JunctionAccessibility.BLOCKED or junction.condition in [JunctionCondition.DAMAGED, JunctionCondition.DESTROYED]
+
+
+class Traversal(StrEnum):
+    """Which junctions connect locations, by what is crossing them"""
+
+    """every junction, for zombies that batter through closed ones and for anything that could happen within a turn"""
+    ANY = "ANY"
+    """junctions an actor can walk through"""
+    PASSABLE = "PASSABLE"
+    """junctions an actor can see through"""
+    SEE_THROUGH = "SEE_THROUGH"
+    """junctions sound carries through"""
+    AUDIBLE = "AUDIBLE"
+
+
+TRAVERSABLE: Dict[Traversal, Callable[[JunctionEntity], bool]] = {
+    Traversal.ANY: lambda junction: True,
+    Traversal.PASSABLE: is_passable,
+    Traversal.SEE_THROUGH: is_see_through,
+    Traversal.AUDIBLE: is_audible_through,
+}
+
+
+class JunctionGraph:
+    """The landmark's locations as a graph, with a layer of edges per Traversal.
+
+    Hop distances are kept per source location, computed by a breadth first search the first time a source is
+    queried, or for every source by precompute. When a junction changes, update_junction repairs the cached
+    distances instead of recomputing them: a new edge only shortens distances, so they are relaxed outwards from
+    it, and a removed edge only invalidates the sources it was on a shortest path for.
+    Locations are listed in the order of the environment's locations dict, and exits in the order of its junctions dict.
+    """
+
+    def __init__(
+        self,
+        locations: Dict[str, LocationEntity],
+        junctions: Dict[str, JunctionEntity],
+    ) -> None:
+        self.location_positions = {uid: position for position, uid in enumerate(locations)}
+        self.junction_positions = {uid: position for position, uid in enumerate(junctions)}
+        self.junction_ends: Dict[str, Tuple[str, str]] = {}
+
+        # traversal -> location -> exits, as junction uid -> location on the other side
+        self.exits: Dict[Traversal, Dict[str, Dict[str, str]]] = {traversal: {uid: {} for uid in locations} for traversal in Traversal}
+
+        # traversal -> source location -> location -> hops, for the sources computed so far
+        self.distances: Dict[Traversal, Dict[str, Dict[str, int]]] = {traversal: {} for traversal in Traversal}
+        self._rings: Dict[Traversal, Dict[str, List[List[str]]]] = {traversal: {} for traversal in Traversal}
+        self.shape = graph_shape(locations, junctions)
+
+        for junction in junctions.values():
+            self.junction_ends[junction.uid] = (junction.from_location_id, junction.to_location_id)
+            for traversal, traversable in TRAVERSABLE.items():
+                if traversable(junction):
+                    self._link(traversal, junction.uid, junction.from_location_id, junction.to_location_id)
+
+    def precompute(
+        self,
+        traversals: Iterable[Traversal] = tuple(Traversal),
+    ) -> None:
+        """Computes the distances from every location, so no later query has to"""
+        for traversal in traversals:
+            for location_id in self.location_positions:
+                self.within(location_id, 0, traversal)
+
+    def get_distances(
+        self,
+        location_id: str,
+        traversal: Traversal = Traversal.ANY,
+    ) -> Dict[str, int]:
+        """Hops from the location to every location reachable from it"""
+        distances = self.distances[traversal].get(location_id)
+        if distances is None:
+            distances = self.distances[traversal][location_id] = {location_id: 0}
+            self._relax(traversal, distances, [location_id])
+        return distances
+
+    def distance(
+        self,
+        from_location_id: str,
+        to_location_id: str,
+        traversal: Traversal = Traversal.ANY,
+    ) -> int | None:
+        """Hops between two locations, or None when no path connects them"""
+        return self.get_distances(from_location_id, traversal).get(to_location_id)
+
+    def within(
+        self,
+        location_id: str,
+        hops: int,
+        traversal: Traversal = Traversal.ANY,
+    ) -> Dict[str, int]:
+        """Locations reachable in at most hops, nearest first, with their distances"""
+        rings = self._rings[traversal].get(location_id)
+        if rings is None:
+            rings = []
+            for uid, distance in self.get_distances(location_id, traversal).items():
+                while len(rings) <= distance:
+                    rings.append([])
+                rings[distance].append(uid)
+            for ring in rings:
+                ring.sort(key=self.location_positions.__getitem__)
+            self._rings[traversal][location_id] = rings
+        return {uid: distance for distance, ring in enumerate(rings[:hops + 1]) for uid in ring}
+
+    def get_exits(
+        self,
+        location_id: str,
+        traversal: Traversal = Traversal.ANY,
+    ) -> Dict[str, str]:
+        """The location's junctions in this traversal, mapped to the location on their other side"""
+        return self.exits[traversal].get(location_id, {})
+
+    def shortest_path(
+        self,
+        from_location_id: str,
+        to_location_id: str,
+        traversal: Traversal = Traversal.ANY,
+    ) -> List[str] | None:
+        """The junction uids crossed on a shortest path, or None when no path connects the locations.
+        Ties go to the junction that comes first in the junctions dict."""
+        # the graph is undirected, so distances to the destination are distances from it
+        remaining = self.get_distances(to_location_id, traversal)
+        if from_location_id not in remaining:
+            return None
+        path = []
+        location_id = from_location_id
+        while location_id != to_location_id:
+            junction_id, location_id = next(
+                (junction_id, next_id) for junction_id, next_id in self.get_exits(location_id, traversal).items()
+                if remaining.get(next_id) == remaining[location_id] - 1
+            )
+            path.append(junction_id)
+        return path
+
+    def update_junction(
+        self,
+        junction: JunctionEntity,
+    ) -> None:
+        """Re-links a junction whose state or endpoints changed, or that was just added, and repairs the distances"""
+        previous_ends = self.junction_ends.get(junction.uid)
+        ends = (junction.from_location_id, junction.to_location_id)
+        if junction.uid not in self.junction_positions:
+            self.junction_positions[junction.uid] = len(self.junction_positions)
+        self.junction_ends[junction.uid] = ends
+        for location_id in ends:
+            if location_id not in self.location_positions:
+                self.location_positions[location_id] = len(self.location_positions)
+
+        for traversal, traversable in TRAVERSABLE.items():
+            linked = previous_ends is not None and junction.uid in self.exits[traversal].get(previous_ends[0], {})
+            if linked and (ends != previous_ends or not traversable(junction)):
+                self._unlink(traversal, junction.uid, *previous_ends)
+                linked = False
+            if not linked and traversable(junction):
+                self._link(traversal, junction.uid, *ends)
+                self._connect(traversal, *ends)
+
+    def _link(
+        self,
+        traversal: Traversal,
+        junction_id: str,
+        from_location_id: str,
+        to_location_id: str,
+    ) -> None:
+        exits = self.exits[traversal]
+        for location_id, next_id in [(from_location_id, to_location_id), (to_location_id, from_location_id)]:
+            location_exits = exits.setdefault(location_id, {})
+            location_exits[junction_id] = next_id
+            if len(location_exits) > 1:
+                exits[location_id] = dict(sorted(location_exits.items(), key=lambda exit: self.junction_positions[exit[0]]))
+
+    def _unlink(
+        self,
+        traversal: Traversal,
+        junction_id: str,
+        from_location_id: str,
+        to_location_id: str,
+    ) -> None:
+        exits = self.exits[traversal]
+        exits[from_location_id].pop(junction_id, None)
+        exits[to_location_id].pop(junction_id, None)
+        if to_location_id in exits[from_location_id].values():
+            return # a parallel junction still connects the locations
+        stale = [
+            source for source, distances in self.distances[traversal].items()
+            if from_location_id in distances and abs(distances[from_location_id] - distances.get(to_location_id, -2)) == 1
+        ]
+        for source in stale:
+            del self.distances[traversal][source]
+            self._rings[traversal].pop(source, None)
+
+    def _connect(
+        self,
+        traversal: Traversal,
+        from_location_id: str,
+        to_location_id: str,
+    ) -> None:
+        """Shortens the cached distances that a new edge between the locations provides a shortcut for"""
+        for source, distances in self.distances[traversal].items():
+            changed = []
+            for location_id, next_id in [(from_location_id, to_location_id), (to_location_id, from_location_id)]:
+                if location_id in distances and distances[location_id] + 1 < distances.get(next_id, distances[location_id] + 2):
+                    distances[next_id] = distances[location_id] + 1
+                    changed.append(next_id)
+            if changed:
+                self._relax(traversal, distances, changed)
+                self._rings[traversal].pop(source, None)
+
+    def _relax(
+        self,
+        traversal: Traversal,
+        distances: Dict[str, int],
+        starts: List[str],
+    ) -> None:
+        """Breadth first from the start locations, lowering any distance it finds a shorter path to"""
+        exits = self.exits[traversal]
+        frontier = deque(starts)
+        while frontier:
+            location_id = frontier.popleft()
+            hops = distances[location_id] + 1
+            for next_id in exits.get(location_id, {}).values():
+                if hops < distances.get(next_id, hops + 1):
+                    distances[next_id] = hops
+                    frontier.append(next_id)
+
+
+def graph_shape(
+    locations: Dict[str, LocationEntity],
+    junctions: Dict[str, JunctionEntity],
+) -> Tuple[int, ...]:
+    """Changes whenever locations or junctions are added or removed, or their dicts are replaced"""
+    return (id(locations), len(locations), id(junctions), len(junctions))
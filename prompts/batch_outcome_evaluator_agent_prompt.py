@@ -0,0 +1,129 @@
+from typing import List, Type
+from toon import encode_pydantic
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+from pydantic import BaseModel
+
+from models.core.actions import Action
+from models.core.episode import Environment, Episode
+from prompts.outcome_evaluator_agent_prompt import OutcomeEvaluatorAgentPrompt
+from prompts.prompt_generations import (BatchOutcomeEvaluationGeneration, BatchOutcomePatchEvaluationGeneration,
+                                        FastBatchOutcomeEvaluationGeneration, FastBatchOutcomePatchEvaluationGeneration)
+from prompts.context_packer import pack_context
+from prompts.toon_encoding import encode_entities
+
+class BatchOutcomeEvaluatorAgentPrompt:
+
+    GENERATED_TYPE = BatchOutcomeEvaluationGeneration
+
+    BATCH_RULES = """
+        You are evaluating the actions of several characters at once.
+        The actions are listed in the order they resolve. Later actions happen after, and are affected by, the outcomes of earlier ones.
+        Generate at most one outcome per action and set each outcome's action_id to the uid of the action it resolves.
+        """
+
+    """extends the single evaluator's prefix, so single and batch evaluations share a cacheable prefix"""
+    STATIC_PREFIX = OutcomeEvaluatorAgentPrompt.STATIC_PREFIX + BATCH_RULES
+
+    PATCH_STATIC_PREFIX = OutcomeEvaluatorAgentPrompt.PATCH_STATIC_PREFIX + BATCH_RULES
+    PATCH_GENERATED_TYPE = BatchOutcomePatchEvaluationGeneration
+
+    INSTRUCTIONS = """Read the actions in order - What happened? Provide a short, one sentence synopsis.
+        Apply character states - Adjust outcomes based on each acting character's health/arousal/control
+        Adjust outcomes based on use of weapons and tools
+        Account for earlier outcomes - An action may fail or change because of an action that resolved before it.
+        Finally, calculate each action's success chance and generate its outcome."""
+
+    FAST_INSTRUCTIONS = """Apply character states - Adjust outcomes based on each acting character's health/arousal/control
+        Adjust outcomes based on use of weapons and tools
+        Account for earlier outcomes - An action may fail or change because of an action that resolved before it.
+        Do not write a synopsis. Calculate each action's success chance and generate its outcome directly."""
+    FAST_GENERATED_TYPE = FastBatchOutcomeEvaluationGeneration
+    FAST_PATCH_GENERATED_TYPE = FastBatchOutcomePatchEvaluationGeneration
+
+    def generated_type(
+        patches: bool = False,
+        fast: bool = False,
+    ) -> Type[BaseModel]:
+        if fast:
+            return BatchOutcomeEvaluatorAgentPrompt.FAST_PATCH_GENERATED_TYPE if patches else BatchOutcomeEvaluatorAgentPrompt.FAST_GENERATED_TYPE
+        return BatchOutcomeEvaluatorAgentPrompt.PATCH_GENERATED_TYPE if patches else BatchOutcomeEvaluatorAgentPrompt.GENERATED_TYPE
+
+    def build_prompt_messages(
+        episode: Episode,
+        actions: List[Action],
+        patches: bool = False,
+        fast: bool = False,
+        token_budget: int | None = None,
+    ) -> List[BaseMessage]:
+        """Builds one evaluation prompt for actions from several actors, listed in the order they resolve.
+        With patches, state changes are asked for as patches, generating PATCH_GENERATED_TYPE.
+        With fast, the synopsis is skipped and the prompt generates one of the FAST_ types.
+        With token_budget, the surroundings are packed into roughly that many prompt tokens, keeping the acting
+        characters and the actions' targets first."""
+
+
+        WORKING_CONTEXT = """
+        Acting Characters:
+            {characters_info}
+
+        Actions:
+            {actions}
+
+        Environment:
+            Current Landmark:    
+                {landmark_name}
+
+            Locations (within landmark):
+                {location_info}
+
+            Junctions:
+                {junctions_info}
+
+            Actors:
+                {actors_info}
+
+            Items:
+                Held by actors: 
+                    {held_items_info}
+                Laying out: 
+                    {dropped_items_info}
+        
+        Critical Instructions
+
+        {instructions}
+        """
+
+        actor_ids = list(dict.fromkeys(action.source_actor_id for action in actions))
+        actors = [episode.actors[actor_id] for actor_id in actor_ids]
+        env: Environment = episode.get_group_surroundings(actor_ids)
+        instructions = BatchOutcomeEvaluatorAgentPrompt.FAST_INSTRUCTIONS if fast else BatchOutcomeEvaluatorAgentPrompt.INSTRUCTIONS
+        static_prefix = BatchOutcomeEvaluatorAgentPrompt.PATCH_STATIC_PREFIX if patches else BatchOutcomeEvaluatorAgentPrompt.STATIC_PREFIX
+        user_prompt = "Generate outcomes for the actions, in order."
+        characters_info = encode_pydantic(actors)
+        actions_info = encode_pydantic(actions)
+        context = pack_context(
+            env,
+            actor_ids,
+            static_prefix + WORKING_CONTEXT + instructions + characters_info + actions_info + user_prompt,
+            token_budget,
+            target_ids=[action.target_entity_id for action in actions],
+            observable=False,
+        )
+
+        working_context = WORKING_CONTEXT.format(
+            characters_info = characters_info,
+            actions = actions_info,
+            landmark_name = env.landmark.name,
+            location_info = encode_entities(context.locations),
+            junctions_info = encode_entities(context.junctions),
+            actors_info = encode_pydantic(context.actors),
+            held_items_info = encode_entities(context.held_items),
+            dropped_items_info = encode_entities(context.dropped_items),
+            instructions = instructions,
+        )
+
+        return [
+            SystemMessage(static_prefix),
+            SystemMessage(working_context),
+            HumanMessage(user_prompt)
+        ]
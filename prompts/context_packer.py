@@ -0,0 +1,142 @@
+from enum import IntEnum
+from typing import Dict, Iterable, List, Tuple
+
+from pydantic import BaseModel
+
+from llm.token_counting import estimate_tokens
+from models.core.actions import Action
+from models.core.entities import ItemEntity, JunctionEntity, LocationEntity, ObservableActorEntity
+from models.core.episode import Environment, HistorySynopsis
+from prompts.toon_encoding import encoded_row
+
+"""estimated tokens of a non-empty list's [N]{fields}: header"""
+SECTION_HEADER_TOKENS = 20
+
+
+class ContextPriority(IntEnum):
+    """What a prompt keeps first when its context has to be cut, most important first.
+    OWN_CHARACTER entries, the acting actors and their locations and inventories, are always kept, as are the
+    entities targeted by the actions being evaluated."""
+    OWN_CHARACTER = 0
+    CO_LOCATED_THREAT = 1
+    CO_LOCATED = 2
+    JUNCTION = 3
+    RECENT_ACTION = 4
+    DISTANT = 5
+    DISTANT_ITEM = 6
+    OLD_HISTORY = 7
+
+
+class PromptBudgets(BaseModel):
+    """Estimated token budget of each agent prompt. None leaves the prompt unpacked, with its full surroundings"""
+
+    survivor: int | None = None
+    zombie: int | None = None
+    horde: int | None = None
+
+    """single and batch outcome evaluator prompts"""
+    evaluator: int | None = None
+
+
+class PackedContext(BaseModel):
+    """The surroundings that fit a prompt's budget, each section in its original order"""
+
+    locations: List[LocationEntity] = []
+    junctions: List[JunctionEntity] = []
+    actors: List[ObservableActorEntity] = []
+    held_items: List[ItemEntity] = []
+    dropped_items: List[ItemEntity] = []
+    actions: List[Action] = []
+    synopses: List[HistorySynopsis] = []
+
+    """estimated tokens of the context left out"""
+    dropped_tokens: int = 0
+
+
+def pack_context(
+    env: Environment,
+    actor_ids: List[str],
+    fixed_text: str,
+    token_budget: int | None,
+    include_items: bool = True,
+    target_ids: Iterable[str] = (),
+    observable: bool = True,
+) -> PackedContext:
+    """Ranks the acting actors' surroundings and greedily keeps the highest priority entries that fit the budget.
+
+    fixed_text is everything in the prompt that is always sent, whose estimated tokens are spent first. Entries
+    that don't fit are skipped, so a smaller, lower priority entry can still use up what is left.
+    target_ids are entities the prompt's actions target, kept along with the acting actors.
+    observable: when False, actors are kept as full entities with their internal state, as evaluators see them.
+    """
+    sections = _ranked_sections(env, actor_ids, include_items, set(target_ids), observable)
+    if token_budget is None:
+        return PackedContext(**{section: [item for _, _, item in entries] for section, entries in sections.items()})
+
+    candidates = sorted(
+        (priority, rank, section, position, item)
+        for section, entries in sections.items()
+        for position, (priority, rank, item) in enumerate(entries)
+    )
+    remaining = token_budget - estimate_tokens(fixed_text)
+    kept: Dict[str, List[Tuple[int, BaseModel]]] = {section: [] for section in sections}
+    dropped_tokens = 0
+    for priority, _, section, position, item in candidates:
+        cost = estimate_tokens(encoded_row(item)) + (0 if kept[section] else SECTION_HEADER_TOKENS)
+        if priority == ContextPriority.OWN_CHARACTER or cost <= remaining:
+            kept[section].append((position, item))
+            remaining -= cost
+        else:
+            dropped_tokens += cost
+
+    return PackedContext(
+        **{section: [item for _, item in sorted(entries, key=lambda entry: entry[0])] for section, entries in kept.items()},
+        dropped_tokens=dropped_tokens,
+    )
+
+
+def _ranked_sections(
+    env: Environment,
+    actor_ids: List[str],
+    include_items: bool,
+    target_ids: set[str],
+    observable: bool,
+) -> Dict[str, List[Tuple[ContextPriority, int, BaseModel]]]:
+    """Every section's entries in prompt order, as (priority, rank within the priority, entry)"""
+    acting = [env.actors[actor_id] for actor_id in actor_ids if actor_id in env.actors]
+    acting_types = {actor.type for actor in acting}
+    here = {actor.location_id for actor in acting}
+
+    def actor_priority(actor: ObservableActorEntity) -> ContextPriority:
+        if actor.uid in actor_ids or actor.uid in target_ids:
+            return ContextPriority.OWN_CHARACTER
+        if actor.location_id not in here:
+            return ContextPriority.DISTANT
+        return ContextPriority.CO_LOCATED if actor.type in acting_types else ContextPriority.CO_LOCATED_THREAT
+
+    def item_priority(item: ItemEntity) -> ContextPriority:
+        if item.holder_id in actor_ids or item.uid in target_ids:
+            return ContextPriority.OWN_CHARACTER
+        return ContextPriority.CO_LOCATED if item.holder_id in here else ContextPriority.DISTANT_ITEM
+
+    sections: Dict[str, List[Tuple[ContextPriority, int, BaseModel]]] = {
+        "locations": [
+            (ContextPriority.OWN_CHARACTER if location.uid in here or location.uid in target_ids else ContextPriority.DISTANT, 0, location)
+            for location in env.locations.values()
+        ],
+        "junctions": [
+            (ContextPriority.OWN_CHARACTER if junction.uid in target_ids else ContextPriority.JUNCTION, 0, junction)
+            for junction in env.junctions.values()
+        ],
+        "actors": [
+            (actor_priority(actor), 0, actor)
+            for actor in (env.get_observable_actors() if observable else env.actors.values())
+        ],
+        # newest first within the priority
+        "actions": [(ContextPriority.RECENT_ACTION, -i, action) for i, action in enumerate(env.actions)],
+        "synopses": [(ContextPriority.OLD_HISTORY, i, synopsis) for i, synopsis in enumerate(env.get_history_synopses())],
+    }
+    if include_items:
+        sections["held_items"] = [(item_priority(item), 0, item) for item in env.get_held_items()]
+        sections["dropped_items"] = [(item_priority(item), 0, item) for item in env.get_dropped_items()]
+    return sections
@@ -0,0 +1,59 @@
+from typing import List
+from toon import encode_pydantic
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+
+from models.core.actions import Action, Outcome
+from models.core.episode import HistorySynopsis
+from prompts.prompt_generations import HistorySynopsisGeneration
+
+class HistorySynopsisAgentPrompt:
+
+    GENERATED_TYPE = HistorySynopsisGeneration
+
+    STATIC_PREFIX = """
+        You are an AI agent keeping the record of a collaborative narrative simulation.
+        Older actions are folded out of the characters' prompts and only a short synopsis of them is kept, one per character and one per location.
+        Your role is to extend a synopsis with the actions that are being folded into it.
+
+        Rules:
+            Keep what still matters to the story: injuries, deaths, items gained or lost, doors opened or barricaded, threats found, goals reached.
+            Drop repeated or inconsequential actions.
+            Later events take precedence over earlier ones when they conflict.
+            Write in the past tense and never invent events that are not in the previous synopsis or the new actions.
+            Keep the synopsis to at most four sentences, however long the history gets.
+        """
+
+    def build_prompt_messages(
+        subject_name: str,
+        synopsis: HistorySynopsis,
+        actions: List[Action],
+        outcomes: List[Outcome],
+    ) -> List[BaseMessage]:
+        """Builds a prompt that extends subject's synopsis with newly folded actions, given oldest first"""
+
+        WORKING_CONTEXT = """
+        Subject:
+            {subject_name}
+
+        Previous synopsis:
+            {previous_synopsis}
+
+        New actions:
+            {actions_info}
+
+        Their outcomes:
+            {outcomes_info}
+        """
+
+        working_context = WORKING_CONTEXT.format(
+            subject_name = subject_name,
+            previous_synopsis = synopsis.synopsis or "(none yet)",
+            actions_info = encode_pydantic(actions),
+            outcomes_info = encode_pydantic(outcomes),
+        )
+
+        return [
+            SystemMessage(HistorySynopsisAgentPrompt.STATIC_PREFIX),
+            SystemMessage(working_context),
+            HumanMessage("Extend the synopsis with the new actions.")
+        ]
@@ -1,22 +1,21 @@
 
-from typing import List
+from typing import List, Type
 from toon import encode_pydantic
 from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+from pydantic import BaseModel
 
 from models.core.actions import Action
 from models.core.episode import Environment, Episode
-from prompts.prompt_generations import OutcomeEvaluationGeneration
+from prompts.context_packer import pack_context
+from prompts.prompt_generations import (FastOutcomeEvaluationGeneration, FastOutcomePatchEvaluationGeneration,
+                                        OutcomeEvaluationGeneration, OutcomePatchEvaluationGeneration)
+from prompts.toon_encoding import encode_entities
 
 class OutcomeEvaluatorAgentPrompt:
 
     GENERATED_TYPE = OutcomeEvaluationGeneration
 
-    def build_prompt_messages(
-        episode: Episode, 
-        actions: List[Action],
-    ) -> List[BaseMessage]:
-
-        PROMPT_HEADER = """
+    PROMPT_HEADER = """
         You are an AI outcome evaluator for a collaborative narrative simulation. 
         Your role is to determine realistic, story-advancing outcomes for character actions based on environmental factors, 
         character capabilities, and narrative momentum.
@@ -31,7 +30,7 @@ class OutcomeEvaluatorAgentPrompt:
         Update the target entity's state accodingly. Only change state fields when necessary. (Don't generate new facts unless the outcome meanigfully changes them.)
         """
 
-        SUCCESS_LEVELS = """
+    SUCCESS_LEVELS = """
         Evaluate each action's outcome using these levels:
             CRITICAL_SUCCESS: Action succeeds spectacularly with bonus benefits
                 Character gains advantage, discovers something valuable, or achieves more than intended
@@ -47,7 +46,7 @@ class OutcomeEvaluatorAgentPrompt:
                 Use sparingly (5-10% of actions in very unfavorable conditions)
         """
 
-        STATE_MODIFIERS = """
+    STATE_MODIFIERS = """
         The character's current state impacts the likelihood of success based on the action performed:
             Health Impact on Success:
                 - GOOD_HEALTH: +20% success chance, full capability
@@ -67,7 +66,7 @@ class OutcomeEvaluatorAgentPrompt:
                 SUBMISSIVE/IMMOBILIZED: Penalty to all proactive actions
         """
 
-        EXPECTED_OUTCOMES = """
+    EXPECTED_OUTCOMES = """
         Actions should have logical outcomes. Some examples:
             MOVE: source actor's location changes to the location on other side of the target junction
             INSPECT: no chance to states, but a separate system will add findings to character's knowledge
@@ -90,7 +89,7 @@ class OutcomeEvaluatorAgentPrompt:
                 if character has performed FREEZE their last fiew actions and they are in CRITICAL_HEALTH, they should become DEAD
         """
 
-        BASELINE_SUCCESS_RATES = """
+    BASELINE_SUCCESS_RATES = """
         Base Success Rates (before modifiers):
             MOVE: 70% (reduced if injured, increased with FOCUS)
                 Through OPEN junction: 100%
@@ -126,7 +125,7 @@ class OutcomeEvaluatorAgentPrompt:
             FREEZE: 100% (always succeeds at doing nothing)
         """
 
-        ENVIRONMENT_FACTORS = """
+    ENVIRONMENT_FACTORS = """
         The character's current environment impacts the likelihood of success based on the action performed
             Junction Accessibility:
                 OPEN: No penalty to MOVE
@@ -148,7 +147,7 @@ class OutcomeEvaluatorAgentPrompt:
                 BROKEN: Cannot be used
         """
 
-        FACT_GUIDELINES = """
+    FACT_GUIDELINES = """
         Outcome Fact Guidelines:
             Generate a fact per outcome.
 
@@ -179,13 +178,69 @@ class OutcomeEvaluatorAgentPrompt:
                 "The door is now permanently open" (absolute guarantee)
         """
 
-        GOAL_RULES = """
+    GOAL_RULES = """
         Outcome Rules:
             If the outcome results in a character's goal being achieved, update the character's goal accordingly:
                 - If an immediate goal is achieved, replace it with the next logical step towards achieving the episode goal
                 - If the episode goal is achieved, replace it with "Escape from this landmark."
         """
 
+    """everything that stays the same between evaluations, sent ahead of the working context"""
+    STATIC_PREFIX = (
+        PROMPT_HEADER
+        + SUCCESS_LEVELS
+        + STATE_MODIFIERS
+        + BASELINE_SUCCESS_RATES
+        + ENVIRONMENT_FACTORS
+        + FACT_GUIDELINES
+    )
+
+    PATCH_RULES = """
+        State Changes:
+            Report each entity an outcome changed as a patch: the entity's uid and only the fields that changed.
+            Only the action's source actor and its target entity can be patched. Leave patches empty when nothing changed.
+            Use exactly the values listed above for health, arousal, control, condition, and accessibility.
+            When an actor moves, patch their location_id. When an item changes hands, patch its holder_id.
+        """
+
+    """the patch-style evaluation's prefix, used with PATCH_GENERATED_TYPE"""
+    PATCH_STATIC_PREFIX = STATIC_PREFIX + PATCH_RULES
+    PATCH_GENERATED_TYPE = OutcomePatchEvaluationGeneration
+
+    INSTRUCTIONS = """Read the recent actions - What just happened? Provide a short, one sentence synopsis.
+        Apply character states - Adjust outcomes based on health/arousal/control
+        Adjust outcomes based on use of weapons and tools
+        Provide two, distinctly different plans, at most one sentence each.
+        Finally, select the more plausible and impactful plan, calculate it's success chance, and generate the outcome."""
+
+    """asks for the outcome directly, for the FAST_ generated types"""
+    FAST_INSTRUCTIONS = """Apply character states - Adjust outcomes based on health/arousal/control
+        Adjust outcomes based on use of weapons and tools
+        Do not write a synopsis or plans. Calculate each action's success chance and generate its outcome directly."""
+    FAST_GENERATED_TYPE = FastOutcomeEvaluationGeneration
+    FAST_PATCH_GENERATED_TYPE = FastOutcomePatchEvaluationGeneration
+
+    def generated_type(
+        patches: bool = False,
+        fast: bool = False,
+    ) -> Type[BaseModel]:
+        """The generation type of a prompt built with the same patches and fast arguments"""
+        if fast:
+            return OutcomeEvaluatorAgentPrompt.FAST_PATCH_GENERATED_TYPE if patches else OutcomeEvaluatorAgentPrompt.FAST_GENERATED_TYPE
+        return OutcomeEvaluatorAgentPrompt.PATCH_GENERATED_TYPE if patches else OutcomeEvaluatorAgentPrompt.GENERATED_TYPE
+
+    def build_prompt_messages(
+        episode: Episode, 
+        actions: List[Action],
+        patches: bool = False,
+        fast: bool = False,
+        token_budget: int | None = None,
+    ) -> List[BaseMessage]:
+        """patches: when True, the prompt asks for PATCH_GENERATED_TYPE, with state changes as patches instead of full entities
+        fast: when True, the prompt asks for a FAST_ generated type, without the synopsis and evaluation plans
+        token_budget: when set, the surroundings are packed into roughly that many prompt tokens, keeping the acting
+        character and the actions' targets first"""
+
         WORKING_CONTEXT = """
         Acting Character:
             {character_info}
@@ -214,34 +269,39 @@ class OutcomeEvaluatorAgentPrompt:
         
         Critical Instructions
 
-        Read the recent actions - What just happened? Provide a short, one sentence synopsis.
-        Apply character states - Adjust outcomes based on health/arousal/control
-        Adjust outcomes based on use of weapons and tools
-        Provide two, distinctly different plans, at most one sentence each.
-        Finally, select the more plausible and impactful plan, calculate it's success chance, and generate the outcome.
+        {instructions}
         """
 
         actor = episode.actors[actions[0].source_actor_id]
-        env: Environment = episode #.get_actor_surroundings(actor_id)
-
-        sys_prompt = PROMPT_HEADER
-        sys_prompt += SUCCESS_LEVELS
-        sys_prompt += STATE_MODIFIERS
-        sys_prompt += BASELINE_SUCCESS_RATES
-        sys_prompt += ENVIRONMENT_FACTORS
-        sys_prompt += FACT_GUIDELINES
-        sys_prompt += WORKING_CONTEXT.format(
-            character_info = encode_pydantic(actor),
-            actions = encode_pydantic(actions),
+        env: Environment = episode.get_actor_surroundings(actor.uid)
+        instructions = OutcomeEvaluatorAgentPrompt.FAST_INSTRUCTIONS if fast else OutcomeEvaluatorAgentPrompt.INSTRUCTIONS
+        static_prefix = OutcomeEvaluatorAgentPrompt.PATCH_STATIC_PREFIX if patches else OutcomeEvaluatorAgentPrompt.STATIC_PREFIX
+        user_prompt = "Generate outcomes for the actions."
+        character_info = encode_pydantic(actor)
+        actions_info = encode_pydantic(actions)
+        context = pack_context(
+            env,
+            [actor.uid],
+            static_prefix + WORKING_CONTEXT + instructions + character_info + actions_info + user_prompt,
+            token_budget,
+            target_ids=[action.target_entity_id for action in actions],
+            observable=False,
+        )
+
+        working_context = WORKING_CONTEXT.format(
+            character_info = character_info,
+            actions = actions_info,
             landmark_name = env.landmark.name,
-            location_info = encode_pydantic(env.locations[actor.location_id]),
-            junctions_info = encode_pydantic(list(env.junctions.values())),
-            actors_info = encode_pydantic(list(env.actors.values())),
-            held_items_info = encode_pydantic(env.get_held_items()),
-            dropped_items_info = encode_pydantic(env.get_dropped_items()),
+            location_info = encode_entities(context.locations),
+            junctions_info = encode_entities(context.junctions),
+            actors_info = encode_pydantic(context.actors),
+            held_items_info = encode_entities(context.held_items),
+            dropped_items_info = encode_entities(context.dropped_items),
+            instructions = instructions,
         )
 
         return [
-            SystemMessage(sys_prompt),
-            HumanMessage("Generate outcomes for the actions.")
+            SystemMessage(static_prefix),
+            SystemMessage(working_context),
+            HumanMessage(user_prompt)
         ]
\ No newline at end of file
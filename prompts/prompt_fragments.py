@@ -122,10 +122,7 @@ class PromptFragments:
         - TALK + FIGHT: ward off an attack while calling for help or shouting instructions
     """
 
-    ZOMBIE_ACTION_RULES = f"""
-    Generate exactly one action that represents your character's next actions in the story.
-    This action will be evaluated by a separate system to determine its outcome.
-
+    ZOMBIE_ACTION_TYPES = f"""
     {ACTION_PROPERTIES}
 
     Types of Actions:
@@ -141,6 +138,17 @@ class PromptFragments:
 
     """
 
+    ZOMBIE_ACTION_RULES = f"""
+    Generate exactly one action that represents your character's next actions in the story.
+    This action will be evaluated by a separate system to determine its outcome.
+{ZOMBIE_ACTION_TYPES}"""
+
+    ZOMBIE_HORDE_ACTION_RULES = f"""
+    Generate exactly one action for each zombie in your horde, representing that zombie's next actions in the story.
+    Each action's source_actor_id must be the zombie performing it.
+    These actions will be evaluated by a separate system to determine their outcomes.
+{ZOMBIE_ACTION_TYPES}"""
+
     STATE_AROUSAL = """
         Arousal Level:
             - INTENSE: Character takes aggressive, reckless actions
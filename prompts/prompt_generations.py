@@ -1,9 +1,23 @@
 
 
+from enum import StrEnum
 from typing import List
 from pydantic import BaseModel
 
-from models.core.actions import Action, Outcome
+from models.core.actions import Action, Outcome, OutcomeDelta
+
+
+class GenerationProfile(StrEnum):
+    """FULL generations reason through a synopsis and plans before deciding. FAST generations only decide."""
+    FULL = "FULL"
+    FAST = "FAST"
+
+class GenerationProfiles(BaseModel):
+    """The generation profile of each agent. The zombie profile covers hordes, and the evaluator's covers batch evaluations"""
+
+    survivor: GenerationProfile = GenerationProfile.FULL
+    zombie: GenerationProfile = GenerationProfile.FULL
+    evaluator: GenerationProfile = GenerationProfile.FULL
 
 
 class ActorPlanGeneration(BaseModel):
@@ -28,6 +42,16 @@ class ZombieActionGeneration(ActorPlanGeneration):
     """The decided upon action. Zombies should generate EXACTLY one action"""
     action: Action
 
+class FastSurvivorActionGeneration(BaseModel):
+
+    """The decided upon actions. Survivors should generate EXACTLY two actions"""
+    actions: List[Action]
+
+class FastZombieActionGeneration(BaseModel):
+
+    """The decided upon action. Zombies should generate EXACTLY one action"""
+    action: Action
+
 class OutcomeEvaluationGeneration(BaseModel):
 
     """A summary of action performed, in one sentence"""
@@ -40,3 +64,70 @@ class OutcomeEvaluationGeneration(BaseModel):
 
     """The decided upon outcomes"""
     outcomes: List[Outcome]
+
+class OutcomePatchEvaluationGeneration(BaseModel):
+
+    """A summary of action performed, in one sentence"""
+    synopsis: str
+
+    """A description of one possible plan for evaluation, in one sentence"""
+    evaluation_plan_1: str
+    """A description of another, different, possible evaluation, in one sentence"""
+    evaluation_plan_2: str
+
+    """The decided upon outcomes, with state changes as patches"""
+    outcomes: List[OutcomeDelta]
+
+class FastOutcomeEvaluationGeneration(BaseModel):
+
+    """The decided upon outcomes"""
+    outcomes: List[Outcome]
+
+class FastOutcomePatchEvaluationGeneration(BaseModel):
+
+    """The decided upon outcomes, with state changes as patches"""
+    outcomes: List[OutcomeDelta]
+
+class ZombieHordeActionGeneration(BaseModel):
+
+    """A summary of recent events, in one sentence"""
+    synopsis: str
+
+    """The decided upon actions. Generate EXACTLY one action per zombie in the horde"""
+    actions: List[Action]
+
+class FastZombieHordeActionGeneration(BaseModel):
+
+    """The decided upon actions. Generate EXACTLY one action per zombie in the horde"""
+    actions: List[Action]
+
+class BatchOutcomeEvaluationGeneration(BaseModel):
+
+    """A summary of the actions performed, in one sentence"""
+    synopsis: str
+
+    """The decided upon outcomes, one per action (except FOCUS and FREEZE), each keyed by its action_id"""
+    outcomes: List[Outcome]
+
+class BatchOutcomePatchEvaluationGeneration(BaseModel):
+
+    """A summary of the actions performed, in one sentence"""
+    synopsis: str
+
+    """The decided upon outcomes, one per action (except FOCUS and FREEZE), each keyed by its action_id, with state changes as patches"""
+    outcomes: List[OutcomeDelta]
+
+class FastBatchOutcomeEvaluationGeneration(BaseModel):
+
+    """The decided upon outcomes, one per action (except FOCUS and FREEZE), each keyed by its action_id"""
+    outcomes: List[Outcome]
+
+class FastBatchOutcomePatchEvaluationGeneration(BaseModel):
+
+    """The decided upon outcomes, one per action (except FOCUS and FREEZE), each keyed by its action_id, with state changes as patches"""
+    outcomes: List[OutcomeDelta]
+
+class HistorySynopsisGeneration(BaseModel):
+
+    """The previous synopsis extended with the new actions and their outcomes, in at most four sentences"""
+    synopsis: str
@@ -4,24 +4,21 @@ from toon import encode_pydantic
 from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
 
 from models.core.episode import Environment, Episode
+from prompts.context_packer import pack_context
 from prompts.prompt_fragments import PromptFragments
-from prompts.prompt_generations import SurivorActionGeneration
+from prompts.prompt_generations import FastSurvivorActionGeneration, SurivorActionGeneration
+from prompts.toon_encoding import encode_entities
 
 class SurvivorAgentPrompt:
 
     GENERATED_TYPE = SurivorActionGeneration
 
-    def build_prompt_messages(
-        episode: Episode, 
-        actor_id: str,
-    ) -> List[BaseMessage]:
-
-        PROMPT_HEADER = """
+    PROMPT_HEADER = """
         You are an AI agent controlling a single character in a collaborative narrative simulation. 
         Your role is to generate two plot-advancing actions for your character based on their current episode and overarching campaign goals.
         """
 
-        DECISION_FRAMEWORK = """
+    DECISION_FRAMEWORK = """
         Decision Framework:
             1. Assess Threat Level
                 Immediate danger (attack, breach, fire): Actions should address or escape the threat
@@ -47,6 +44,41 @@ class SurvivorAgentPrompt:
                     - Progress toward goals
         """
 
+    """the static rules and framework, built once. Per-turn context goes in a later message so this prefix stays cacheable"""
+    STATIC_PREFIX = (
+        PROMPT_HEADER
+        + PromptFragments.SURVIVOR_ACTION_RULES
+        + PromptFragments.SURVIVOR_ACTOR_STATE
+        + DECISION_FRAMEWORK
+        + PromptFragments.CONFLICTING_CONTEXT_RULE
+    )
+
+    INSTRUCTIONS = """Read the recent actions - What just happened? Provide a synopsis.
+        Identify immediate threats or opportunities - Does anything demand a response?
+        Check your character's goals - If no immediate threat, what action moves toward the goals?
+        Apply character state - Adjust actions and intensity based on health/arousal/control
+        Choose actions that will have the most impact on your character and the rest of the episode.
+        Verify no repetition - Are you doing something meaningfully different from your last actions?
+        Provide two, distinctly different plans.
+        Finally, select the more interesting and impactful plan and generate EXACTLY two actions."""
+
+    """the fast profile's instructions, which skip the synopsis and plans and go straight to FAST_GENERATED_TYPE"""
+    FAST_INSTRUCTIONS = """Identify immediate threats or opportunities - Does anything demand a response?
+        Check your character's goals - If no immediate threat, what action moves toward the goals?
+        Apply character state - Adjust actions and intensity based on health/arousal/control
+        Verify no repetition - Are you doing something meaningfully different from your last actions?
+        Do not write a synopsis or plans. Generate EXACTLY two actions directly."""
+    FAST_GENERATED_TYPE = FastSurvivorActionGeneration
+
+    def build_prompt_messages(
+        episode: Episode, 
+        actor_id: str,
+        token_budget: int | None = None,
+        fast: bool = False,
+    ) -> List[BaseMessage]:
+        """token_budget: when set, the surroundings are packed by priority into roughly that many prompt tokens
+        fast: when True, the prompt asks for FAST_GENERATED_TYPE with FAST_INSTRUCTIONS"""
+
         WORKING_CONTEXT = """
         Your Character:
             {character_info}
@@ -72,39 +104,41 @@ class SurvivorAgentPrompt:
 
             Recent actions:
                 {episode_action_info}
+
+            Earlier history:
+                {history_info}
         
         Critical Instructions
 
-        Read the recent actions - What just happened? Provide a synopsis.
-        Identify immediate threats or opportunities - Does anything demand a response?
-        Check your character's goals - If no immediate threat, what action moves toward the goals?
-        Apply character state - Adjust actions and intensity based on health/arousal/control
-        Choose actions that will have the most impact on your character and the rest of the episode.
-        Verify no repetition - Are you doing something meaningfully different from your last actions?
-        Provide two, distinctly different plans.
-        Finally, select the more interesting and impactful plan and generate EXACTLY two actions.
+        {instructions}
         """
 
         actor = episode.actors[actor_id]
-        env: Environment = episode #.get_actor_surroundings(actor_id)
-
-        sys_prompt = PROMPT_HEADER
-        sys_prompt += PromptFragments.SURVIVOR_ACTION_RULES
-        sys_prompt += PromptFragments.SURVIVOR_ACTOR_STATE
-        sys_prompt += DECISION_FRAMEWORK
-        sys_prompt += WORKING_CONTEXT.format(
-            character_info = encode_pydantic(actor),
+        env: Environment = episode.get_actor_surroundings(actor_id)
+        instructions = SurvivorAgentPrompt.FAST_INSTRUCTIONS if fast else SurvivorAgentPrompt.INSTRUCTIONS
+        character_info = encode_pydantic(actor)
+        context = pack_context(
+            env,
+            [actor_id],
+            SurvivorAgentPrompt.STATIC_PREFIX + WORKING_CONTEXT + instructions + character_info + PromptFragments.ACTOR_USER_PROMPT,
+            token_budget,
+        )
+
+        working_context = WORKING_CONTEXT.format(
+            character_info = character_info,
             landmark_name = env.landmark.name,
-            location_info = encode_pydantic(env.locations[actor.location_id]),
-            junctions_info = encode_pydantic(list(env.junctions.values())),
-            actors_info = encode_pydantic(env.get_observable_actors()),
-            held_items_info = encode_pydantic(env.get_held_items()),
-            dropped_items_info = encode_pydantic(env.get_dropped_items()),
-            episode_action_info = encode_pydantic(env.actions),
+            location_info = encode_entities(context.locations),
+            junctions_info = encode_entities(context.junctions),
+            actors_info = encode_entities(context.actors),
+            held_items_info = encode_entities(context.held_items),
+            dropped_items_info = encode_entities(context.dropped_items),
+            episode_action_info = encode_pydantic(context.actions),
+            history_info = encode_pydantic(context.synopses),
+            instructions = instructions,
         )
-        sys_prompt += PromptFragments.CONFLICTING_CONTEXT_RULE
 
         return [
-            SystemMessage(sys_prompt),
+            SystemMessage(SurvivorAgentPrompt.STATIC_PREFIX),
+            SystemMessage(working_context),
             HumanMessage(PromptFragments.ACTOR_USER_PROMPT)
         ]
\ No newline at end of file
@@ -0,0 +1,43 @@
+from typing import Sequence, Tuple
+
+from pydantic import BaseModel
+from toon import encode_pydantic
+
+from models.core.entities import Entity
+
+
+def encode_entities(entities: Sequence[Entity]) -> str:
+    """Same output as encode_pydantic(list(entities)), reusing each entity's cached table row.
+
+    Only entities with flat fields encode as table rows. Lists containing any other entity, like actors with their
+    nested internal state, or entities of different shapes are encoded in full.
+    """
+    fields = None
+    rows = []
+    for entity in entities:
+        entity_fields, row = _table_row(entity)
+        if entity_fields is None or (fields is not None and entity_fields != fields):
+            return encode_pydantic(list(entities))
+        fields = entity_fields
+        rows.append(row)
+    if not rows:
+        return encode_pydantic([])
+    return f"[{len(rows)}]{{{','.join(fields)}}}:\n" + "\n".join(rows)
+
+
+def _table_row(entity: Entity) -> Tuple[Tuple[str, ...] | None, str]:
+    """The entity's fields and its row of a TOON table, or None fields when it can't be a table row"""
+    fragment = entity._fragment
+    if fragment is None or fragment[0] != entity.version:
+        header, _, row = encode_pydantic([entity]).partition("\n")
+        fields = tuple(header[header.index("{") + 1:header.rindex("}")].split(",")) if header.endswith("}:") else None
+        fragment = (entity.version, fields, row)
+        entity._fragment = fragment
+    return fragment[1], fragment[2]
+
+
+def encoded_row(item: BaseModel) -> str:
+    """The item as it appears inside an encoded list, without the list header. Cached for entities."""
+    if isinstance(item, Entity):
+        return _table_row(item)[1]
+    return encode_pydantic([item]).partition("\n")[2]
@@ -4,24 +4,21 @@ from toon import encode_pydantic
 from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
 
 from models.core.episode import Environment, Episode
+from prompts.context_packer import pack_context
 from prompts.prompt_fragments import PromptFragments
-from prompts.prompt_generations import ZombieActionGeneration
+from prompts.prompt_generations import FastZombieActionGeneration, ZombieActionGeneration
+from prompts.toon_encoding import encode_entities
 
 class ZombieAgentPrompt:
 
     GENERATED_TYPE = ZombieActionGeneration
 
-    def build_prompt_messages(
-        episode: Episode, 
-        actor_id: str,
-    ) -> List[BaseMessage]:
-
-        PROMPT_HEADER = """
+    PROMPT_HEADER = """
         You are an AI agent controlling a single character in a collaborative narrative simulation. 
         Your role is to generate a plot-advancing action for your character based on their current episode and overarching campaign goals.
         """
 
-        DECISION_FRAMEWORK = """
+    DECISION_FRAMEWORK = """
         Decision Framework:
             1. Apply Character State Modifiers
                 The character's arousal, control, and health should inform what action they would choose and are able to take.
@@ -32,6 +29,40 @@ class ZombieAgentPrompt:
                     - Repeatedly FIGHT with actions that will not incapacitate
         """
 
+    STATIC_PREFIX = (
+        PROMPT_HEADER
+        + PromptFragments.ZOMBIE_ACTION_RULES
+        + PromptFragments.ZOMBIE_ACTOR_STATE
+        + DECISION_FRAMEWORK
+        + PromptFragments.CONFLICTING_CONTEXT_RULE
+    )
+
+    INSTRUCTIONS = """Read the recent actions - What just happened? Provide a synopsis.
+        Identify immediate threats or opportunities - Does anything demand a response?
+        Check your character's goals - If no immediate threat, what action moves toward the goals?
+        Apply character state - Adjust actions and intensity based on health/arousal/control
+        Choose actions that will have the most impact on your character and the rest of the episode.
+        Verify no repetition - Are you doing something meaningfully different from your last actions?
+        Provide two, distinctly different plans.
+        Finally, select the more interesting and impactful plan and generate EXACTLY one action."""
+
+    """used with FAST_GENERATED_TYPE, where the zombie generates its action alone"""
+    FAST_INSTRUCTIONS = """Identify immediate threats or opportunities - Does anything demand a response?
+        Check your character's goals - If no immediate threat, what action moves toward the goals?
+        Apply character state - Adjust actions and intensity based on health/arousal/control
+        Verify no repetition - Are you doing something meaningfully different from your last actions?
+        Do not write a synopsis or plans. Generate EXACTLY one action directly."""
+    FAST_GENERATED_TYPE = FastZombieActionGeneration
+
+    def build_prompt_messages(
+        episode: Episode, 
+        actor_id: str,
+        token_budget: int | None = None,
+        fast: bool = False,
+    ) -> List[BaseMessage]:
+        """token_budget: when set, the surroundings are packed by priority into roughly that many prompt tokens
+        fast: when True, the prompt asks for FAST_GENERATED_TYPE with FAST_INSTRUCTIONS"""
+
         WORKING_CONTEXT = """
         Your Character:
             {character_info}
@@ -51,38 +82,41 @@ class ZombieAgentPrompt:
 
             Recent actions:
                 {episode_action_info}
+
+            Earlier history:
+                {history_info}
         
         Critical Instructions
 
-        Read the recent actions - What just happened? Provide a synopsis.
-        Identify immediate threats or opportunities - Does anything demand a response?
-        Check your character's goals - If no immediate threat, what action moves toward the goals?
-        Apply character state - Adjust actions and intensity based on health/arousal/control
-        Choose actions that will have the most impact on your character and the rest of the episode.
-        Verify no repetition - Are you doing something meaningfully different from your last actions?
-        Provide two, distinctly different plans.
-        Finally, select the more interesting and impactful plan and generate EXACTLY one action.
+        {instructions}
 
         """
 
         actor = episode.actors[actor_id]
-        env: Environment = episode #.get_actor_surroundings(actor_id)
-
-        sys_prompt = PROMPT_HEADER
-        sys_prompt += PromptFragments.ZOMBIE_ACTION_RULES
-        sys_prompt += PromptFragments.ZOMBIE_ACTOR_STATE
-        sys_prompt += DECISION_FRAMEWORK
-        sys_prompt += WORKING_CONTEXT.format(
-            character_info = encode_pydantic(actor.get_observable()),
+        env: Environment = episode.get_actor_surroundings(actor_id)
+        instructions = ZombieAgentPrompt.FAST_INSTRUCTIONS if fast else ZombieAgentPrompt.INSTRUCTIONS
+        character_info = encode_pydantic(actor.get_observable())
+        context = pack_context(
+            env,
+            [actor_id],
+            ZombieAgentPrompt.STATIC_PREFIX + WORKING_CONTEXT + instructions + character_info + PromptFragments.ACTOR_USER_PROMPT,
+            token_budget,
+            include_items=False,
+        )
+
+        working_context = WORKING_CONTEXT.format(
+            character_info = character_info,
             landmark_name = env.landmark.name,
-            location_info = encode_pydantic(env.locations[actor.location_id]),
-            junctions_info = encode_pydantic(list(env.junctions.values())),
-            actors_info = encode_pydantic(env.get_observable_actors()),
-            episode_action_info = encode_pydantic(env.actions),
+            location_info = encode_entities(context.locations),
+            junctions_info = encode_entities(context.junctions),
+            actors_info = encode_entities(context.actors),
+            episode_action_info = encode_pydantic(context.actions),
+            history_info = encode_pydantic(context.synopses),
+            instructions = instructions,
         )
-        sys_prompt += PromptFragments.CONFLICTING_CONTEXT_RULE
 
         return [
-            SystemMessage(sys_prompt),
+            SystemMessage(ZombieAgentPrompt.STATIC_PREFIX),
+            SystemMessage(working_context),
             HumanMessage(PromptFragments.ACTOR_USER_PROMPT)
         ]
\ No newline at end of file
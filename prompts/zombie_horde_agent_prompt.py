@@ -0,0 +1,122 @@
+from typing import List
+from toon import encode_pydantic
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+
+from models.core.episode import Environment, Episode
+from prompts.context_packer import pack_context
+from prompts.prompt_fragments import PromptFragments
+from prompts.prompt_generations import FastZombieHordeActionGeneration, ZombieHordeActionGeneration
+from prompts.toon_encoding import encode_entities
+
+class ZombieHordeAgentPrompt:
+
+    GENERATED_TYPE = ZombieHordeActionGeneration
+
+    PROMPT_HEADER = """
+        You are an AI agent controlling a horde of zombie characters in a collaborative narrative simulation.
+        Your role is to generate a plot-advancing action for each zombie in the horde based on the current episode.
+        """
+
+    DECISION_FRAMEWORK = """
+        Decision Framework:
+            1. Apply Character State Modifiers
+                Each zombie's arousal, control, and health should inform what action it would choose and is able to take.
+
+            2. Act Individually
+                Zombies do not coordinate. Each zombie reacts to what is in front of it.
+
+            3. Check for Action Repetition
+                Review each zombie's last few actions. If it has repeated the same type of action twice without meaningful story change, do something different.
+                Examples of repetition to avoid:
+                    - Repeatedly FIGHT with actions that will not incapacitate
+        """
+
+    STATIC_PREFIX = (
+        PROMPT_HEADER
+        + PromptFragments.ZOMBIE_HORDE_ACTION_RULES
+        + PromptFragments.ZOMBIE_ACTOR_STATE
+        + DECISION_FRAMEWORK
+        + PromptFragments.CONFLICTING_CONTEXT_RULE
+    )
+
+    INSTRUCTIONS = """Read the recent actions - What just happened? Provide a synopsis.
+        Identify immediate threats or opportunities for each zombie - Does anything demand a response?
+        Apply character state - Adjust each zombie's action and intensity based on health/arousal/control
+        Verify no repetition - Is each zombie doing something meaningfully different from its last actions?
+        Finally, generate EXACTLY one action for each zombie in your horde ({horde_size} actions in total)."""
+
+    """for FAST_GENERATED_TYPE, which holds the horde's actions without a synopsis"""
+    FAST_INSTRUCTIONS = """Identify immediate threats or opportunities for each zombie - Does anything demand a response?
+        Apply character state - Adjust each zombie's action and intensity based on health/arousal/control
+        Verify no repetition - Is each zombie doing something meaningfully different from its last actions?
+        Do not write a synopsis. Generate EXACTLY one action for each zombie in your horde ({horde_size} actions in total)."""
+    FAST_GENERATED_TYPE = FastZombieHordeActionGeneration
+
+    def build_prompt_messages(
+        episode: Episode,
+        actor_ids: List[str],
+        token_budget: int | None = None,
+        fast: bool = False,
+    ) -> List[BaseMessage]:
+        """Builds a single prompt for every zombie in actor_ids. The zombies are expected to share a location.
+        When token_budget is set, the surroundings are packed by priority into roughly that many prompt tokens.
+        When fast is set, the prompt asks for FAST_GENERATED_TYPE."""
+
+        WORKING_CONTEXT = """
+        Your Horde:
+            {horde_info}
+
+        Environment:
+            Current Landmark:
+                {landmark_name}
+
+            Locations (within landmark):
+                {location_info}
+
+            Junctions:
+                {junctions_info}
+
+            Actors:
+                {actors_info}
+
+            Recent actions:
+                {episode_action_info}
+
+            Earlier history:
+                {history_info}
+
+        Critical Instructions
+
+        {instructions}
+
+        """
+
+        horde = [episode.actors[actor_id] for actor_id in actor_ids]
+        env: Environment = episode.get_group_surroundings(actor_ids)
+        instructions = (ZombieHordeAgentPrompt.FAST_INSTRUCTIONS if fast else ZombieHordeAgentPrompt.INSTRUCTIONS).format(horde_size=len(horde))
+        horde_info = encode_entities([actor.get_observable() for actor in horde])
+        user_prompt = "Generate exactly one action for each zombie in your horde."
+        context = pack_context(
+            env,
+            actor_ids,
+            ZombieHordeAgentPrompt.STATIC_PREFIX + WORKING_CONTEXT + instructions + horde_info + user_prompt,
+            token_budget,
+            include_items=False,
+        )
+
+        working_context = WORKING_CONTEXT.format(
+            horde_info = horde_info,
+            landmark_name = env.landmark.name,
+            location_info = encode_entities(context.locations),
+            junctions_info = encode_entities(context.junctions),
+            actors_info = encode_entities(context.actors),
+            episode_action_info = encode_pydantic(context.actions),
+            history_info = encode_pydantic(context.synopses),
+            instructions = instructions,
+        )
+
+        return [
+            SystemMessage(ZombieHordeAgentPrompt.STATIC_PREFIX),
+            SystemMessage(working_context),
+            HumanMessage(user_prompt)
+        ]
@@ -0,0 +1,4 @@
+import os
+
+# the graph builds an OpenAI client for its default model, which needs a key even when every call goes to the fake llm
+os.environ.setdefault("OPENAI_API_KEY", "test")
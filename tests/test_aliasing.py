@@ -0,0 +1,26 @@
+import pytest
+from langchain_core.messages import HumanMessage
+
+from llm.aliasing import UidAliases, UnknownAliasError
+
+
+def aliases():
+    return UidAliases.from_messages([HumanMessage("actor_17 stands in location_4 next to actor_3")])
+
+
+def test_aliases_are_delimited():
+    assert aliases().alias_text("actor_3 waves at actor_17") == "@A2 waves at @A1"
+
+
+def test_free_text_resolves_only_delimited_aliases():
+    text = "@A1 tears an A1 poster off the L1 wall of @L1"
+    assert aliases().resolve_text(text) == "actor_17 tears an A1 poster off the L1 wall of location_4"
+
+
+def test_id_fields_resolve_aliases_with_or_without_delimiter():
+    uid_aliases = aliases()
+    assert uid_aliases.resolve_id("@A2") == "actor_3"
+    assert uid_aliases.resolve_id("A2") == "actor_3"
+    assert uid_aliases.resolve_id("action_123") == "action_123"
+    with pytest.raises(UnknownAliasError):
+        uid_aliases.resolve_id("@A9")
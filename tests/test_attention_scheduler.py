@@ -0,0 +1,35 @@
+from benchmarks.synthetic_episodes import build_synthetic_episode
+from engine.attention_scheduler import AttentionScheduler, AttentionSchedulerConfig
+from engine.episode_turn_graph import EpisodeTurnGraph
+from engine.zombie_policy import HeuristicZombiePolicy
+from llm.fake_llm import FakeChatModel
+from models.core.enums import ActorHealth, ActorType
+
+
+def test_llm_calls_saved_ignores_dead_actors_and_policy_generation():
+    episode = build_synthetic_episode(location_count=4, survivor_count=4, zombie_count=4, item_count=4)
+    survivors = [actor for actor in episode.actors.values() if actor.type == ActorType.HUMAN]
+    zombies = [actor for actor in episode.actors.values() if actor.type == ActorType.ZOMBIE]
+    for actor in survivors[:1] + zombies[:2]:
+        episode.put_entity("actors", actor.model_copy(update={"health": ActorHealth.DEAD}))
+    graph = EpisodeTurnGraph(base_model=FakeChatModel(seed=0), persist=False, zombie_policy=HeuristicZombiePolicy(seed=0))
+    # every living actor acts on the first tick, then sits out the next two
+    scheduler = AttentionScheduler(AttentionSchedulerConfig(active_threshold=float("inf"), idle_interval=100))
+
+    stats = scheduler.run(graph, episode, ticks=3)
+
+    assert stats.turns == 5
+    assert stats.round_robin_turns == 15
+    assert stats.skipped_dead == 9
+    # each idle tick skips three survivors (generation and evaluation) and two zombies (evaluation only)
+    assert scheduler.llm_calls_saved() == 2 * (3 * 2 + 2 * 1)
+
+
+def test_fixed_llm_calls_per_turn_overrides_the_graph():
+    episode = build_synthetic_episode(location_count=4, survivor_count=2, zombie_count=0, item_count=4)
+    graph = EpisodeTurnGraph(base_model=FakeChatModel(seed=0), persist=False)
+    scheduler = AttentionScheduler(AttentionSchedulerConfig(active_threshold=float("inf"), idle_interval=100, llm_calls_per_turn=3))
+
+    scheduler.run(graph, episode, ticks=2)
+
+    assert scheduler.llm_calls_saved() == 2 * 3
@@ -0,0 +1,76 @@
+import asyncio
+
+import pytest
+
+from benchmarks.synthetic_episodes import build_synthetic_episode
+from engine.episode_turn_graph import EpisodeTurnGraph, EvaluationScope, apply_entity_update, order_outcomes
+from engine.outcome_resolver import RuleBasedOutcomeResolver
+from engine.zombie_policy import HeuristicZombiePolicy
+from llm.fake_llm import FakeChatModel
+from models.core.actions import Action, Outcome
+from models.core.enums import ActionType, EntityType, JunctionAccessibility, OutcomeType
+from prompts.batch_outcome_evaluator_agent_prompt import BatchOutcomeEvaluatorAgentPrompt
+from prompts.outcome_evaluator_agent_prompt import OutcomeEvaluatorAgentPrompt
+
+
+def outcome(action_id):
+    return Outcome(action_id=action_id, type=OutcomeType.SUCCESS, attention=1, fact="done")
+
+
+def test_order_outcomes_is_stable_and_puts_unknown_actions_last():
+    actions = [
+        Action(uid=uid, type=ActionType.INSPECT, location_id="location_1", source_actor_id="actor_1",
+               target_entity_id="location_1", target_entity_type=EntityType.LOCATION, fact="Looks")
+        for uid in ("action_1", "action_2", "action_3")
+    ]
+    outcomes = [outcome("action_9"), outcome("action_3"), outcome("action_1"), outcome("action_3").model_copy(update={"fact": "again"})]
+
+    ordered = order_outcomes(actions, outcomes)
+
+    assert [(o.action_id, o.fact) for o in ordered] == [("action_1", "done"), ("action_3", "done"), ("action_3", "again"), ("action_9", "done")]
+
+
+def evaluator_calls(model):
+    return sum(
+        model.stats[schema.__name__].calls
+        for schema in (OutcomeEvaluatorAgentPrompt.GENERATED_TYPE, BatchOutcomeEvaluatorAgentPrompt.GENERATED_TYPE)
+        if schema.__name__ in model.stats
+    )
+
+
+@pytest.mark.parametrize("scope", list(EvaluationScope))
+def test_evaluation_scope_decides_the_batches(scope):
+    episode = build_synthetic_episode(location_count=3, survivor_count=6, zombie_count=0, item_count=3)
+    model = FakeChatModel(seed=0)
+    graph = EpisodeTurnGraph(base_model=model, persist=False, evaluation_scope=scope)
+
+    state = asyncio.run(graph.ainvoke_round(episode))
+
+    expected = {
+        EvaluationScope.ACTOR: len({action.source_actor_id for action in state["actions"]}),
+        EvaluationScope.LOCATION: len({action.location_id for action in state["actions"]}),
+        EvaluationScope.ROUND: 1,
+    }[scope]
+    assert evaluator_calls(model) == expected
+    assert [outcome.action_id for outcome in state["outcomes"]] == [action.uid for action in state["actions"]]
+
+
+def test_local_and_evaluated_outcomes_come_back_in_action_order():
+    episode = build_synthetic_episode(location_count=6, survivor_count=2, zombie_count=6, item_count=4)
+    # open junctions let zombies walk, which resolves locally, while survivors' inspections still need the evaluator
+    for junction in list(episode.junctions.values()):
+        apply_entity_update(episode, junction.model_copy(update={"accessibility": JunctionAccessibility.OPEN}))
+    graph = EpisodeTurnGraph(
+        base_model=FakeChatModel(seed=0),
+        persist=False,
+        zombie_policy=HeuristicZombiePolicy(seed=0),
+        outcome_resolver=RuleBasedOutcomeResolver(seed=0),
+    )
+
+    state = asyncio.run(graph.ainvoke_round(episode))
+
+    assert graph.outcome_resolver.stats.local > 0 and graph.outcome_resolver.stats.remote > 0
+    positions = {action.uid: i for i, action in enumerate(state["actions"])}
+    resolved = [positions[outcome.action_id] for outcome in state["outcomes"]]
+    assert resolved == sorted(resolved)
+    assert episode.outcomes[-len(state["outcomes"]):] == state["outcomes"]
@@ -0,0 +1,139 @@
+import itertools
+from types import SimpleNamespace
+
+import pytest
+from langchain_core.messages import HumanMessage
+from langchain_core.runnables import RunnableLambda
+from pydantic import BaseModel
+
+from llm import cache as llm_cache
+from llm.cache import CacheMode, LLMResponseCache
+
+
+class Reply(BaseModel):
+    text: str
+
+
+REPLY_SIZE = len(Reply(text="x" * 10).model_dump_json().encode())
+
+
+@pytest.fixture(autouse=True)
+def clock(monkeypatch):
+    """a strictly increasing clock, so every access time is distinct"""
+    ticks = itertools.count(1)
+    monkeypatch.setattr(llm_cache, "time", SimpleNamespace(time=lambda: float(next(ticks))))
+
+
+def make_cache(tmp_path, **kwargs):
+    return LLMResponseCache(path=tmp_path / "cache.sqlite", **kwargs)
+
+
+def reply(key):
+    return Reply(text=key * 10)
+
+
+def stored_keys(cache):
+    return {key for key, in cache.connection.execute("SELECT key FROM responses")}
+
+
+def accessed(cache, key):
+    return cache.connection.execute("SELECT accessed FROM responses WHERE key = ?", (key,)).fetchone()[0]
+
+
+def test_hits_and_misses_are_counted(tmp_path):
+    cache = make_cache(tmp_path)
+
+    assert cache.get("a", Reply) is None
+    cache.put("a", reply("a"))
+    assert cache.get("a", Reply) == reply("a")
+
+    assert (cache.stats.hits, cache.stats.misses, cache.stats.writes) == (1, 1, 1)
+    assert cache.stats.hit_ratio == 0.5
+
+
+def test_least_recently_used_responses_are_evicted_first(tmp_path):
+    cache = make_cache(tmp_path, max_bytes=3 * REPLY_SIZE)
+    for key in "abc":
+        cache.put(key, reply(key))
+
+    # the hit on a is only noted in memory, but is written before put evicts
+    cache.get("a", Reply)
+    cache.put("d", reply("d"))
+
+    assert stored_keys(cache) == {"a", "c", "d"}
+    assert cache.stats.evictions == 1
+    assert cache.total_bytes == 3 * REPLY_SIZE
+
+
+def test_replacing_a_response_does_not_count_its_old_size(tmp_path):
+    cache = make_cache(tmp_path, max_bytes=2 * REPLY_SIZE)
+    cache.put("a", reply("a"))
+    cache.put("a", reply("b"))
+    cache.put("b", reply("b"))
+
+    assert stored_keys(cache) == {"a", "b"}
+    assert cache.total_bytes == 2 * REPLY_SIZE
+
+
+def test_hits_are_written_once_a_batch_is_full(tmp_path):
+    cache = make_cache(tmp_path, touch_batch=3)
+    for key in "abc":
+        cache.put(key, reply(key))
+    stored = {key: accessed(cache, key) for key in "abc"}
+
+    cache.get("a", Reply)
+    cache.get("b", Reply)
+    cache.get("a", Reply)
+    assert {key: accessed(cache, key) for key in "abc"} == stored
+    assert list(cache.touched) == ["a", "b"]
+
+    cache.get("c", Reply)
+    assert not cache.touched
+    assert all(accessed(cache, key) > stored[key] for key in "abc")
+
+
+def test_close_writes_pending_hits(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.put("a", reply("a"))
+    stored = accessed(cache, "a")
+    cache.get("a", Reply)
+    cache.close()
+
+    reopened = make_cache(tmp_path)
+    assert accessed(reopened, "a") > stored
+    assert reopened.total_bytes == REPLY_SIZE
+
+
+def test_write_only_refreshes_responses_without_serving_them(tmp_path):
+    cache = make_cache(tmp_path, mode=CacheMode.WRITE_ONLY)
+    cache.put("a", reply("a"))
+
+    assert cache.get("a", Reply) is None
+    assert cache.stats.misses == 0
+    assert stored_keys(cache) == {"a"}
+
+
+def test_off_leaves_runnables_and_the_database_alone(tmp_path):
+    cache = make_cache(tmp_path, mode=CacheMode.OFF)
+    runnable = RunnableLambda(lambda messages: reply("a"))
+
+    assert cache.wrap(runnable, base_model=None, schema=Reply) is runnable
+    cache.put("a", reply("a"))
+    assert not stored_keys(cache)
+
+
+def test_wrapped_runnables_only_call_the_llm_on_a_miss(tmp_path):
+    cache = make_cache(tmp_path)
+    calls = []
+
+    def generate(messages):
+        calls.append(messages)
+        return {"text": messages[0].content}
+
+    wrapped = cache.wrap(RunnableLambda(generate), base_model=SimpleNamespace(model_name="m", temperature=0), schema=Reply)
+    messages = [HumanMessage("hello")]
+
+    assert wrapped.invoke(messages) == Reply(text="hello")
+    assert wrapped.invoke(messages) == Reply(text="hello")
+    assert wrapped.invoke([HumanMessage("goodbye")]) == Reply(text="goodbye")
+    assert len(calls) == 2
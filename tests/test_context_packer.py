@@ -0,0 +1,63 @@
+from benchmarks.synthetic_episodes import build_synthetic_episode_of_size
+from llm.token_counting import count_message_tokens
+from models.core.actions import Action
+from models.core.enums import ActionType, EntityType
+from prompts.batch_outcome_evaluator_agent_prompt import BatchOutcomeEvaluatorAgentPrompt
+from prompts.context_packer import pack_context
+from prompts.outcome_evaluator_agent_prompt import OutcomeEvaluatorAgentPrompt
+
+# pack_context estimates tokens rather than counting them, so packed prompts may overshoot by a little
+ESTIMATE_SLACK = 1.05
+
+
+def grab_item_actions(episode, count):
+    """Actions by actors standing with dropped items, each grabbing the last of them"""
+    actions = []
+    for actor in episode.actors.values():
+        items = [item for item in episode.items.values() if item.holder_id == actor.location_id]
+        if len(items) > 1:
+            actions.append(Action(
+                uid=f"action_{1000000 + len(actions)}",
+                type=ActionType.HOLD,
+                location_id=actor.location_id,
+                source_actor_id=actor.uid,
+                target_entity_id=items[-1].uid,
+                target_entity_type=EntityType.ITEM,
+                fact="Grabs it",
+            ))
+        if len(actions) == count:
+            break
+    return actions
+
+
+def test_packing_keeps_acting_actors_and_targets_first():
+    episode = build_synthetic_episode_of_size(2000)
+    action = grab_item_actions(episode, 1)[0]
+    env = episode.get_actor_surroundings(action.source_actor_id)
+
+    context = pack_context(env, [action.source_actor_id], "", 0, target_ids=[action.target_entity_id], observable=False)
+
+    assert [actor.uid for actor in context.actors] == [action.source_actor_id]
+    assert hasattr(context.actors[0], "internal")
+    assert [item.uid for item in context.dropped_items] == [action.target_entity_id]
+    assert context.dropped_tokens > 0
+
+
+def test_evaluator_prompts_fit_their_budget():
+    episode = build_synthetic_episode_of_size(2000)
+    actions = grab_item_actions(episode, 3)
+
+    for build, evaluated in [
+        (OutcomeEvaluatorAgentPrompt.build_prompt_messages, actions[:1]),
+        (BatchOutcomeEvaluatorAgentPrompt.build_prompt_messages, actions),
+    ]:
+        # the fixed instructions, acting actors, and targets are sent whatever the budget, so they are the allowance
+        allowance = count_message_tokens(build(episode, evaluated, token_budget=0))
+        unbudgeted = count_message_tokens(build(episode, evaluated))
+        assert allowance < unbudgeted
+
+        for budget in (allowance // 2, (allowance + unbudgeted) // 2, unbudgeted - 1):
+            tokens = count_message_tokens(build(episode, evaluated, token_budget=budget))
+            assert tokens <= max(budget, allowance) * ESTIMATE_SLACK
+            if budget > allowance:
+                assert tokens > allowance
@@ -0,0 +1,71 @@
+import random
+
+from benchmarks.synthetic_episodes import build_synthetic_episode
+from engine.episode_turn_graph import apply_entity_update
+from models.core.episode import EnvironmentIndex
+
+
+def indexed_episode():
+    episode = build_synthetic_episode(location_count=10, survivor_count=6, zombie_count=6, item_count=20)
+    episode.get_index()
+    return episode
+
+
+def assert_matches_rebuilt(episode):
+    index = episode.get_index()
+    rebuilt = EnvironmentIndex(episode)
+    for name in ("actors_by_location", "junctions_by_location", "items_by_holder"):
+        # moves leave empty sets behind where a rebuilt index has no key at all
+        kept = {key: uids for key, uids in getattr(index, name).items() if uids}
+        assert kept == getattr(rebuilt, name), name
+    for name in ("actor_locations", "junction_ends", "item_holders", "positions", "shape"):
+        assert getattr(index, name) == getattr(rebuilt, name), name
+
+
+def test_moving_actors_keeps_the_index_current():
+    episode = indexed_episode()
+    rng = random.Random(0)
+    index = episode.get_index()
+    for actor in list(episode.actors.values()):
+        location_id = rng.choice(list(episode.locations))
+        apply_entity_update(episode, actor.model_copy(update={"location_id": location_id}))
+        assert actor.uid in {found.uid for found in episode.get_actors_at([location_id])}
+    assert episode.get_index() is index
+    assert_matches_rebuilt(episode)
+
+
+def test_handing_over_items_keeps_the_index_current():
+    episode = indexed_episode()
+    rng = random.Random(1)
+    holder_ids = list(episode.locations) + list(episode.actors)
+    for item in list(episode.items.values()):
+        holder_id = rng.choice(holder_ids)
+        apply_entity_update(episode, item.model_copy(update={"holder_id": holder_id}))
+        assert item.uid in {found.uid for found in episode.get_items_held_by([holder_id])}
+    assert_matches_rebuilt(episode)
+
+
+def test_junction_changes_keep_the_index_current():
+    episode = indexed_episode()
+    location_ids = list(episode.locations)
+    junction = next(iter(episode.junctions.values()))
+    moved = junction.model_copy(update={"from_location_id": location_ids[-1], "to_location_id": location_ids[-2]})
+    apply_entity_update(episode, moved)
+    added = junction.model_copy(update={"uid": "junction_1", "from_location_id": location_ids[0], "to_location_id": location_ids[-1]})
+    apply_entity_update(episode, added)
+
+    assert junction.uid in {found.uid for found in episode.get_junctions_at([location_ids[-2]])}
+    assert "junction_1" in {found.uid for found in episode.get_junctions_at([location_ids[0]])}
+    assert_matches_rebuilt(episode)
+
+
+def test_direct_writes_need_update_index():
+    episode = indexed_episode()
+    item = next(iter(episode.items.values()))
+    actor_id = next(iter(episode.actors))
+    episode.items[item.uid] = item.model_copy(update={"holder_id": actor_id})
+    assert item.uid not in {found.uid for found in episode.get_items_held_by([actor_id])}
+
+    episode.update_index(episode.items[item.uid])
+    assert item.uid in {found.uid for found in episode.get_items_held_by([actor_id])}
+    assert_matches_rebuilt(episode)
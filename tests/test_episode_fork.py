@@ -0,0 +1,71 @@
+import pytest
+
+from benchmarks.synthetic_episodes import build_synthetic_episode_of_size
+from engine.episode_turn_graph import apply_entity_update
+from models.core.episode import Episode, ForkConflictError
+
+
+def moved_item(episode: Episode, holder_index: int):
+    item = next(iter(episode.items.values()))
+    return item.model_copy(update={"holder_id": list(episode.locations)[holder_index]})
+
+
+def test_fork_and_parent_do_not_see_each_others_writes():
+    episode = build_synthetic_episode_of_size(200)
+    original = next(iter(episode.items.values()))
+    fork = episode.fork()
+
+    apply_entity_update(fork, moved_item(fork, 1))
+    assert episode.items[original.uid] is original
+
+    apply_entity_update(episode, moved_item(episode, 2))
+    assert fork.items[original.uid].holder_id == list(episode.locations)[1]
+
+
+def test_nested_fork_keeps_isolation_after_its_parent_is_discarded():
+    episode = build_synthetic_episode_of_size(200)
+    original = next(iter(episode.items.values()))
+    fork = episode.fork()
+    nested = fork.fork()
+    fork.discard()
+
+    apply_entity_update(episode, moved_item(episode, 3))
+    assert nested.items[original.uid] is original
+
+    apply_entity_update(nested, moved_item(nested, 4))
+    assert episode.items[original.uid].holder_id == list(episode.locations)[3]
+
+
+def test_nested_fork_cannot_merge_into_a_closed_fork():
+    episode = build_synthetic_episode_of_size(200)
+    fork = episode.fork()
+    nested = fork.fork()
+    fork.discard()
+
+    with pytest.raises(ValueError):
+        nested.merge()
+    with pytest.raises(ValueError):
+        apply_entity_update(fork, moved_item(fork, 1))
+
+
+def test_merge_applies_fork_changes_and_history():
+    episode = build_synthetic_episode_of_size(200)
+    fork = episode.fork()
+    nested = fork.fork()
+    item = moved_item(nested, 5)
+    apply_entity_update(nested, item)
+    nested.merge()
+    fork.merge()
+
+    assert episode.items[item.uid] is item
+    assert item.uid in [held.uid for held in episode.get_items_held_by([item.holder_id])]
+
+
+def test_merge_conflicts_when_the_parent_changed_the_same_entity():
+    episode = build_synthetic_episode_of_size(200)
+    fork = episode.fork()
+    apply_entity_update(fork, moved_item(fork, 1))
+    apply_entity_update(episode, moved_item(episode, 2))
+
+    with pytest.raises(ForkConflictError):
+        fork.merge()
@@ -0,0 +1,73 @@
+import asyncio
+from time import perf_counter
+
+import engine.episode_turn_graph as episode_turn_graph
+from benchmarks.synthetic_episodes import build_synthetic_episode
+from engine.episode_turn_graph import EpisodeTurnGraph, EvaluationScope
+from llm.fake_llm import FakeChatModel
+from models.core.enums import ActorHealth
+from prompts.batch_outcome_evaluator_agent_prompt import BatchOutcomeEvaluatorAgentPrompt
+
+LATENCY = 0.2
+
+
+def round_episode():
+    return build_synthetic_episode(location_count=4, survivor_count=4, zombie_count=4, item_count=8)
+
+
+def count_applies(monkeypatch):
+    calls = []
+    apply = episode_turn_graph.apply_outcomes_to_episode
+
+    def counting_apply(episode, outcomes):
+        calls.append(len(outcomes))
+        return apply(episode, outcomes)
+
+    monkeypatch.setattr(episode_turn_graph, "apply_outcomes_to_episode", counting_apply)
+    return calls
+
+
+def test_round_generates_concurrently_and_adjudicates_together(monkeypatch):
+    episode = round_episode()
+    applies = count_applies(monkeypatch)
+    model = FakeChatModel(latency=LATENCY, seed=0)
+    graph = EpisodeTurnGraph(base_model=model, persist=False)
+    assert graph.evaluation_scope == EvaluationScope.ROUND
+
+    start = perf_counter()
+    state = asyncio.run(graph.ainvoke_round(episode))
+    elapsed = perf_counter() - start
+
+    # eight generation calls and one evaluation, far less than the nine calls back to back
+    assert elapsed < 4 * LATENCY
+    assert len(state["actions"]) > 0
+    assert model.stats[BatchOutcomeEvaluatorAgentPrompt.GENERATED_TYPE.__name__].calls == 1
+    assert applies == [len(state["outcomes"])]
+    assert episode.actions[-len(state["actions"]):] == state["actions"]
+
+
+def test_round_applies_outcomes_once_per_round(monkeypatch):
+    episode = round_episode()
+    applies = count_applies(monkeypatch)
+    graph = EpisodeTurnGraph(base_model=FakeChatModel(seed=0), persist=False, evaluation_scope=EvaluationScope.ACTOR)
+
+    async def rounds():
+        for _ in range(3):
+            await graph.ainvoke_round(episode)
+
+    asyncio.run(rounds())
+    assert len(applies) == 3
+
+
+def test_round_skips_dead_actors():
+    episode = round_episode()
+    dead = list(episode.actors.values())[:3]
+    for actor in dead:
+        episode.put_entity("actors", actor.model_copy(update={"health": ActorHealth.DEAD}))
+    graph = EpisodeTurnGraph(base_model=FakeChatModel(seed=0), persist=False)
+
+    state = asyncio.run(graph.ainvoke_round(episode))
+
+    acting = {action.source_actor_id for action in state["actions"]}
+    assert acting
+    assert acting.isdisjoint(actor.uid for actor in dead)
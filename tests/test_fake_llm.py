@@ -0,0 +1,22 @@
+import asyncio
+
+from benchmarks.synthetic_episodes import build_synthetic_episode
+from engine.episode_turn_graph import EpisodeTurnGraph
+from llm.fake_llm import FakeChatModel
+
+
+def round_action_uids(seed):
+    episode = build_synthetic_episode(location_count=4, survivor_count=3, zombie_count=3, item_count=4)
+    graph = EpisodeTurnGraph(base_model=FakeChatModel(seed=seed), persist=False)
+
+    async def rounds():
+        for _ in range(2):
+            await graph.ainvoke_round(episode)
+
+    asyncio.run(rounds())
+    return [action.uid for action in episode.actions]
+
+
+def test_seeded_models_generate_the_same_action_uids():
+    assert round_action_uids(0) == round_action_uids(0)
+    assert round_action_uids(0) != round_action_uids(1)
@@ -0,0 +1,70 @@
+from benchmarks.synthetic_episodes import build_synthetic_episode
+from engine.history_compaction import HistoryCompactor
+from models.core.actions import Action, Outcome
+from models.core.enums import ActionType, ActorType, EntityType, OutcomeType
+
+
+def act(episode, actor_id, count):
+    actor = episode.actors[actor_id]
+    actions = [
+        Action(
+            uid=f"action_{len(episode.actions) + i}",
+            type=ActionType.INSPECT,
+            location_id=actor.location_id,
+            source_actor_id=actor_id,
+            target_entity_id=actor.location_id,
+            target_entity_type=EntityType.LOCATION,
+            fact=f"Searches shelf {len(episode.actions) + i}",
+        )
+        for i in range(count)
+    ]
+    episode.add_actions(actions)
+    episode.add_outcomes([Outcome(action_id=action.uid, type=OutcomeType.SUCCESS, attention=1, fact=f"finds dust on {action.uid}") for action in actions])
+    return actions
+
+
+def survivor_episode():
+    episode = build_synthetic_episode(location_count=3, survivor_count=1, zombie_count=0, item_count=2)
+    return episode, next(actor.uid for actor in episode.actors.values() if actor.type == ActorType.HUMAN)
+
+
+def test_folded_actions_leave_surroundings_and_land_in_synopses():
+    episode, actor_id = survivor_episode()
+    actions = act(episode, actor_id, 6)
+    location_id = episode.actors[actor_id].location_id
+
+    HistoryCompactor(keep_last=2, fold_batch=4).compact(episode)
+
+    surroundings = episode.get_actor_surroundings(actor_id)
+    assert surroundings.actions == actions[-2:]
+    assert [outcome.action_id for outcome in surroundings.outcomes] == [action.uid for action in actions[-2:]]
+    for synopsis in (surroundings.history.actor_synopses[actor_id], surroundings.history.location_synopses[location_id]):
+        assert synopsis.action_count == 4
+        for action in actions[:4]:
+            assert f"{action.fact}: finds dust on {action.uid}" in synopsis.synopsis
+        for action in actions[-2:]:
+            assert action.fact not in synopsis.synopsis
+
+
+def test_compaction_waits_for_a_full_batch():
+    episode, actor_id = survivor_episode()
+    actions = act(episode, actor_id, 5)
+
+    HistoryCompactor(keep_last=2, fold_batch=4).compact(episode)
+
+    assert episode.get_actor_surroundings(actor_id).actions == actions
+    assert episode.history.actor_synopses == {}
+
+
+def test_outcome_lookup_follows_appends_and_replaced_lists():
+    episode, actor_id = survivor_episode()
+    first = act(episode, actor_id, 2)
+    assert [outcome.action_id for outcome in episode.get_outcomes_of([first[1].uid, first[0].uid])] == [first[0].uid, first[1].uid]
+
+    second = act(episode, actor_id, 1)
+    assert [outcome.action_id for outcome in episode.get_outcomes_of([second[0].uid])] == [second[0].uid]
+
+    fork = episode.fork()
+    third = act(fork, actor_id, 1)
+    assert fork.get_outcomes_of([third[0].uid]) == fork.outcomes[-1:]
+    assert episode.get_outcomes_of([third[0].uid]) == []
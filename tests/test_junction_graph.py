@@ -0,0 +1,81 @@
+import random
+
+import pytest
+
+from benchmarks.synthetic_episodes import build_synthetic_episode
+from engine.episode_turn_graph import apply_entity_update
+from models.core.enums import JunctionAccessibility, JunctionCondition
+from models.core.junction_graph import JunctionGraph, Traversal
+
+CLOSE = {"accessibility": JunctionAccessibility.CLOSED, "condition": JunctionCondition.FUNCTIONAL}
+BLOCK = {"accessibility": JunctionAccessibility.BLOCKED, "condition": JunctionCondition.GOOD_CONDITION}
+OPEN = {"accessibility": JunctionAccessibility.OPEN, "condition": JunctionCondition.FUNCTIONAL}
+DESTROY = {"accessibility": JunctionAccessibility.BLOCKED, "condition": JunctionCondition.DESTROYED}
+
+
+def graph_episode():
+    episode = build_synthetic_episode(location_count=30, survivor_count=2, zombie_count=2, item_count=2)
+    for junction in list(episode.junctions.values()):
+        apply_entity_update(episode, junction.model_copy(update=OPEN))
+    return episode
+
+
+def assert_matches_fresh(episode, traversals=tuple(Traversal)):
+    graph = episode.get_junction_graph()
+    fresh = JunctionGraph(episode.locations, episode.junctions)
+    for traversal in traversals:
+        for location_id in episode.locations:
+            assert graph.get_distances(location_id, traversal) == fresh.get_distances(location_id, traversal), (traversal, location_id)
+            assert graph.within(location_id, 3, traversal) == fresh.within(location_id, 3, traversal), (traversal, location_id)
+            assert graph.get_exits(location_id, traversal) == fresh.get_exits(location_id, traversal), (traversal, location_id)
+
+
+@pytest.mark.parametrize("traversal", list(Traversal))
+@pytest.mark.parametrize("changes", [[CLOSE, OPEN], [BLOCK, DESTROY], [CLOSE, BLOCK, OPEN], [DESTROY, CLOSE]], ids=["close-open", "block-destroy", "close-block-open", "destroy-close"])
+def test_junction_changes_repair_cached_distances(traversal, changes):
+    episode = graph_episode()
+    graph = episode.get_junction_graph()
+    graph.precompute([traversal])
+    junction_ids = list(episode.junctions)[::3]
+
+    for update in changes:
+        for junction_id in junction_ids:
+            apply_entity_update(episode, episode.junctions[junction_id].model_copy(update=update))
+            assert episode.get_junction_graph() is graph
+        assert_matches_fresh(episode, [traversal])
+
+
+def test_cutting_a_bridge_disconnects_and_reopening_reconnects():
+    episode = graph_episode()
+    graph = episode.get_junction_graph()
+    graph.precompute()
+    # the first junction of the chain is a bridge unless a loop happens to span it, so find one that is
+    for junction in list(episode.junctions.values()):
+        apply_entity_update(episode, junction.model_copy(update=BLOCK))
+        if graph.distance(junction.from_location_id, junction.to_location_id, Traversal.PASSABLE) is None:
+            break
+        apply_entity_update(episode, junction.model_copy(update=OPEN))
+    else:
+        pytest.fail("no bridge in the synthetic landmark")
+    assert_matches_fresh(episode)
+
+    apply_entity_update(episode, junction.model_copy(update=OPEN))
+    assert graph.distance(junction.from_location_id, junction.to_location_id, Traversal.PASSABLE) == 1
+    assert_matches_fresh(episode)
+
+
+def test_random_junction_changes_match_a_fresh_graph():
+    episode = graph_episode()
+    graph = episode.get_junction_graph()
+    graph.precompute()
+    rng = random.Random(0)
+    junction_ids = list(episode.junctions)
+    for _ in range(200):
+        junction = episode.junctions[rng.choice(junction_ids)]
+        apply_entity_update(episode, junction.model_copy(update={
+            "accessibility": rng.choice(list(JunctionAccessibility)),
+            "condition": rng.choice(list(JunctionCondition)),
+        }))
+        # queries between changes, so later repairs start from partly repaired caches
+        graph.get_distances(rng.choice(list(episode.locations)), rng.choice(list(Traversal)))
+    assert_matches_fresh(episode)
@@ -0,0 +1,37 @@
+from benchmarks.synthetic_episodes import build_synthetic_episode
+from engine.model_routing import episode_tension
+from models.core.actions import Action, Outcome
+from models.core.enums import ActionType, ActorHealth, ActorType, EntityType, OutcomeType
+
+
+def fight(episode, attacker, defender, outcome_type=None, hurt=False):
+    action = Action(
+        uid=f"action_{len(episode.actions)}",
+        type=ActionType.FIGHT,
+        location_id=attacker.location_id,
+        source_actor_id=attacker.uid,
+        target_entity_id=defender.uid,
+        target_entity_type=EntityType.ACTOR,
+        fact="Swings at them",
+    )
+    episode.add_actions([action])
+    if outcome_type is not None:
+        target = defender.model_copy(update={"health": ActorHealth.POOR_HEALTH}) if hurt else None
+        episode.add_outcomes([Outcome(action_id=action.uid, type=outcome_type, attention=3, fact="It lands", resulting_target_entity_status=target)])
+
+
+def test_tension_counts_only_violent_fight_outcomes():
+    episode = build_synthetic_episode(location_count=3, survivor_count=2, zombie_count=0, item_count=1)
+    attacker, defender = [actor for actor in episode.actors.values() if actor.type == ActorType.HUMAN]
+    here = {attacker.location_id}
+
+    fight(episode, attacker, defender)
+    fight(episode, attacker, defender, OutcomeType.FAILURE)
+    fight(episode, attacker, defender, OutcomeType.SUCCESS)
+    assert episode_tension(episode, here, lookback=32) == 0
+
+    fight(episode, attacker, defender, OutcomeType.SUCCESS, hurt=True)
+    fight(episode, attacker, defender, OutcomeType.CRITICAL_FAILURE)
+    assert episode_tension(episode, here, lookback=32) == 2
+    assert episode_tension(episode, here, lookback=1) == 1
+    assert episode_tension(episode, {"location_elsewhere"}, lookback=32) == 0
@@ -0,0 +1,99 @@
+import pytest
+
+from benchmarks.synthetic_episodes import build_synthetic_episode
+from engine.outcome_patches import InvalidPatchError, outcomes_from_deltas, patch_entity
+from models.core.actions import Action, EntityPatch, OutcomeDelta
+from models.core.enums import (ActionType, ActorHealth, ActorType, EntityType, ItemCondition, JunctionAccessibility,
+                               JunctionCondition, OutcomeType)
+
+
+def patch_episode():
+    episode = build_synthetic_episode(location_count=3, survivor_count=1, zombie_count=0, item_count=1)
+    actor = next(actor for actor in episode.actors.values() if actor.type == ActorType.HUMAN)
+    return episode, actor
+
+
+def action_on(actor, target_id, target_type, uid="action_1"):
+    return Action(
+        uid=uid,
+        type=ActionType.PREPARE,
+        location_id=actor.location_id,
+        source_actor_id=actor.uid,
+        target_entity_id=target_id,
+        target_entity_type=target_type,
+        fact="Works on it",
+    )
+
+
+def delta(action_id, *patches):
+    return OutcomeDelta(action_id=action_id, type=OutcomeType.SUCCESS, attention=1, fact="It works", patches=list(patches))
+
+
+def test_patches_apply_in_order_and_leave_the_episode_unchanged():
+    episode, actor = patch_episode()
+    junction = episode.get_junctions_at([actor.location_id])[0]
+    barricade = action_on(actor, junction.uid, EntityType.JUNCTION)
+    smash = action_on(actor, junction.uid, EntityType.JUNCTION, uid="action_2")
+
+    outcomes = outcomes_from_deltas(episode, [barricade, smash], [
+        delta(barricade.uid, EntityPatch(uid=junction.uid, accessibility=JunctionAccessibility.BARRICADED), EntityPatch(uid=actor.uid, emotion="relieved")),
+        delta(smash.uid, EntityPatch(uid=junction.uid, condition=JunctionCondition.DAMAGED)),
+    ])
+
+    assert outcomes[0].resulting_target_entity_status == junction.model_copy(update={"accessibility": JunctionAccessibility.BARRICADED})
+    assert outcomes[0].resulting_source_entity_status.internal.emotion == "relieved"
+    assert outcomes[0].resulting_source_entity_status.health == actor.health
+    # the second patch starts from the first one's result
+    assert outcomes[1].resulting_target_entity_status == junction.model_copy(update={
+        "accessibility": JunctionAccessibility.BARRICADED, "condition": JunctionCondition.DAMAGED,
+    })
+    assert episode.junctions[junction.uid] is junction
+    assert episode.actors[actor.uid] is actor
+
+
+def test_rejects_an_unknown_entity():
+    episode, actor = patch_episode()
+    action = action_on(actor, "item_404", EntityType.ITEM)
+    with pytest.raises(InvalidPatchError, match="unknown entity item_404"):
+        outcomes_from_deltas(episode, [action], [delta(action.uid, EntityPatch(uid="item_404", condition=ItemCondition.DAMAGED))])
+
+
+@pytest.mark.parametrize("patch", [{"accessibility": JunctionAccessibility.OPEN}, {"health": ActorHealth.DEAD}, {"emotion": "sad"}])
+def test_rejects_fields_the_entity_does_not_have(patch):
+    episode, _ = patch_episode()
+    item = next(iter(episode.items.values()))
+    with pytest.raises(InvalidPatchError, match=f"{item.uid} has no field {next(iter(patch))}"):
+        patch_entity(episode, item, EntityPatch(uid=item.uid, **patch))
+
+
+def test_rejects_enum_values_of_another_entity_type():
+    episode, actor = patch_episode()
+    junction = episode.get_junctions_at([actor.location_id])[0]
+    with pytest.raises(InvalidPatchError, match=f"invalid patch for {junction.uid}"):
+        patch_entity(episode, junction, EntityPatch(uid=junction.uid, condition=ItemCondition.CONSUMED))
+
+
+def test_rejects_unknown_locations_and_holders():
+    episode, actor = patch_episode()
+    item = next(iter(episode.items.values()))
+    with pytest.raises(InvalidPatchError, match="unknown location"):
+        patch_entity(episode, actor, EntityPatch(uid=actor.uid, location_id="location_404"))
+    with pytest.raises(InvalidPatchError, match="unknown holder"):
+        patch_entity(episode, item, EntityPatch(uid=item.uid, holder_id="actor_404"))
+
+
+def test_rejects_deltas_for_actions_outside_the_batch_or_entities_they_do_not_involve():
+    episode, actor = patch_episode()
+    item = next(iter(episode.items.values()))
+    action = action_on(actor, actor.location_id, EntityType.LOCATION)
+    with pytest.raises(InvalidPatchError, match="action_9 can't change"):
+        outcomes_from_deltas(episode, [action], [delta("action_9", EntityPatch(uid=actor.uid, emotion="lost"))])
+    with pytest.raises(InvalidPatchError, match=f"{action.uid} can't change {item.uid}"):
+        outcomes_from_deltas(episode, [action], [delta(action.uid, EntityPatch(uid=item.uid, condition=ItemCondition.DAMAGED))])
+
+
+def test_deltas_without_patches_are_outcomes_without_statuses():
+    episode, actor = patch_episode()
+    outcomes = outcomes_from_deltas(episode, [], [delta("action_9")])
+    assert outcomes[0].action_id == "action_9"
+    assert outcomes[0].resulting_source_entity_status is None and outcomes[0].resulting_target_entity_status is None
@@ -0,0 +1,115 @@
+from itertools import count
+
+import pytest
+
+from benchmarks.synthetic_episodes import build_synthetic_episode
+from engine.outcome_resolver import RuleBasedOutcomeResolver
+from models.core.actions import Action
+from models.core.enums import (ActionType, ActorArousal, ActorControl, ActorHealth, ActorType, EntityType,
+                               JunctionAccessibility, JunctionCondition, OutcomeType)
+
+uids = count(1000000)
+
+
+def setup():
+    """An episode with a calm, composed, fairly healthy survivor next to an item and an open junction"""
+    episode = build_synthetic_episode(location_count=4, survivor_count=1, zombie_count=0, item_count=1)
+    actor = next(actor for actor in episode.actors.values() if actor.type == ActorType.HUMAN)
+    actor = actor.model_copy(update={
+        "health": ActorHealth.FAIR_HEALTH, "arousal": ActorArousal.CALM, "control": ActorControl.COMPOSED,
+    })
+    episode.put_entity("actors", actor)
+    item = next(iter(episode.items.values()))
+    episode.put_entity("items", item.model_copy(update={"holder_id": actor.location_id}))
+    junction = episode.get_junctions_at([actor.location_id])[0]
+    episode.put_entity("junctions", junction.model_copy(update={
+        "accessibility": JunctionAccessibility.OPEN, "condition": JunctionCondition.FUNCTIONAL,
+    }))
+    return episode, actor.uid, item.uid, junction.uid
+
+
+def action(episode, actor_id, type, target_id="", target_type=EntityType.LOCATION):
+    actor = episode.actors[actor_id]
+    return Action(
+        uid=f"action_{next(uids)}",
+        type=type,
+        location_id=actor.location_id,
+        source_actor_id=actor_id,
+        target_entity_id=target_id or actor.location_id,
+        target_entity_type=target_type,
+        fact=f"{type} test",
+    )
+
+
+def test_partition_resolves_rule_based_actions_locally():
+    episode, actor_id, item_id, junction_id = setup()
+    hold = action(episode, actor_id, ActionType.HOLD, item_id, EntityType.ITEM)
+    move = action(episode, actor_id, ActionType.MOVE, junction_id, EntityType.JUNCTION)
+    resolver = RuleBasedOutcomeResolver(seed=0)
+
+    outcomes, deferred = resolver.partition(episode, [hold, move])
+
+    assert deferred == []
+    assert [outcome.action_id for outcome in outcomes] == [hold.uid, move.uid]
+    moved = outcomes[1].resulting_source_entity_status
+    assert moved.location_id != episode.actors[actor_id].location_id
+    assert (resolver.stats.local, resolver.stats.remote) == (2, 0)
+
+
+def test_partition_defers_focus_with_the_actions_it_modifies():
+    episode, actor_id, _, _ = setup()
+    freeze = action(episode, actor_id, ActionType.FREEZE)
+    focus = action(episode, actor_id, ActionType.FOCUS)
+    inspect = action(episode, actor_id, ActionType.INSPECT)
+
+    outcomes, deferred = RuleBasedOutcomeResolver(seed=0).partition(episode, [freeze, focus, inspect])
+
+    assert [outcome.action_id for outcome in outcomes] == [freeze.uid]
+    assert deferred == [focus, inspect]
+
+
+def test_partition_defers_everything_after_a_local_state_change():
+    episode, actor_id, _, junction_id = setup()
+    move = action(episode, actor_id, ActionType.MOVE, junction_id, EntityType.JUNCTION)
+    inspect = action(episode, actor_id, ActionType.INSPECT)
+
+    outcomes, deferred = RuleBasedOutcomeResolver(seed=0).partition(episode, [move, inspect])
+
+    # the evaluator would judge the inspect from the room the actor had already left
+    assert outcomes == []
+    assert deferred == [move, inspect]
+
+
+@pytest.mark.parametrize("update", [{"health": ActorHealth.DEAD}, {"arousal": ActorArousal.UNRESPONSIVE}])
+def test_incapacitated_actors_fail_without_attention(update):
+    episode, actor_id, _, _ = setup()
+    episode.put_entity("actors", episode.actors[actor_id].model_copy(update=update))
+    inspect = action(episode, actor_id, ActionType.INSPECT)
+
+    outcome = RuleBasedOutcomeResolver(seed=0).resolve(episode, inspect)
+
+    assert (outcome.type, outcome.attention) == (OutcomeType.FAILURE, 0)
+    assert outcome.resulting_source_entity_status is None
+
+
+def hold_success_rate(episode, actor_id, item_id, focused=False, trials=4000):
+    resolver = RuleBasedOutcomeResolver(seed=1)
+    hold = action(episode, actor_id, ActionType.HOLD, item_id, EntityType.ITEM)
+    types = [resolver.resolve(episode, hold, focused=focused).type for _ in range(trials)]
+    return sum(1 for type in types if type in (OutcomeType.SUCCESS, OutcomeType.CRITICAL_SUCCESS)) / trials
+
+
+def test_hold_rates_follow_the_modifiers():
+    episode, actor_id, item_id, _ = setup()
+    assert hold_success_rate(episode, actor_id, item_id) == pytest.approx(0.8, abs=0.02)
+    assert hold_success_rate(episode, actor_id, item_id, focused=True) == pytest.approx(0.9, abs=0.02)
+
+    episode.put_entity("actors", episode.actors[actor_id].model_copy(update={"health": ActorHealth.POOR_HEALTH, "arousal": ActorArousal.PASSIVE}))
+    assert hold_success_rate(episode, actor_id, item_id) == pytest.approx(0.5, abs=0.02)
+
+
+def test_hold_rolls_are_reproducible_with_a_seed():
+    episode, actor_id, item_id, _ = setup()
+    hold = action(episode, actor_id, ActionType.HOLD, item_id, EntityType.ITEM)
+    first, second = RuleBasedOutcomeResolver(seed=7), RuleBasedOutcomeResolver(seed=7)
+    assert [first.resolve(episode, hold).type for _ in range(50)] == [second.resolve(episode, hold).type for _ in range(50)]
@@ -0,0 +1,67 @@
+import asyncio
+
+from benchmarks.synthetic_episodes import build_synthetic_episode
+from engine.episode_turn_graph import EpisodeTurnGraph
+from engine.parallel_turn_scheduler import ParallelTurnScheduler
+from llm.fake_llm import FakeChatModel
+from models.core.enums import ActorType
+from models.core.junction_graph import Traversal
+
+LATENCY = 0.1
+
+
+def survivors_apart(hops):
+    """Two survivors, the second at least hops away from the first, and the scheduler to run them"""
+    episode = build_synthetic_episode(location_count=20, survivor_count=2, zombie_count=0, item_count=20)
+    location_ids = list(episode.locations)
+    graph = episode.get_junction_graph()
+    distances = graph.get_distances(location_ids[0])
+    far_id = next(location_id for location_id in location_ids if distances.get(location_id, hops) >= hops)
+    survivors = [actor for actor in episode.actors.values() if actor.type == ActorType.HUMAN]
+    for actor, location_id in zip(survivors, [location_ids[0], far_id]):
+        episode.put_entity("actors", actor.model_copy(update={"location_id": location_id}))
+    scheduler = ParallelTurnScheduler(EpisodeTurnGraph(base_model=FakeChatModel(latency=LATENCY, seed=0), persist=False))
+    return episode, scheduler, [actor.uid for actor in survivors]
+
+
+def test_footprint_covers_reachable_locations_their_junctions_and_items():
+    episode, scheduler, (actor_id, _) = survivors_apart(5)
+    actor = episode.actors[actor_id]
+    item = next(iter(episode.items.values()))
+    episode.put_entity("items", item.model_copy(update={"holder_id": actor_id}))
+
+    footprint = scheduler.get_footprint(episode, actor_id)
+
+    graph = episode.get_junction_graph()
+    locations = graph.within(actor.location_id, 2, Traversal.ANY)
+    assert set(locations) <= footprint
+    assert {location_id for location_id in episode.locations if location_id not in locations}.isdisjoint(footprint)
+    for location_id, hops in locations.items():
+        if hops < 2:
+            assert set(graph.get_exits(location_id)) <= footprint
+    assert {found.uid for found in episode.get_items_held_by(locations)} <= footprint
+    assert item.uid in footprint
+
+
+def test_overlapping_footprints_conflict():
+    episode, scheduler, actor_ids = survivors_apart(5)
+    assert scheduler.build_conflict_graph(episode, actor_ids) == {actor_id: set() for actor_id in actor_ids}
+
+    first, second = actor_ids
+    episode.put_entity("actors", episode.actors[second].model_copy(update={"location_id": episode.actors[first].location_id}))
+    assert scheduler.build_conflict_graph(episode, actor_ids) == {first: {second}, second: {first}}
+
+
+def test_independent_turns_run_concurrently_and_conflicting_ones_wait():
+    episode, scheduler, (first, second) = survivors_apart(5)
+    apart = asyncio.run(scheduler.arun_tick(episode))
+    assert (apart.turns, apart.conflict_edges) == (2, 0)
+    # each turn is a generation and an evaluation call
+    assert apart.elapsed_seconds < 3 * LATENCY
+    assert apart.parallelism > 1.5
+
+    episode.put_entity("actors", episode.actors[second].model_copy(update={"location_id": episode.actors[first].location_id}))
+    together = asyncio.run(scheduler.arun_tick(episode))
+    assert (together.turns, together.conflict_edges) == (2, 1)
+    assert together.elapsed_seconds > 3.5 * LATENCY
+    assert together.parallelism < 1.2
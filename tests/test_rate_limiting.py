@@ -0,0 +1,129 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from llm import rate_limiting
+from llm.fake_llm import FakeRateLimitError
+from llm.rate_limiting import RateLimitExceeded, SharedRateLimiter, TokenBucket, is_rate_limit_error
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """a fake clock for the module, advanced only by the limiter's own blocking sleeps"""
+    now = [1000.0]
+
+    def sleep(seconds):
+        now[0] += seconds
+
+    fake_time = SimpleNamespace(monotonic=lambda: now[0], sleep=sleep)
+    monkeypatch.setattr(rate_limiting, "time", fake_time)
+    return fake_time
+
+
+def flaky_call(failures, result="ok"):
+    """a call that is rate limited failures times before answering"""
+    remaining = [failures]
+
+    def call():
+        if remaining[0] > 0:
+            remaining[0] -= 1
+            raise FakeRateLimitError()
+        return result
+
+    return call
+
+
+def test_token_bucket_refills_over_time_up_to_its_capacity(clock):
+    bucket = TokenBucket(per_minute=60)
+
+    assert bucket.reserve(60) == 0.0
+    assert bucket.reserve(1) == pytest.approx(1.0)
+
+    clock.sleep(3)
+    assert bucket.reserve(1) == 0.0
+
+    clock.sleep(1000)
+    bucket.reserve(0)
+    assert bucket.available == 60
+
+
+def test_oversized_request_waits_for_a_full_bucket_only(clock):
+    bucket = TokenBucket(per_minute=60)
+
+    assert bucket.reserve(600) == 0.0
+    assert bucket.reserve(60) == pytest.approx(60.0)
+
+
+def test_run_retries_through_rate_limits_with_doubling_backoff(clock):
+    limiter = SharedRateLimiter(initial_backoff=1.0, max_backoff=3.0)
+
+    assert limiter.run(flaky_call(3), prompt_tokens=10) == "ok"
+    assert limiter.stats.requests == 4
+    assert limiter.stats.rate_limited == 3
+    # waits of 1, 2 and then 3 once the backoff is capped
+    assert limiter.stats.waited_seconds == pytest.approx(6.0)
+    assert limiter.backoff == pytest.approx(1.5)
+
+
+def test_a_rate_limit_pauses_every_client_of_the_limiter(clock):
+    limiter = SharedRateLimiter(max_retries=0, initial_backoff=5.0)
+
+    with pytest.raises(RateLimitExceeded):
+        limiter.run(flaky_call(1), prompt_tokens=10)
+    assert limiter.stats.waited_seconds == 0.0
+
+    assert limiter.run(flaky_call(0, "other client"), prompt_tokens=10) == "other client"
+    assert limiter.stats.waited_seconds == pytest.approx(5.0)
+
+
+def test_run_gives_up_after_max_retries(clock):
+    limiter = SharedRateLimiter(max_retries=2, initial_backoff=0.1)
+
+    with pytest.raises(RateLimitExceeded):
+        limiter.run(flaky_call(10), prompt_tokens=10)
+    assert limiter.stats.requests == 3
+    assert limiter.stats.rate_limited == 3
+
+
+def test_other_errors_are_raised_without_retrying(clock):
+    limiter = SharedRateLimiter()
+
+    def call():
+        raise ValueError("bad request")
+
+    with pytest.raises(ValueError):
+        limiter.run(call, prompt_tokens=10)
+    assert limiter.stats.requests == 1
+    assert limiter.stats.rate_limited == 0
+
+
+def test_arun_shares_the_backoff_across_concurrent_requests():
+    limiter = SharedRateLimiter(max_concurrency=2, initial_backoff=0.01)
+    failing = flaky_call(2)
+
+    async def flaky():
+        return failing()
+
+    async def steady():
+        return "steady"
+
+    async def requests():
+        return await asyncio.gather(
+            limiter.arun(flaky, prompt_tokens=10),
+            limiter.arun(steady, prompt_tokens=10),
+        )
+
+    assert asyncio.run(requests()) == ["ok", "steady"]
+    assert limiter.stats.rate_limited == 2
+    assert limiter.stats.requests == 4
+    assert limiter.stats.waited_seconds > 0
+
+
+def test_is_rate_limit_error_checks_the_status_code():
+    assert is_rate_limit_error(FakeRateLimitError())
+    assert not is_rate_limit_error(ValueError())
+
+    error = Exception()
+    error.status_code = 500
+    assert not is_rate_limit_error(error)
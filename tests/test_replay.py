@@ -0,0 +1,111 @@
+import asyncio
+
+import pytest
+from langchain_core.messages import HumanMessage, SystemMessage
+from pydantic import BaseModel
+
+from benchmarks.synthetic_episodes import build_synthetic_episode
+from engine.episode_turn_graph import EpisodeTurnGraph
+from llm.fake_llm import FakeChatModel
+from llm.replay import EpisodeTrace, ReplayChatModel, ReplayExhausted, TraceRecord, TraceRecorder, prompt_hash
+
+
+class Reply(BaseModel):
+    text: str
+
+
+class Other(BaseModel):
+    text: str
+
+
+def messages(prompt):
+    return [SystemMessage("system"), HumanMessage(prompt)]
+
+
+def record(schema, prompt, text):
+    return TraceRecord(
+        schema_name=schema.__name__,
+        prompt_hash=prompt_hash(messages(prompt)),
+        messages=[(message.type, message.content) for message in messages(prompt)],
+        generation={"text": text},
+    )
+
+
+def make_trace(*records):
+    episode = build_synthetic_episode(location_count=2, survivor_count=1, zombie_count=1, item_count=1)
+    return EpisodeTrace(episode=episode, records=list(records))
+
+
+def replay(model, schema, prompt):
+    return model.with_structured_output(schema).invoke(messages(prompt)).text
+
+
+def test_calls_are_matched_by_schema_and_prompt_in_any_order():
+    model = ReplayChatModel(make_trace(
+        record(Reply, "a", "first a"),
+        record(Reply, "b", "b"),
+        record(Other, "a", "other a"),
+        record(Reply, "a", "second a"),
+    ))
+
+    assert replay(model, Reply, "b") == "b"
+    assert replay(model, Other, "a") == "other a"
+    assert replay(model, Reply, "a") == "first a"
+    assert replay(model, Reply, "a") == "second a"
+    assert model.stats.matched == 4
+    assert model.stats.fallback == 0
+
+
+def test_changed_prompts_fall_back_to_the_schemas_next_unused_record():
+    model = ReplayChatModel(make_trace(
+        record(Reply, "a", "a"),
+        record(Other, "b", "other b"),
+        record(Reply, "b", "b"),
+        record(Reply, "c", "c"),
+    ))
+
+    assert replay(model, Reply, "b") == "b"
+    assert replay(model, Reply, "changed") == "a"
+    assert replay(model, Reply, "changed") == "c"
+    assert model.stats.matched == 1
+    assert model.stats.fallback == 2
+
+    with pytest.raises(ReplayExhausted):
+        replay(model, Reply, "changed")
+
+
+def test_records_served_by_a_fallback_are_not_matched_again():
+    model = ReplayChatModel(make_trace(record(Reply, "a", "a"), record(Reply, "b", "b")))
+
+    assert replay(model, Reply, "changed") == "a"
+    assert replay(model, Reply, "a") == "b"
+    assert model.stats.fallback == 2
+
+
+def test_strict_replays_raise_on_changed_prompts():
+    model = ReplayChatModel(make_trace(record(Reply, "a", "a")), strict=True)
+
+    with pytest.raises(ReplayExhausted):
+        replay(model, Reply, "changed")
+    assert replay(model, Reply, "a") == "a"
+
+
+def test_recorded_rounds_replay_to_the_same_episode(tmp_path):
+    episode = build_synthetic_episode(location_count=4, survivor_count=3, zombie_count=3, item_count=4)
+    recorder = TraceRecorder(episode)
+    graph = EpisodeTurnGraph(base_model=FakeChatModel(seed=0), persist=False, trace_recorder=recorder)
+
+    async def rounds(graph, episode):
+        for _ in range(2):
+            await graph.ainvoke_round(episode)
+
+    asyncio.run(rounds(graph, episode))
+    recorder.save(tmp_path / "trace.json.gz")
+
+    model = ReplayChatModel.load(tmp_path / "trace.json.gz", strict=True)
+    replayed = model.starting_episode()
+    asyncio.run(rounds(EpisodeTurnGraph(base_model=model, persist=False), replayed))
+
+    assert model.stats.matched == len(recorder.trace.records)
+    assert [action.uid for action in replayed.actions] == [action.uid for action in episode.actions]
+    assert replayed.outcomes == episode.outcomes
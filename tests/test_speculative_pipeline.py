@@ -0,0 +1,38 @@
+import asyncio
+
+from benchmarks.synthetic_episodes import build_synthetic_episode
+from engine.episode_turn_graph import EpisodeTurnGraph
+from engine.speculative_pipeline import SpeculativeTurnPipeline
+from llm.fake_llm import FakeChatModel
+from models.core.enums import ActorType
+
+
+def survivors_at(location_indexes):
+    episode = build_synthetic_episode(location_count=8, survivor_count=2, zombie_count=0, item_count=4)
+    location_ids = list(episode.locations)
+    survivors = [actor for actor in episode.actors.values() if actor.type == ActorType.HUMAN]
+    for actor, location_index in zip(survivors, location_indexes):
+        episode.put_entity("actors", actor.model_copy(update={"location_id": location_ids[location_index]}))
+    return episode, [actor.uid for actor in survivors]
+
+
+def run_pipeline(episode, actor_ids):
+    pipeline = SpeculativeTurnPipeline(EpisodeTurnGraph(base_model=FakeChatModel(latency=0.01, seed=0), persist=False))
+    asyncio.run(pipeline.arun(episode, actor_ids))
+    return pipeline.stats
+
+
+def test_speculation_reruns_when_previous_actions_were_in_view():
+    episode, actor_ids = survivors_at([0, 0])
+    stats = run_pipeline(episode, actor_ids)
+    assert (stats.hits, stats.misses) == (0, 1)
+
+
+def test_speculation_commits_when_nothing_in_view_changed():
+    probe, _ = survivors_at([])
+    location_ids = list(probe.locations)
+    graph = probe.get_junction_graph()
+    far_index = next(i for i, location_id in enumerate(location_ids) if (graph.distance(location_ids[0], location_id) or 0) > 1)
+    episode, actor_ids = survivors_at([0, far_index])
+    stats = run_pipeline(episode, actor_ids)
+    assert (stats.hits, stats.misses) == (1, 0)
@@ -0,0 +1,79 @@
+from benchmarks.synthetic_episodes import build_synthetic_episode
+from engine.episode_turn_graph import apply_entity_update
+from engine.zombie_policy import HeuristicZombiePolicy
+from models.core.enums import (ActionType, ActorControl, ActorHealth, ActorType, EntityType, JunctionAccessibility,
+                               JunctionCondition)
+from models.core.junction_graph import Traversal
+
+
+def hunt(distance):
+    """An episode with every junction open and a zombie that many hops from the only survivor"""
+    episode = build_synthetic_episode(location_count=12, survivor_count=1, zombie_count=1, item_count=0)
+    for junction in list(episode.junctions.values()):
+        apply_entity_update(episode, junction.model_copy(update={"accessibility": JunctionAccessibility.OPEN, "condition": JunctionCondition.FUNCTIONAL}))
+    survivor = next(actor for actor in episode.actors.values() if actor.type == ActorType.HUMAN)
+    zombie = next(actor for actor in episode.actors.values() if actor.type == ActorType.ZOMBIE)
+    distances = episode.get_junction_graph().get_distances(survivor.location_id)
+    location_id = next(location_id for location_id, hops in distances.items() if hops == distance)
+    apply_entity_update(episode, zombie.model_copy(update={"location_id": location_id}))
+    return episode, survivor.uid, zombie.uid
+
+
+def set_junction(episode, junction_id, accessibility):
+    apply_entity_update(episode, episode.junctions[junction_id].model_copy(update={"accessibility": accessibility}))
+
+
+def test_incapacitated_zombies_freeze():
+    episode, _, zombie_id = hunt(0)
+    apply_entity_update(episode, episode.actors[zombie_id].model_copy(update={"control": ActorControl.IMMOBILIZED}))
+    assert HeuristicZombiePolicy(seed=0).choose_action(episode, zombie_id).type == ActionType.FREEZE
+
+
+def test_zombies_attack_or_grab_prey_in_their_location():
+    episode, survivor_id, zombie_id = hunt(0)
+    fight = HeuristicZombiePolicy(seed=0, grab_chance=0).choose_action(episode, zombie_id)
+    grab = HeuristicZombiePolicy(seed=0, grab_chance=1).choose_action(episode, zombie_id)
+    assert (fight.type, fight.target_entity_id) == (ActionType.FIGHT, survivor_id)
+    assert (grab.type, grab.target_entity_id) == (ActionType.HOLD, survivor_id)
+
+    apply_entity_update(episode, episode.actors[survivor_id].model_copy(update={"health": ActorHealth.DEAD}))
+    assert HeuristicZombiePolicy(seed=0).choose_action(episode, zombie_id).target_entity_type == EntityType.JUNCTION
+
+
+def test_zombies_walk_the_shortest_path_towards_prey():
+    episode, survivor_id, zombie_id = hunt(3)
+    graph = episode.get_junction_graph()
+    towards = graph.get_distances(episode.actors[survivor_id].location_id)
+
+    action = HeuristicZombiePolicy(seed=0).choose_action(episode, zombie_id)
+
+    assert action.type == ActionType.MOVE
+    next_id = graph.get_exits(episode.actors[zombie_id].location_id)[action.target_entity_id]
+    assert towards[next_id] == 2
+
+
+def test_zombies_batter_closed_junctions_on_their_path():
+    episode, _, zombie_id = hunt(3)
+    policy = HeuristicZombiePolicy(seed=0)
+    junction_id = policy.choose_action(episode, zombie_id).target_entity_id
+    set_junction(episode, junction_id, JunctionAccessibility.BARRICADED)
+
+    action = policy.choose_action(episode, zombie_id)
+
+    # a closed route is still the shortest, so the zombie batters it rather than walking around
+    assert (action.type, action.target_entity_id) == (ActionType.FIGHT, junction_id)
+
+
+def test_zombies_without_prey_wander_through_passable_junctions_or_sway():
+    episode, survivor_id, zombie_id = hunt(2)
+    apply_entity_update(episode, episode.actors[survivor_id].model_copy(update={"health": ActorHealth.DEAD}))
+    location_id = episode.actors[zombie_id].location_id
+    graph = episode.get_junction_graph()
+
+    action = HeuristicZombiePolicy(seed=0).choose_action(episode, zombie_id)
+    assert action.type == ActionType.MOVE
+    assert action.target_entity_id in graph.get_exits(location_id, Traversal.PASSABLE)
+
+    for junction_id in list(graph.get_exits(location_id)):
+        set_junction(episode, junction_id, JunctionAccessibility.LOCKED)
+    assert HeuristicZombiePolicy(seed=0).choose_action(episode, zombie_id).type == ActionType.FREEZE